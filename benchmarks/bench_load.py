@@ -0,0 +1,234 @@
+"""
+Сквозной нагрузочный тест цикла проверки: синтетические пользователи и ссылки
+(подписки распределены по Zipf), заглушки GitHub и StackExchange с задержкой,
+лимитами и частотой изменений и поддельный Telegram. Каждый цикл проверяет
+все ссылки через реестр провайдеров, строит уведомления и рассылает их через
+send_messages_to_users. Первый цикл - прогрев (первичная проверка ссылок),
+в отчет идут остальные.
+
+Без --db-url состояние ссылок хранится в памяти процесса, с --db-url цикл идет
+через SqlDbProcessor.check_updates_for_all_users в базе с примененными
+миграциями (таблицы должны быть пустыми).
+
+KiB - объем тел ответов заглушек за цикл. Для сравнения со встроенным фильтром
+StackExchange вместо фильтра с нужными полями: STACKEXCHANGE_FILTER=withbody.
+
+С --change-rate 0 циклы после прогрева не должны давать уведомлений, иначе
+запуск завершается с ошибкой: это проверка, что уже доставленные события
+не рассылаются повторно.
+
+Запуск: python -m benchmarks.bench_load [--users 1000] [--links 5000] [--cycles 5]
+    [--interval 2] [--latency-ms 20] [--rate-limit 0] [--change-rate 0.05]
+    [--stackexchange-down] [--db-url postgresql://...]
+"""
+
+import argparse
+import asyncio
+import resource
+import statistics
+import time
+from dataclasses import replace
+
+from benchmarks.load.dataset import Dataset, generate_dataset
+from benchmarks.load.stubs import GitHubStub, StackExchangeStub, StubConfig, stub_transport
+from benchmarks.load.telegram_sink import FakeTelegramSink
+from src.api.bot_api.bot_send_message import send_messages_to_users
+from src.api.providers.base import TrackedLink
+from src.api.schemas.schemas import AddLinkRequest, LinkUpdate, ListLinksUpdate
+from src.api.scrapper_api.http_client import close_http_client, use_transport
+from src.api.scrapper_api.link_target import classify_url
+from src.api.utils.string_makers import make_description
+from src.initialization.providers_init import provider_registry
+
+
+class InMemoryCycle:
+    """Цикл проверки без базы: водяные знаки ссылок хранятся в словаре"""
+
+    def __init__(self, dataset: Dataset):
+        self.urls = dataset.links
+        self.subscribers = dataset.subscribers()
+        self.links = {
+            link_id: TrackedLink(classify_url(self.urls[link_id]), None)
+            for link_id in self.subscribers
+        }
+
+    async def run(self) -> list[LinkUpdate]:
+        results = await provider_registry.fetch_updates(self.links)
+        updates = []
+        for link_id, result in results.items():
+            self.links[link_id] = TrackedLink(
+                self.links[link_id].target, result.watermark, result.seen_ids
+            )
+            for update_info in result.events:
+                description = await make_description(update_info)
+                updates.extend(
+                    LinkUpdate(
+                        id=link_id,
+                        url=self.urls[link_id],
+                        description=description,
+                        tg_chat_id=tg_chat_id,
+                        update_info=update_info,
+                    )
+                    for tg_chat_id in self.subscribers[link_id]
+                )
+        return updates
+
+
+class DatabaseCycle:
+    """Цикл проверки через SqlDbProcessor, как в scrapper"""
+
+    def __init__(self, db_url: str):
+        from src.database.sql_database import SqlDbProcessor
+
+        self.processor = SqlDbProcessor(db_url)
+
+    async def load(self, dataset: Dataset) -> None:
+        await self.processor.connect()
+        for tg_chat_id, link_ids in dataset.subscriptions.items():
+            await self.processor.add_user(tg_chat_id)
+            for link_id in link_ids:
+                await self.processor.add_link_for_user(
+                    tg_chat_id, AddLinkRequest(url=dataset.links[link_id], tags=[], filters=[])
+                )
+
+    async def run(self) -> list[LinkUpdate]:
+        return await self.processor.check_updates_for_all_users()
+
+
+def percentile(values: list[float], share: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def max_rss_mb() -> float:
+    # ru_maxrss в Linux - в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def stubs_bytes(*stubs) -> int:
+    return sum(stub.bytes_sent for stub in stubs)
+
+
+async def run_cycle(cycle, sink: FakeTelegramSink) -> tuple[float, int, list[float]]:
+    """
+    Один цикл: проверка ссылок и рассылка уведомлений
+    :return: длительность, число уведомлений и задержки доставки событий в секундах
+    """
+    started_at = time.perf_counter()
+    updates = await cycle.run()
+    await send_messages_to_users(ListLinksUpdate(links=updates).model_dump(), sink)
+    elapsed = time.perf_counter() - started_at
+
+    latencies = [
+        sink.delivered_at[update.tg_chat_id] - update.update_info.created_at.timestamp()
+        for update in updates
+        if update.update_info is not None and update.update_info.created_at is not None
+    ]
+    return elapsed, len(updates), latencies
+
+
+async def run(args: argparse.Namespace) -> None:
+    started_at = time.perf_counter()
+    dataset = generate_dataset(
+        args.users, args.links, args.links_per_user, args.zipf, seed=args.seed
+    )
+    tracked = len(dataset.subscribers())
+    print(
+        f"dataset: {args.users} users, {tracked} tracked links, "
+        f"{dataset.subscription_count} subscriptions ({time.perf_counter() - started_at:.1f}s)"
+    )
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.latency_ms / 4,
+        rate_limit=args.rate_limit,
+        change_rate=args.change_rate,
+        seed=args.seed,
+    )
+    github = GitHubStub(config)
+    stackexchange = StackExchangeStub(replace(config, down=args.stackexchange_down))
+    use_transport(stub_transport(github, stackexchange))
+    sink = FakeTelegramSink(args.telegram_latency_ms)
+
+    if args.db_url:
+        cycle = DatabaseCycle(args.db_url)
+        await cycle.load(dataset)
+    else:
+        cycle = InMemoryCycle(dataset)
+
+    elapsed, updates, _ = await run_cycle(cycle, sink)
+    print(f"warmup: {elapsed:.2f}s, {updates} updates")
+
+    total_elapsed, total_updates, all_latencies = 0.0, 0, []
+    warmup_bytes = stubs_bytes(github, stackexchange)
+    print(
+        f"{'cycle':>5} {'seconds':>8} {'links/s':>9} {'updates':>8} {'updates/s':>10} {'KiB':>8}"
+    )
+    for num in range(1, args.cycles + 1):
+        await asyncio.sleep(args.interval)
+        cycle_bytes = stubs_bytes(github, stackexchange)
+        elapsed, updates, latencies = await run_cycle(cycle, sink)
+        cycle_bytes = stubs_bytes(github, stackexchange) - cycle_bytes
+        total_elapsed += elapsed
+        total_updates += updates
+        all_latencies.extend(latencies)
+        print(
+            f"{num:>5} {elapsed:>8.2f} {tracked / elapsed:>9.0f} "
+            f"{updates:>8} {updates / elapsed:>10.0f} {cycle_bytes / 1024:>8.0f}"
+        )
+
+    if total_elapsed:
+        print(
+            f"total: {tracked * args.cycles / total_elapsed:.0f} links/s, "
+            f"{total_updates / total_elapsed:.0f} updates/s"
+        )
+    if all_latencies:
+        # время событий в API - с точностью до секунды
+        print(
+            f"notification latency: p50={statistics.median(all_latencies):.2f}s "
+            f"p99={percentile(all_latencies, 0.99):.2f}s max={max(all_latencies):.2f}s"
+        )
+    print(f"telegram: {sink.messages} messages, {sink.bytes / 1024:.0f} KiB")
+    print(f"warmup downloaded: {warmup_bytes / 1024:.0f} KiB")
+    for name, stub in (("github", github), ("stackexchange", stackexchange)):
+        print(
+            f"{name}: {len(stub.streams)} objects, responses {dict(stub.responses)}, "
+            f"{stub.bytes_sent / 1024:.0f} KiB"
+        )
+    print(f"max RSS: {max_rss_mb():.0f} MiB")
+
+    await close_http_client()
+    use_transport(None)
+    if args.db_url:
+        await cycle.processor.close()
+
+    # без изменений в API после прогрева уведомлений быть не должно: иначе цикл
+    # повторно рассылает уже доставленные события
+    if args.change_rate == 0 and total_updates:
+        raise SystemExit(f"change rate 0, but {total_updates} updates after warmup")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--links", type=int, default=5000, help="различных ссылок в наборе")
+    parser.add_argument("--links-per-user", type=int, default=10)
+    parser.add_argument("--zipf", type=float, default=1.1, help="показатель распределения Zipf")
+    parser.add_argument("--cycles", type=int, default=5)
+    parser.add_argument("--interval", type=float, default=2.0, help="пауза между циклами, с")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="задержка ответа API")
+    parser.add_argument("--rate-limit", type=int, default=0, help="запросов в час, 0 - без лимита")
+    parser.add_argument("--change-rate", type=float, default=0.05, help="событий/с на объект")
+    parser.add_argument(
+        "--stackexchange-down", action="store_true", help="заглушка StackExchange не отвечает"
+    )
+    parser.add_argument("--telegram-latency-ms", type=float, default=0.0)
+    parser.add_argument("--db-url", default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Бенчмарк задержки event loop при логировании: задачи горячего пути пишут
+DEBUG-записи с payload, а отдельная задача измеряет, на сколько опаздывает
+её пробуждение. Сравниваются логирование выключено, синхронные обработчики
+(как раньше: FileHandler и StreamHandler в вызывающем потоке) и очередь
+с QueueListener. Файлы пишутся во временный каталог, консоль - в /dev/null.
+
+Запуск: python -m benchmarks.bench_logging [--records 20000] [--payload 2000]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+TICK_SECONDS = 0.001
+WRITERS = 50
+
+
+async def measure_lag(stop: asyncio.Event) -> list[float]:
+    lags = []
+    while not stop.is_set():
+        started_at = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - started_at - TICK_SECONDS)
+    return lags
+
+
+async def write_records(logger: logging.Logger, records: int, payload: str) -> None:
+    for num in range(records):
+        logger.debug("Обновление %s: %s", num, payload)
+        logger.info("Обработано сообщение %s", num)
+        if num % 10 == 0:
+            await asyncio.sleep(0)
+
+
+async def run_mode(
+    logger: logging.Logger, records: int, payload: str
+) -> tuple[float, list[float]]:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop))
+    started_at = time.perf_counter()
+    await asyncio.gather(
+        *(write_records(logger, records // WRITERS, payload) for _ in range(WRITERS))
+    )
+    elapsed = time.perf_counter() - started_at
+    stop.set()
+    return elapsed, await lag_task
+
+
+def sync_logger(log_dir: Path, devnull) -> logging.Logger:
+    from src.logger.logger_init import JSONFormatter
+
+    logger = logging.getLogger("bench_sync")
+    logger.setLevel(logging.DEBUG)
+    file_handler = logging.FileHandler(log_dir / "sync.json", encoding="utf-8")
+    file_handler.setFormatter(JSONFormatter())
+    logger.addHandler(file_handler)
+    logger.addHandler(logging.StreamHandler(devnull))
+    return logger
+
+
+def report(mode: str, records: int, elapsed: float, lags: list[float]) -> None:
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[int(len(lags_ms) * 0.99) - 1] if len(lags_ms) > 1 else lags_ms[0]
+    print(
+        f"{mode:>5}: {records * 2 / elapsed:>9.0f} records/s, loop lag "
+        f"p50={statistics.median(lags_ms):.2f}ms p99={p99:.2f}ms max={lags_ms[-1]:.2f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--payload", type=int, default=2000, help="длина payload DEBUG-записи")
+    args = parser.parse_args()
+    payload = "x" * args.payload
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        log_dir = Path(tmp)
+        # каталог logger/ модуль логирования создает относительно текущего
+        os.chdir(tmp)
+        from src.logger.logger_init import setup_logger, stop_listener
+
+        off = logging.getLogger("bench_off")
+        off.disabled = True
+        queued, listener = setup_logger("bench_queue", log_dir / "queue", "DEBUG", devnull)
+
+        modes = (("off", off), ("sync", sync_logger(log_dir, devnull)), ("queue", queued))
+        for mode, logger in modes:
+            elapsed, lags = asyncio.run(run_mode(logger, args.records, payload))
+            report(mode, args.records, elapsed, lags)
+        stop_listener(listener)
+        # переполненная очередь отбрасывает записи, а не тормозит loop
+        print(f"queue: dropped {queued.handlers[0].dropped} records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Бенчмарк роутера сообщений бота: тысячи одновременных диалогов /track
+(команда, ссылка, теги, фильтры) прогоняются через dispatch_message.
+Сеть не используется, ответы бота отбрасываются.
+
+Запуск: python -m benchmarks.bench_router [--dialogs 5000] [--storage memory|redis]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+DIALOG_MESSAGES = ("/track", "https://github.com/owner/repo", "tag1\ntag2", "-")
+
+
+async def discard(*args, **kwargs) -> None:
+    return None
+
+
+def make_event(user_id: int, text: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        sender_id=user_id,
+        chat_id=user_id,
+        text=text,
+        message=SimpleNamespace(text=text),
+        respond=discard,
+        reply=discard,
+    )
+
+
+async def run_dialog(dispatch, user_id: int) -> None:
+    for text in DIALOG_MESSAGES:
+        await dispatch(make_event(user_id, text))
+
+
+async def run(dialogs: int) -> None:
+    from src.bot.router import dispatch_message
+    from src.initialization.state_store_init import state_store
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run_dialog(dispatch_message, user_id) for user_id in range(dialogs)))
+    elapsed = time.perf_counter() - started_at
+
+    messages = dialogs * len(DIALOG_MESSAGES)
+    print(f"storage={type(state_store).__name__} dialogs={dialogs} messages={messages}")
+    print(f"elapsed={elapsed:.3f}s throughput={messages / elapsed:.0f} msg/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dialogs", type=int, default=5000)
+    parser.add_argument("--storage", choices=("memory", "redis"), default="memory")
+    args = parser.parse_args()
+
+    # хранилище выбирается при импорте роутера
+    os.environ["FSM_STORAGE"] = args.storage
+    asyncio.run(run(args.dialogs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+Масштабирование воркеров проверки по процессам: N процессов src.scrapper_worker
+запускаются через scrapper_runner, делят ссылки через группу шардов в Redis
+и проверяют их без паузы между циклами, каждый через свой пул HTTP-соединений,
+подключенный к заглушкам GitHub и StackExchange из benchmarks/load/stubs.py
+(заглушки живут в каждом процессе, задержка и частота изменений - общие).
+Ссылки/с - прирост счетчика linktracker_links_checked_total всех процессов
+за --duration секунд после прогрева (вход в группу и первичная проверка).
+
+Нужны prometheus_client, Postgres с примененными миграциями и пустыми таблицами
+(--db-url, ACCESS_TYPE выбирает процессор) и Redis (--redis-url), не используемые
+настоящим scrapper: бенчмарк вступает в ту же группу шардов.
+
+Запуск: python -m benchmarks.bench_scrapper_processes --db-url postgresql://...
+    [--redis-url redis://localhost:6379] [--users 1000] [--links 5000]
+    [--max-processes 8] [--warmup 15] [--duration 30] [--latency-ms 20] [--change-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.sharedctypes import Synchronized
+
+from benchmarks.bench_load import DatabaseCycle
+from benchmarks.load.dataset import generate_dataset
+from benchmarks.load.stubs import GitHubStub, StackExchangeStub, StubConfig, stub_transport
+from src.api.scrapper_api.http_client import use_transport
+from src.api.utils.metrics import LINKS_CHECKED, prometheus_client
+from src.scrapper_runner import spawn_worker, stop_workers
+
+# как часто процесс публикует свой счетчик проверенных ссылок, с
+REPORT_INTERVAL_SECONDS = 0.5
+
+
+def links_checked_total() -> float:
+    return sum(
+        sample.value
+        for metric in LINKS_CHECKED.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_total")
+    )
+
+
+async def report_links_checked(checked: Synchronized) -> None:
+    while True:
+        checked.value = links_checked_total()
+        await asyncio.sleep(REPORT_INTERVAL_SECONDS)
+
+
+def run_bench_worker(config: StubConfig, checked: Synchronized) -> None:
+    """
+    Точка входа процесса: тот же воркер, что в scrapper_runner, но пул HTTP-соединений
+    процесса подключен к заглушкам, а счетчик проверенных ссылок виден родителю
+    :param config:
+    :param checked: общий счетчик процесса
+    :return:
+    """
+    from src.scrapper_worker import run_until_terminated, run_worker
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    use_transport(stub_transport(GitHubStub(config), StackExchangeStub(config)))
+
+    async def main() -> None:
+        report_task = asyncio.create_task(report_links_checked(checked))
+        try:
+            await run_worker()
+        finally:
+            report_task.cancel()
+
+    asyncio.run(run_until_terminated(main()))
+
+
+def measure(processes: int, config: StubConfig, warmup: float, duration: float) -> float:
+    """
+    Запускает processes воркеров и считает проверенные ими ссылки
+    :return: ссылок в секунду на все процессы
+    """
+    ctx = multiprocessing.get_context("spawn")
+    counters = [ctx.Value("d", 0.0) for _ in range(processes)]
+    workers = [
+        spawn_worker(ctx, num, run_bench_worker, (config, counters[num]))
+        for num in range(processes)
+    ]
+    try:
+        time.sleep(warmup)
+        checked = sum(counter.value for counter in counters)
+        started_at = time.perf_counter()
+        time.sleep(duration)
+        checked = sum(counter.value for counter in counters) - checked
+        elapsed = time.perf_counter() - started_at
+    finally:
+        stop_workers(workers)
+    return checked / elapsed
+
+
+async def seed(db_url: str, args: argparse.Namespace) -> int:
+    dataset = generate_dataset(args.users, args.links, args.links_per_user, seed=args.seed)
+    cycle = DatabaseCycle(db_url)
+    try:
+        await cycle.load(dataset)
+    finally:
+        await cycle.processor.close()
+    return len(dataset.subscribers())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--db-url", required=True)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--links", type=int, default=5000, help="различных ссылок в наборе")
+    parser.add_argument("--links-per-user", type=int, default=10)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--warmup", type=float, default=15.0, help="прогрев перед замером, с")
+    parser.add_argument("--duration", type=float, default=30.0, help="длительность замера, с")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="задержка ответа API")
+    parser.add_argument("--change-rate", type=float, default=0.05, help="событий/с на объект")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if prometheus_client is None:
+        raise SystemExit("prometheus_client is required to count checked links")
+
+    # настройки наследуют дочерние процессы: воркеры читают их при импорте
+    os.environ["DATABASE_URL"] = args.db_url
+    os.environ["REDIS_URL"] = args.redis_url
+    os.environ["SCRAPPER_WORKER_INTERVAL"] = "0"
+
+    tracked = asyncio.run(seed(args.db_url, args))
+    print(f"dataset: {args.users} users, {tracked} tracked links")
+
+    config = StubConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.latency_ms / 4,
+        change_rate=args.change_rate,
+        seed=args.seed,
+    )
+    baseline = None
+    print(f"{'processes':>9} {'links/s':>10} {'per process':>12} {'speedup':>8}")
+    processes = 1
+    while processes <= args.max_processes:
+        rate = measure(processes, config, args.warmup, args.duration)
+        baseline = baseline or rate
+        print(
+            f"{processes:>9} {rate:>10.0f} {rate / processes:>12.0f} "
+            f"{rate / baseline if baseline else 0:>8.2f}"
+        )
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
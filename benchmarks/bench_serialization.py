@@ -0,0 +1,97 @@
+"""
+Бенчмарк сериализации сообщения с обновлениями: прежний путь
+(.dict() + json.dumps) против orjson и msgpack. Для каждого формата
+замеряется процессорное время кодирования и разбора и размер сообщения.
+
+Запуск: python -m benchmarks.bench_serialization [--updates 100000] [--repeat 3]
+"""
+
+import argparse
+import json
+import time
+import warnings
+from typing import Callable
+
+from src.api.schemas.schemas import LinkUpdate, ListLinksUpdate
+from src.api.utils.serialization import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    dump_message,
+    load_message,
+    msgpack,
+)
+
+
+def make_update(num: int) -> LinkUpdate:
+    return LinkUpdate(
+        id=num,
+        url=f"https://github.com/owner{num % 100}/repo{num}",
+        description=(
+            f"🔔 Новый PR: Fix issue #{num}\n"
+            f"👤 Автор: user{num % 37}\n"
+            "🕒 Создано: 2024-05-12 10:15\n"
+            "📝 Превью: исправлена обработка пустого ответа " * 2
+        ),
+        tg_chat_id=100000 + num % 5000,
+    )
+
+
+def json_before(updates: ListLinksUpdate) -> bytes:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        return json.dumps(updates.dict()).encode("utf-8")
+
+
+def measure(
+    label: str, encode: Callable[[], bytes], decode: Callable[[bytes], dict], repeat: int
+) -> int:
+    best_encode = best_decode = float("inf")
+    for _ in range(repeat):
+        started_at = time.process_time()
+        body = encode()
+        best_encode = min(best_encode, time.process_time() - started_at)
+
+        started_at = time.process_time()
+        decoded = decode(body)
+        best_decode = min(best_decode, time.process_time() - started_at)
+    print(
+        f"{label:<22} encode={best_encode * 1000:8.1f}ms "
+        f"decode={best_decode * 1000:8.1f}ms size={len(body) / 1024 / 1024:7.2f}MiB"
+    )
+    return len(decoded["links"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--updates", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    updates = ListLinksUpdate(links=[make_update(num) for num in range(args.updates)])
+    print(f"updates={args.updates} repeat={args.repeat} (лучшее время из повторов)")
+
+    measure(
+        "json (.dict, before)",
+        lambda: json_before(updates),
+        lambda body: json.loads(body.decode("utf-8")),
+        args.repeat,
+    )
+    measure(
+        "orjson",
+        lambda: dump_message(updates.model_dump(), JSON_MEDIA_TYPE),
+        lambda body: load_message(body, JSON_MEDIA_TYPE),
+        args.repeat,
+    )
+    if msgpack is None:
+        print("msgpack не установлен, формат пропущен")
+        return
+    measure(
+        "msgpack",
+        lambda: dump_message(updates.model_dump(), MSGPACK_MEDIA_TYPE),
+        lambda body: load_message(body, MSGPACK_MEDIA_TYPE),
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import random
+from dataclasses import dataclass
+from itertools import accumulate
+
+# доли видов ссылок в наборе: репозиторий, issue, pull request, вопрос StackOverflow
+LINK_KIND_SHARES = {"repo": 0.4, "issue": 0.15, "pull": 0.15, "question": 0.3}
+REPOS_PER_OWNER = 20
+FIRST_QUESTION_ID = 1_000_000
+
+
+@dataclass
+class Dataset:
+    links: list[str]
+    # tg_chat_id -> индексы ссылок в links
+    subscriptions: dict[int, list[int]]
+
+    @property
+    def subscription_count(self) -> int:
+        return sum(len(link_ids) for link_ids in self.subscriptions.values())
+
+    def subscribers(self) -> dict[int, list[int]]:
+        """
+        Обратный индекс подписок: индекс ссылки -> чаты, отслеживающие её
+        :return:
+        """
+        result: dict[int, list[int]] = {}
+        for tg_chat_id, link_ids in self.subscriptions.items():
+            for link_id in link_ids:
+                result.setdefault(link_id, []).append(tg_chat_id)
+        return result
+
+
+def make_link(num: int, kind: str) -> str:
+    if kind == "question":
+        return f"https://stackoverflow.com/questions/{FIRST_QUESTION_ID + num}"
+    repo = f"https://github.com/owner{num // REPOS_PER_OWNER}/repo{num}"
+    if kind == "repo":
+        return repo
+    return f"{repo}/{'issues' if kind == 'issue' else 'pull'}/{num % 500 + 1}"
+
+
+def generate_dataset(
+    users: int,
+    links: int,
+    links_per_user: int,
+    zipf_s: float = 1.1,
+    seed: int = 0,
+) -> Dataset:
+    """
+    Синтетические пользователи и ссылки. Популярность ссылок распределена
+    по Zipf: ссылка ранга k выбирается с весом 1 / k^s, поэтому немногие ссылки
+    отслеживают почти все, а у длинного хвоста по одному подписчику
+    :param users:
+    :param links: число различных ссылок
+    :param links_per_user: подписок у каждого пользователя
+    :param zipf_s: показатель распределения, 0 - равномерное
+    :param seed:
+    :return:
+    """
+    rng = random.Random(seed)
+    kinds, shares = zip(*LINK_KIND_SHARES.items())
+    urls = [make_link(num, kind) for num, kind in enumerate(rng.choices(kinds, shares, k=links))]
+
+    cum_weights = list(accumulate(1 / (rank + 1) ** zipf_s for rank in range(links)))
+    population = range(links)
+    per_user = min(links_per_user, links)
+    subscriptions = {}
+    for tg_chat_id in range(1, users + 1):
+        chosen: set[int] = set()
+        while len(chosen) < per_user:
+            chosen.update(
+                rng.choices(population, cum_weights=cum_weights, k=per_user - len(chosen))
+            )
+        subscriptions[tg_chat_id] = sorted(chosen)
+    return Dataset(urls, subscriptions)
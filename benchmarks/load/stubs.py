@@ -0,0 +1,430 @@
+"""
+Заглушки GitHub REST API и StackExchange API для нагрузочного теста.
+Каждая заглушка - ASGI-приложение, обслуживающее те же endpoint'ы, что
+вызывают провайдеры, с настраиваемой задержкой, лимитом запросов и частотой
+изменений. Объекты в ответах - с тем же набором полей, что отдают настоящие API,
+чтобы объем ответов был сопоставим. Запросы провайдеров попадают в заглушки
+через StubTransport, подключенный к общему пулу http_client.use_transport
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import time
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Hashable
+
+import httpx
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+# сколько последних событий объекта хранит заглушка
+MAX_EVENTS_KEPT = 500
+# насколько в прошлое уходит первое событие объекта, созданного до запуска
+HISTORY_SECONDS = 86400
+
+
+@dataclass
+class StubConfig:
+    # задержка ответа: нормальное распределение со средним latency_ms
+    latency_ms: float = 20.0
+    jitter_ms: float = 5.0
+    # запросов за окно rate_window_seconds, 0 - без ограничения
+    rate_limit: int = 0
+    rate_window_seconds: float = 3600.0
+    # событий в секунду у одного объекта (репозитория, issue, вопроса)
+    change_rate: float = 0.01
+    body_size: int = 400
+    seed: int = 0
+    # API не отвечает: запросы висят до таймаута клиента
+    down: bool = False
+
+
+class EventStream:
+    """
+    Моменты событий одного объекта - пуассоновский поток. События досоздаются
+    лениво при обращении, поэтому память растет с числом запрошенных объектов,
+    а не со временем работы
+    """
+
+    def __init__(self, rng: random.Random, rate: float, started_at: float):
+        self._rng = rng
+        self._rate = rate
+        self.count = 1
+        self.events: deque[tuple[int, int]] = deque(maxlen=MAX_EVENTS_KEPT)
+        self.events.append((1, int(started_at - rng.uniform(0, HISTORY_SECONDS))))
+        self._next_at = started_at + rng.expovariate(rate) if rate > 0 else float("inf")
+
+    def advance(self, now: float) -> deque[tuple[int, int]]:
+        """
+        События до момента now
+        :param now:
+        :return: (порядковый номер, unix-время в секундах), от старых к новым
+        """
+        while self._next_at <= now:
+            self.count += 1
+            self.events.append((self.count, int(self._next_at)))
+            self._next_at += self._rng.expovariate(self._rate)
+        return self.events
+
+
+class RateLimiter:
+    def __init__(self, limit: int, window_seconds: float):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self._used = 0
+        self._reset_at = 0.0
+
+    def take(self, now: float) -> int | None:
+        """
+        Списывает запрос с лимита окна
+        :param now:
+        :return: остаток лимита, None - лимит исчерпан
+        """
+        if now >= self._reset_at:
+            self._used, self._reset_at = 0, now + self.window_seconds
+        if self._used >= self.limit:
+            return None
+        self._used += 1
+        return self.limit - self._used
+
+
+class ApiStub:
+    def __init__(self, config: StubConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.started_at = time.time()
+        self.limiter = RateLimiter(config.rate_limit, config.rate_window_seconds)
+        self.streams: dict[Hashable, EventStream] = {}
+        # HTTP-статус -> число ответов
+        self.responses: Counter[int] = Counter()
+        # байты тел всех ответов
+        self.bytes_sent = 0
+        self.app = Starlette(routes=self.routes())
+
+    def routes(self) -> list[Route]:
+        raise NotImplementedError
+
+    def events(self, key: Hashable) -> deque[tuple[int, int]]:
+        stream = self.streams.get(key)
+        if stream is None:
+            stream = self.streams[key] = EventStream(
+                self.rng, self.config.change_rate, self.started_at
+            )
+        return stream.advance(time.time())
+
+    def body(self, seed: int) -> str:
+        return f"event {seed} " + "x" * self.config.body_size
+
+    async def delay(self) -> None:
+        if self.config.down:
+            await asyncio.Event().wait()
+        latency = self.rng.gauss(self.config.latency_ms, self.config.jitter_ms)
+        await asyncio.sleep(max(latency, 0) / 1000)
+
+    def take_quota(self) -> tuple[bool, int | None]:
+        """
+        :return: разрешен ли запрос и остаток лимита (None - лимита нет)
+        """
+        if not self.config.rate_limit:
+            return True, None
+        remaining = self.limiter.take(time.time())
+        return remaining is not None, remaining
+
+    def respond(self, status: int, content: bytes, headers: dict[str, str] | None = None):
+        self.responses[status] += 1
+        self.bytes_sent += len(content)
+        return Response(content, status, headers, media_type="application/json")
+
+
+def page_slice(items: list, request: Request, size_param: str) -> tuple[list, bool]:
+    """
+    Страница списка по параметрам page и per_page/pagesize
+    :return: элементы страницы и есть ли следующие
+    """
+    size = int(request.query_params.get(size_param, 30))
+    page = int(request.query_params.get("page", 1))
+    start = (page - 1) * size
+    return items[start : start + size], len(items) > start + size
+
+
+def github_time(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def github_user(login: str) -> dict[str, Any]:
+    api = f"https://api.github.com/users/{login}"
+    user_id = zlib.crc32(login.encode()) % 10**8
+    return {
+        "login": login,
+        "id": user_id,
+        "node_id": f"MDQ6VXNlcj{login}",
+        "avatar_url": f"https://avatars.githubusercontent.com/u/{user_id}?v=4",
+        "url": api,
+        "html_url": f"https://github.com/{login}",
+        "followers_url": f"{api}/followers",
+        "repos_url": f"{api}/repos",
+        "events_url": f"{api}/events{{/privacy}}",
+        "type": "User",
+        "site_admin": False,
+    }
+
+
+def github_reactions(url: str) -> dict[str, Any]:
+    reactions = ("+1", "-1", "laugh", "hooray", "confused", "heart", "rocket", "eyes")
+    return {"url": f"{url}/reactions", "total_count": 0, **dict.fromkeys(reactions, 0)}
+
+
+def stackexchange_owner(num: int) -> dict[str, Any]:
+    user_id = 1000 + num
+    return {
+        "account_id": user_id * 3,
+        "reputation": num * 17,
+        "user_id": user_id,
+        "user_type": "registered",
+        "profile_image": f"https://www.gravatar.com/avatar/{user_id:032x}?s=256&d=identicon&r=PG",
+        "display_name": f"user{num}",
+        "link": f"https://stackoverflow.com/users/{user_id}/user{num}",
+    }
+
+
+class GitHubStub(ApiStub):
+    """
+    Репозитории, issues, pull requests и комментарии. Новые события репозитория -
+    новые issues, у issue или PR первое событие - он сам, остальные - комментарии.
+    Как и GitHub, отвечает 304 по ETag, не списывая такой запрос с лимита,
+    и 403 при исчерпанном лимите
+    """
+
+    def routes(self) -> list[Route]:
+        return [
+            Route("/repos/{owner}/{repo}/issues", self.repo_issues),
+            Route("/repos/{owner}/{repo}/issues/{number:int}/comments", self.comments),
+            Route("/repos/{owner}/{repo}/{kind}/{number:int}", self.item),
+        ]
+
+    def issue(self, owner: str, repo: str, number: int, timestamp: int) -> dict[str, Any]:
+        url = f"https://api.github.com/repos/{owner}/{repo}/issues/{number}"
+        return {
+            "url": url,
+            "repository_url": f"https://api.github.com/repos/{owner}/{repo}",
+            "comments_url": f"{url}/comments",
+            "events_url": f"{url}/events",
+            "html_url": f"https://github.com/{owner}/{repo}/issues/{number}",
+            "id": number,
+            "number": number,
+            "title": f"{owner}/{repo}#{number}",
+            "user": github_user(f"user{number % 97}"),
+            "labels": [],
+            "state": "open",
+            "locked": False,
+            "assignees": [],
+            "comments": 0,
+            "created_at": github_time(timestamp),
+            "updated_at": github_time(timestamp),
+            "closed_at": None,
+            "author_association": "CONTRIBUTOR",
+            "body": self.body(number),
+            "reactions": github_reactions(url),
+        }
+
+    async def repo_issues(self, request: Request) -> Response:
+        owner, repo = request.path_params["owner"], request.path_params["repo"]
+        since = request.query_params.get("since")
+        threshold = int(datetime.fromisoformat(since).timestamp()) if since else 0
+        items = [
+            self.issue(owner, repo, number, timestamp)
+            for number, timestamp in reversed(self.events((owner, repo)))
+            if timestamp >= threshold
+        ]
+        page, _ = page_slice(items, request, "per_page")
+        return await self.send(request, page)
+
+    async def item(self, request: Request) -> Response:
+        params = request.path_params
+        if params["kind"] not in ("issues", "pulls"):
+            return self.respond(404, b'{"message": "Not Found"}')
+        _, created_at = self.events((params["owner"], params["repo"], params["number"]))[0]
+        return await self.send(
+            request, self.issue(params["owner"], params["repo"], params["number"], created_at)
+        )
+
+    async def comments(self, request: Request) -> Response:
+        params = request.path_params
+        since = request.query_params.get("since")
+        threshold = int(datetime.fromisoformat(since).timestamp()) if since else 0
+        events = list(self.events((params["owner"], params["repo"], params["number"])))[1:]
+        url = f"https://api.github.com/repos/{params['owner']}/{params['repo']}/issues/comments"
+        items = [
+            {
+                "url": f"{url}/{num}",
+                "id": num,
+                "user": github_user(f"user{num % 89}"),
+                "created_at": github_time(timestamp),
+                "updated_at": github_time(timestamp),
+                "author_association": "NONE",
+                "body": self.body(num),
+                "reactions": github_reactions(f"{url}/{num}"),
+            }
+            for num, timestamp in events
+            if timestamp >= threshold
+        ]
+        page, _ = page_slice(items, request, "per_page")
+        return await self.send(request, page)
+
+    async def send(self, request: Request, data: Any) -> Response:
+        await self.delay()
+        content = json.dumps(data).encode()
+        etag = f'"{hashlib.md5(content).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return self.respond(304, b"", {"ETag": etag})
+        allowed, remaining = self.take_quota()
+        headers = {} if remaining is None else {"X-RateLimit-Remaining": str(remaining)}
+        if not allowed:
+            return self.respond(
+                403, b'{"message": "API rate limit exceeded"}', {"X-RateLimit-Remaining": "0"}
+            )
+        return self.respond(200, content, {**headers, "ETag": etag})
+
+
+class StackExchangeStub(ApiStub):
+    """
+    Вопросы, ответы и комментарии, до 100 id через ";" в одном запросе.
+    Остаток квоты - в теле ответа (quota_remaining), при исчерпанной квоте -
+    400 с error_id 502 (throttle_violation). Поля элементов - как у встроенного
+    фильтра withbody, фильтр из /filters/create оставляет только свои поля
+    """
+
+    def __init__(self, config: StubConfig):
+        super().__init__(config)
+        # id фильтра -> тип объекта -> поля
+        self.filters: dict[str, dict[str, set[str]]] = {}
+
+    def routes(self) -> list[Route]:
+        return [
+            Route("/2.3/filters/create", self.create_filter),
+            Route("/2.3/questions/{ids}", self.questions),
+            Route("/2.3/questions/{ids}/answers", self.answers),
+            Route("/2.3/questions/{ids}/comments", self.comments),
+        ]
+
+    async def create_filter(self, request: Request) -> Response:
+        fields: dict[str, set[str]] = {}
+        for field in request.query_params.get("include", "").split(";"):
+            kind, _, name = field.partition(".")
+            fields.setdefault(kind, set()).add(name)
+        filter_id = f"!{len(self.filters)}"
+        self.filters[filter_id] = fields
+        return self.respond(200, json.dumps({"items": [{"filter": filter_id}]}).encode())
+
+    def apply_filter(self, request: Request, kind: str, item: dict[str, Any]) -> dict[str, Any]:
+        fields = self.filters.get(request.query_params.get("filter", ""))
+        if fields is None:
+            return item
+        item = {key: value for key, value in item.items() if key in fields.get(kind, ())}
+        if "owner" in item:
+            owner_fields = fields.get("shallow_user", ())
+            item["owner"] = {k: v for k, v in item["owner"].items() if k in owner_fields}
+        return item
+
+    @staticmethod
+    def question_ids(request: Request) -> list[int]:
+        return [int(question_id) for question_id in request.path_params["ids"].split(";")]
+
+    async def questions(self, request: Request) -> Response:
+        items = [
+            self.apply_filter(
+                request,
+                "question",
+                {
+                    "tags": ["python", "performance"],
+                    "owner": stackexchange_owner(question_id % 83),
+                    "is_answered": True,
+                    "view_count": question_id % 10000,
+                    "answer_count": 3,
+                    "score": 5,
+                    "last_activity_date": int(self.started_at),
+                    "creation_date": int(self.started_at) - HISTORY_SECONDS,
+                    "question_id": question_id,
+                    "content_license": "CC BY-SA 4.0",
+                    "link": f"https://stackoverflow.com/questions/{question_id}",
+                    "title": f"Question {question_id}",
+                    "body": self.body(question_id),
+                },
+            )
+            for question_id in self.question_ids(request)
+        ]
+        return await self.send(request, items, "pagesize")
+
+    async def answers(self, request: Request) -> Response:
+        return await self.send(request, self.posts(request, "answer", "question_id"))
+
+    async def comments(self, request: Request) -> Response:
+        return await self.send(request, self.posts(request, "comment", "post_id"))
+
+    def posts(self, request: Request, kind: str, key: str) -> list[dict[str, Any]]:
+        fromdate = int(request.query_params.get("fromdate", 0))
+        items = [
+            self.apply_filter(
+                request,
+                kind,
+                {
+                    "owner": stackexchange_owner(num % 83),
+                    "score": 0,
+                    f"{kind}_id": question_id * 1000 + num,
+                    key: question_id,
+                    "creation_date": timestamp,
+                    "last_activity_date": timestamp,
+                    "content_license": "CC BY-SA 4.0",
+                    "body": self.body(num),
+                },
+            )
+            for question_id in self.question_ids(request)
+            for num, timestamp in self.events((question_id, kind))
+            if timestamp >= fromdate
+        ]
+        items.sort(key=lambda item: item["creation_date"], reverse=True)
+        return items
+
+    async def send(self, request: Request, items: list, size_param: str = "pagesize"):
+        await self.delay()
+        allowed, remaining = self.take_quota()
+        if not allowed:
+            return self.respond(
+                400,
+                b'{"error_id": 502, "error_name": "throttle_violation", '
+                b'"error_message": "too many requests from this IP"}',
+            )
+        page, has_more = page_slice(items, request, size_param)
+        data: dict[str, Any] = {"items": page, "has_more": has_more}
+        if remaining is not None:
+            data["quota_remaining"] = remaining
+        return self.respond(200, json.dumps(data).encode())
+
+
+class StubTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx, отдающий запросы к хостам API заглушкам в том же процессе.
+    Запрос к хосту без заглушки завершается ошибкой соединения
+    """
+
+    def __init__(self, apps: dict[str, Any]):
+        self._transports = {host: httpx.ASGITransport(app) for host, app in apps.items()}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        transport = self._transports.get(request.url.host)
+        if transport is None:
+            raise httpx.ConnectError(f"No stub for {request.url.host}", request=request)
+        return await transport.handle_async_request(request)
+
+
+def stub_transport(github: GitHubStub, stackexchange: StackExchangeStub) -> StubTransport:
+    return StubTransport(
+        {"api.github.com": github.app, "api.stackexchange.com": stackexchange.app}
+    )
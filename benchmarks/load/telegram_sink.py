@@ -0,0 +1,23 @@
+import asyncio
+import time
+
+
+class FakeTelegramSink:
+    """
+    Заменяет TelegramClient в send_messages_to_users: вместо отправки
+    запоминает момент доставки сообщения каждому чату
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        # tg_chat_id -> unix-время последней доставки
+        self.delivered_at: dict[int, float] = {}
+        self.messages = 0
+        self.bytes = 0
+
+    async def send_message(self, entity: int, message: str) -> None:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        self.messages += 1
+        self.bytes += len(message.encode())
+        self.delivered_at[entity] = time.time()
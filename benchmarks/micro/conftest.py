@@ -0,0 +1,72 @@
+"""
+Фикстуры микробенчмарков. Контейнер Postgres и миграции - общие с тестами,
+асинхронный код выполняется в отдельном event loop, который живет всю сессию,
+потому что фикстура benchmark синхронная
+"""
+
+import asyncio
+from typing import Generator
+
+import pytest
+
+from benchmarks.load.dataset import Dataset, generate_dataset
+from src.api.schemas.schemas import AddLinkRequest
+from src.database.orm_database import OrmDbProcessor
+from src.database.sql_database import SqlDbProcessor
+from tests.conftest import liquibase_migrate, postgres_container  # noqa: F401
+
+SEED_USERS = 200
+SEED_LINKS = 2000
+SEED_LINKS_PER_USER = 20
+
+
+@pytest.fixture(scope="session")
+def runner() -> Generator[asyncio.Runner, None, None]:
+    with asyncio.Runner() as loop_runner:
+        yield loop_runner
+
+
+@pytest.fixture(scope="session")
+def seed_dataset() -> Dataset:
+    return generate_dataset(SEED_USERS, SEED_LINKS, SEED_LINKS_PER_USER, seed=1)
+
+
+@pytest.fixture(scope="session")
+def seeded_db(
+    postgres_container: str,  # noqa: F811
+    liquibase_migrate: None,  # noqa: F811
+    runner: asyncio.Runner,
+    seed_dataset: Dataset,
+) -> str:
+    """
+    База с примененными миграциями и SEED_USERS пользователями
+    по SEED_LINKS_PER_USER ссылок (подписки распределены по Zipf)
+    :return: URL базы
+    """
+
+    async def seed() -> None:
+        processor = SqlDbProcessor(postgres_container)
+        await processor.connect()
+        try:
+            for tg_chat_id, link_ids in seed_dataset.subscriptions.items():
+                await processor.add_user(tg_chat_id)
+                for link_id in link_ids:
+                    await processor.add_link_for_user(
+                        tg_chat_id,
+                        AddLinkRequest(url=seed_dataset.links[link_id], tags=["bench"], filters=[]),
+                    )
+        finally:
+            await processor.close()
+
+    runner.run(seed())
+    return postgres_container
+
+
+@pytest.fixture(scope="session", params=[SqlDbProcessor, OrmDbProcessor], ids=["sql", "orm"])
+def db_processor(
+    request: pytest.FixtureRequest, seeded_db: str, runner: asyncio.Runner
+) -> Generator[SqlDbProcessor | OrmDbProcessor, None, None]:
+    processor = request.param(seeded_db)
+    runner.run(processor.connect())
+    yield processor
+    runner.run(processor.close())
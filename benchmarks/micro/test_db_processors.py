@@ -0,0 +1,76 @@
+"""
+Методы SqlDbProcessor и OrmDbProcessor на базе с SEED_USERS пользователями.
+Запросы во внешние API в цикле проверки заменены пустым результатом,
+поэтому замер check_updates_for_all_users - это только работа с базой
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.api.providers.base import LinkCheckResult, TrackedLink
+from src.api.schemas.schemas import AddLinkRequest, LinkUpdate
+
+pytest.importorskip("pytest_benchmark")
+
+NOW = datetime.now(timezone.utc)
+
+
+async def no_events(links: dict[int, TrackedLink]) -> dict[int, LinkCheckResult]:
+    return {link_id: LinkCheckResult([], link.watermark or NOW) for link_id, link in links.items()}
+
+
+def test_get_user_links(benchmark, db_processor, runner: asyncio.Runner) -> None:
+    """Тест: Список ссылок пользователя"""
+    links = benchmark(lambda: runner.run(db_processor.get_user_links(1)))
+    assert len(links) == 20
+
+
+def test_get_user_links_page(benchmark, db_processor, runner: asyncio.Runner) -> None:
+    """Тест: Страница списка ссылок по курсору"""
+    first = runner.run(db_processor.get_user_links(2, limit=5))
+    page = benchmark(
+        lambda: runner.run(db_processor.get_user_links(2, limit=5, after_id=first[-1].id))
+    )
+    assert len(page) == 5
+
+
+def test_add_and_remove_link(benchmark, db_processor, runner: asyncio.Runner) -> None:
+    """Тест: Добавление и удаление подписки"""
+    url = f"https://github.com/bench/{type(db_processor).__name__.lower()}"
+
+    async def add_and_remove() -> None:
+        await db_processor.add_link_for_user(3, AddLinkRequest(url=url, tags=[], filters=[]))
+        await db_processor.remove_user_link(3, url)
+
+    benchmark(lambda: runner.run(add_and_remove()))
+
+
+def test_get_user_updates(benchmark, db_processor, runner: asyncio.Runner) -> None:
+    """Тест: Обновления пользователя из сохраненного состояния ссылок"""
+    since = NOW - timedelta(days=1)
+    updates = benchmark(lambda: runner.run(db_processor.get_user_updates(4, since, ["bench"])))
+    assert isinstance(updates, list)
+
+
+def test_check_updates_for_all_users(
+    benchmark, db_processor, runner: asyncio.Runner, monkeypatch
+) -> None:
+    """Тест: Полный проход цикла проверки по базе без запросов к API"""
+    monkeypatch.setattr(type(db_processor), "fetch_link_states", staticmethod(no_events))
+    updates = benchmark.pedantic(
+        lambda: runner.run(db_processor.check_updates_for_all_users()), rounds=5
+    )
+    assert updates == []
+
+
+def test_save_pending_updates(benchmark, db_processor, runner: asyncio.Runner) -> None:
+    """Тест: Запись пакета из 100 отложенных уведомлений"""
+    link_id = runner.run(db_processor.get_user_links(5))[0].id
+    updates = [
+        LinkUpdate(id=link_id, url="https://github.com/o/r", description="upd", tg_chat_id=5)
+        for _ in range(100)
+    ]
+    benchmark(lambda: runner.run(db_processor.save_pending_updates(updates)))
+
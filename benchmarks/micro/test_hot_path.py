@@ -0,0 +1,154 @@
+"""
+CPU-часть проверки одной ссылки: разбор ссылки, построение URL API,
+разбор дат, UpdateInfo, описание уведомления и LinkUpdate
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Any, Coroutine
+
+import pytest
+
+from src.api.providers.base import TrackedLink, UpdateProvider, advance_watermark
+from src.api.providers.github import parse_github_item, parse_github_time
+from src.api.providers.stackoverflow import parse_stackoverflow_item
+from src.api.schemas.schemas import LinkUpdate, ListLinksUpdate
+from src.api.scrapper_api.link_target import classify_url
+from src.api.scrapper_api.utils_scrapper_api import get_github_api_url
+from src.api.utils.string_makers import make_description
+
+pytest.importorskip("pytest_benchmark")
+
+GITHUB_ISSUE = {
+    "number": 42,
+    "title": "Scrapper skips comments after restart",
+    "user": {"login": "octocat"},
+    "created_at": "2024-05-17T09:15:00Z",
+    "body": "текст описания " * 150,
+    "labels": [{"name": "bug", "color": "d73a4a"}] * 3,
+}
+STACKOVERFLOW_ANSWER = {
+    "question_id": 11227809,
+    "owner": {"display_name": "Mysticial"},
+    "creation_date": 1340805096,
+    "body": "<p>You are a victim of branch prediction fail.</p>" * 20,
+}
+UPDATE_INFO = parse_github_item(GITHUB_ISSUE, GITHUB_ISSUE["body"])
+
+
+def complete(coro: Coroutine) -> Any:
+    """
+    Выполняет корутину, которая ни разу не уступает управление, без event loop:
+    в замер не попадает стоимость планирования задачи
+    :param coro:
+    :return: результат корутины
+    """
+    try:
+        coro.send(None)
+    except StopIteration as e:
+        return e.value
+    coro.close()
+    raise RuntimeError("Coroutine suspended, run it in an event loop")
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "https://github.com/Owner/Repo/issues/42",
+        "https://stackoverflow.com/questions/11227809/why-is-processing-a-sorted-array-faster",
+    ],
+    ids=["github", "stackoverflow"],
+)
+def test_classify_url(benchmark, url: str) -> None:
+    """Тест: Разбор ссылки в LinkTarget"""
+    assert benchmark(classify_url, url) is not None
+
+
+def test_get_github_api_url(benchmark) -> None:
+    """Тест: URL GitHub API по цели"""
+    target = classify_url("https://github.com/owner/repo/pull/7")
+    assert benchmark(get_github_api_url, target)[1]
+
+
+def test_parse_github_time(benchmark) -> None:
+    """Тест: Разбор даты GitHub через fromisoformat"""
+    assert benchmark(parse_github_time, GITHUB_ISSUE["created_at"]).tzinfo is timezone.utc
+
+
+def test_parse_github_item(benchmark) -> None:
+    """Тест: UpdateInfo из issue GitHub - дата и превью"""
+    assert benchmark(parse_github_item, GITHUB_ISSUE, GITHUB_ISSUE["body"]).user_name == "octocat"
+
+
+def test_parse_stackoverflow_item(benchmark) -> None:
+    """Тест: UpdateInfo из ответа StackExchange"""
+    assert benchmark(parse_stackoverflow_item, "Title", STACKOVERFLOW_ANSWER).preview
+
+
+def test_newer_than(benchmark) -> None:
+    """Тест: Отбор событий новее водяного знака из страницы в 100 событий"""
+    started_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    events = [
+        UPDATE_INFO.model_copy(update={"created_at": started_at + timedelta(minutes=num)})
+        for num in range(100)
+    ]
+    since = started_at + timedelta(minutes=70)
+    assert len(benchmark(UpdateProvider.newer_than, events, since)) == 29
+
+
+def test_newer_than_seen_ids(benchmark) -> None:
+    """Тест: Отбор из 100 событий одной секунды водяного знака, половина уже отправлена"""
+    since = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    events = [
+        UPDATE_INFO.model_copy(update={"created_at": since, "event_id": f"comment:{num}"})
+        for num in range(100)
+    ]
+    seen_ids = frozenset(f"comment:{num}" for num in range(0, 100, 2))
+    assert len(benchmark(UpdateProvider.newer_than, events, since, seen_ids)) == 50
+
+
+def test_advance_watermark(benchmark) -> None:
+    """Тест: Новый водяной знак по 100 событиям, последние 10 - в одну секунду"""
+    started_at = datetime(2024, 5, 1, tzinfo=timezone.utc)
+    events = [
+        UPDATE_INFO.model_copy(
+            update={
+                "created_at": started_at + timedelta(minutes=min(num, 90)),
+                "event_id": f"comment:{num}",
+            }
+        )
+        for num in range(100)
+    ]
+    link = TrackedLink(classify_url("https://github.com/owner/repo/issues/42"), started_at)
+    assert len(benchmark(advance_watermark, link, events).seen_ids) == 10
+
+
+def test_make_description(benchmark) -> None:
+    """Тест: Текст уведомления из UpdateInfo"""
+    assert benchmark(lambda: complete(make_description(UPDATE_INFO))).startswith("Тема:")
+
+
+def test_link_update_construction(benchmark) -> None:
+    """Тест: Построение LinkUpdate с проверкой pydantic"""
+    description = complete(make_description(UPDATE_INFO))
+
+    def build() -> LinkUpdate:
+        return LinkUpdate(
+            id=1,
+            url="https://github.com/owner/repo/issues/42",
+            description=description,
+            tg_chat_id=123456789,
+            update_info=UPDATE_INFO,
+        )
+
+    assert benchmark(build).update_info is UPDATE_INFO
+
+
+def test_list_links_update_dump(benchmark) -> None:
+    """Тест: Сериализация пакета из 100 уведомлений перед отправкой боту"""
+    updates = ListLinksUpdate(
+        links=[
+            LinkUpdate(id=num, url="https://github.com/o/r", description="x" * 300, tg_chat_id=num)
+            for num in range(100)
+        ]
+    )
+    assert len(benchmark(updates.model_dump)["links"]) == 100
@@ -0,0 +1,9 @@
+-- Liquibase formatted SQL
+-- changeset yourname:04
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS notification_mode TEXT NOT NULL DEFAULT 'immediate',
+    ADD COLUMN IF NOT EXISTS digest_time SMALLINT NOT NULL DEFAULT 1200;
+
+CREATE INDEX IF NOT EXISTS idx_users_digest_bucket
+    ON users (digest_time)
+    WHERE notification_mode = 'digest';
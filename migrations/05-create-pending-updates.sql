@@ -0,0 +1,14 @@
+-- Liquibase formatted SQL
+-- changeset yourname:05
+CREATE TABLE IF NOT EXISTS pending_updates (
+    id BIGSERIAL PRIMARY KEY,
+    tg_chat_id BIGINT NOT NULL REFERENCES users(tg_chat_id) ON DELETE CASCADE,
+    link_id INTEGER NOT NULL REFERENCES links(id) ON DELETE CASCADE,
+    url TEXT NOT NULL,
+    description TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_pending_updates_chat ON pending_updates (tg_chat_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pending_updates_event
+    ON pending_updates (tg_chat_id, link_id, md5(description));
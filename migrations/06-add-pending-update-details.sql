@@ -0,0 +1,7 @@
+-- Liquibase formatted SQL
+-- changeset yourname:06
+ALTER TABLE pending_updates
+    ADD COLUMN IF NOT EXISTS title TEXT NOT NULL DEFAULT '',
+    ADD COLUMN IF NOT EXISTS user_name TEXT NOT NULL DEFAULT '',
+    ADD COLUMN IF NOT EXISTS creation_date TEXT NOT NULL DEFAULT '',
+    ADD COLUMN IF NOT EXISTS preview TEXT NOT NULL DEFAULT '';
@@ -0,0 +1,6 @@
+-- Liquibase formatted SQL
+-- changeset yourname:07
+CREATE TABLE IF NOT EXISTS scheduler_fencing (
+    name TEXT PRIMARY KEY,
+    token BIGINT NOT NULL
+);
@@ -0,0 +1,6 @@
+-- Liquibase formatted SQL
+-- changeset yourname:08
+ALTER TABLE links ADD COLUMN IF NOT EXISTS checked_at TIMESTAMPTZ;
+ALTER TABLE links ADD COLUMN IF NOT EXISTS last_update_at TIMESTAMPTZ;
+ALTER TABLE links ADD COLUMN IF NOT EXISTS last_event JSONB;
+CREATE INDEX IF NOT EXISTS idx_links_last_update_at ON links (last_update_at);
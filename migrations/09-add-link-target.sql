@@ -0,0 +1,41 @@
+-- Liquibase formatted SQL
+-- changeset yourname:09
+ALTER TABLE links ADD COLUMN IF NOT EXISTS provider TEXT;
+ALTER TABLE links ADD COLUMN IF NOT EXISTS owner TEXT;
+ALTER TABLE links ADD COLUMN IF NOT EXISTS repo TEXT;
+ALTER TABLE links ADD COLUMN IF NOT EXISTS kind TEXT;
+ALTER TABLE links ADD COLUMN IF NOT EXISTS number BIGINT;
+
+-- Разбор уже сохраненных ссылок, новые разбирает scrapper при добавлении
+UPDATE links
+SET provider = 'github',
+    owner = lower(parsed.m[3]),
+    repo = lower(regexp_replace(parsed.m[4], '\.git$', '', 'i')),
+    kind = CASE lower(parsed.m[6])
+        WHEN 'issues' THEN 'issue'
+        WHEN 'pull' THEN 'pull'
+        ELSE 'repository'
+    END,
+    number = parsed.m[7]::BIGINT
+FROM (
+    SELECT id, regexp_match(
+        link_url,
+        '^(https?://)?(www\.)?github\.com/([^/?#]+)/([^/?#]+)'
+            || '(/(issues|pull)/([0-9]+))?/?([?#].*)?$',
+        'i'
+    ) AS m
+    FROM links
+) AS parsed
+WHERE links.id = parsed.id AND parsed.m IS NOT NULL;
+
+UPDATE links
+SET provider = 'stackoverflow',
+    kind = 'question',
+    number = parsed.m[4]::BIGINT
+FROM (
+    SELECT id, regexp_match(
+        link_url, '^(https?://)?(www\.)?stackoverflow\.com/(questions|q)/([0-9]+)', 'i'
+    ) AS m
+    FROM links
+) AS parsed
+WHERE links.id = parsed.id AND parsed.m IS NOT NULL;
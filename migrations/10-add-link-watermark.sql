@@ -0,0 +1,3 @@
+-- Liquibase formatted SQL
+-- changeset yourname:10
+ALTER TABLE links ADD COLUMN IF NOT EXISTS watermark TIMESTAMPTZ;
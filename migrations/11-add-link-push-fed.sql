@@ -0,0 +1,6 @@
+-- Liquibase formatted SQL
+-- changeset yourname:11
+ALTER TABLE links ADD COLUMN IF NOT EXISTS push_fed BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- События webhook находят свои ссылки по цели, а не по строке ссылки
+CREATE INDEX IF NOT EXISTS ix_links_target ON links (provider, owner, repo, kind, number);
@@ -0,0 +1,27 @@
+-- Liquibase formatted SQL
+-- changeset yourname:12
+ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone TEXT NOT NULL DEFAULT 'Europe/Moscow';
+
+-- Отложенные события хранят точный момент, дата выводится в поясе получателя
+ALTER TABLE pending_updates ADD COLUMN IF NOT EXISTS event_at TIMESTAMPTZ;
+UPDATE pending_updates
+SET event_at = to_timestamp(creation_date, 'YYYY-MM-DD HH24:MI')::TIMESTAMP
+    AT TIME ZONE 'Europe/Moscow'
+WHERE creation_date <> '';
+ALTER TABLE pending_updates DROP COLUMN IF EXISTS creation_date;
+
+-- Последние события, сохраненные без точного момента, получают его из строки даты (МСК)
+UPDATE links
+SET last_event = jsonb_set(
+    last_event,
+    '{created_at}',
+    to_jsonb(
+        to_timestamp(last_event->>'creation_date', 'YYYY-MM-DD HH24:MI')::TIMESTAMP
+        AT TIME ZONE 'Europe/Moscow'
+    )
+)
+WHERE last_event IS NOT NULL
+  AND last_event->>'created_at' IS NULL
+  AND COALESCE(last_event->>'creation_date', '') <> '';
+UPDATE links SET last_event = NULL
+WHERE last_event IS NOT NULL AND last_event->>'created_at' IS NULL;
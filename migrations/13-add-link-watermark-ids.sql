@@ -0,0 +1,4 @@
+-- Liquibase formatted SQL
+-- changeset yourname:13
+-- id событий, созданных ровно в момент водяного знака и уже отправленных
+ALTER TABLE links ADD COLUMN IF NOT EXISTS watermark_ids TEXT[] NOT NULL DEFAULT '{}';
@@ -0,0 +1,4 @@
+-- Liquibase formatted SQL
+-- changeset yourname:14
+-- корзина последнего тика планировщика: следующий тик забирает и пропущенные корзины
+ALTER TABLE scheduler_fencing ADD COLUMN IF NOT EXISTS last_bucket SMALLINT;
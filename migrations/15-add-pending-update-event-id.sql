@@ -0,0 +1,13 @@
+-- Liquibase formatted SQL
+-- changeset yourname:15
+-- id события у провайдера: разные события с одинаковым описанием не должны склеиваться,
+-- по описанию повторы отсекаются только у событий без id
+ALTER TABLE pending_updates ADD COLUMN IF NOT EXISTS event_id TEXT;
+
+DROP INDEX IF EXISTS uq_pending_updates_event;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pending_updates_event
+    ON pending_updates (tg_chat_id, link_id, event_id)
+    WHERE event_id IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_pending_updates_description
+    ON pending_updates (tg_chat_id, link_id, md5(description))
+    WHERE event_id IS NULL;
@@ -1,5 +1,10 @@
 from collections import defaultdict
 from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+from opentelemetry.trace import SpanKind
+
+from src.api.utils.metrics import TELEGRAM_FLOOD_WAITS, TELEGRAM_SEND_SECONDS, observe_seconds
+from src.api.utils.tracing import record_error, tracer
 
 
 async def send_messages_to_users(data: dict, tg_client: TelegramClient) -> None:
@@ -21,4 +26,13 @@ async def send_messages_to_users(data: dict, tg_client: TelegramClient) -> None:
         for link in links:
             text += f"⚡ Есть обновления по ссылке {link['url']}:\n{link['description']}\n\n"
         if text:
-            await tg_client.send_message(int(tg_chat_id), text)
+            with tracer.start_as_current_span(
+                "telegram.send_message", kind=SpanKind.CLIENT
+            ) as span:
+                try:
+                    with observe_seconds(TELEGRAM_SEND_SECONDS):
+                        await tg_client.send_message(int(tg_chat_id), text)
+                except FloodWaitError as e:
+                    TELEGRAM_FLOOD_WAITS.inc()
+                    record_error(span, e)
+                    raise
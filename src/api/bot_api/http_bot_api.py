@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Body, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import ORJSONResponse
 from telethon import TelegramClient
 from telethon.errors.rpcerrorlist import RPCError
 
 from src.api.bot_api.bot_send_message import send_messages_to_users
 from src.api.schemas.schemas import ListLinksUpdate, ApiErrorResponse
+from src.api.utils.serialization import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    load_message,
+    parse_links_update,
+)
 
 bot_api_router = APIRouter()
 
@@ -18,31 +24,51 @@ async def get_tg_client(request: Request) -> TelegramClient:
     return request.app.tg_client
 
 
+def error_response(description: str, e: Exception) -> ORJSONResponse:
+    error_data = ApiErrorResponse(
+        description=description,
+        code="400",
+        exception_name=e.__class__.__name__,
+        exception_message=str(e),
+        stacktrace=[str(e)],
+    )
+    return ORJSONResponse(status_code=400, content=error_data.model_dump())
+
+
 @bot_api_router.post(
     "/updates",
     responses={
         200: {"description": "Обновление обработано"},
         400: {"model": ApiErrorResponse, "description": "Некорректные параметры запроса"},
     },
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                JSON_MEDIA_TYPE: {"schema": ListLinksUpdate.model_json_schema()},
+                MSGPACK_MEDIA_TYPE: {"schema": ListLinksUpdate.model_json_schema()},
+            },
+        }
+    },
 )
 async def send_update(
-    data: ListLinksUpdate = Body(...), tg_client: TelegramClient = Depends(get_tg_client)
-) -> JSONResponse:
+    request: Request, tg_client: TelegramClient = Depends(get_tg_client)
+) -> ORJSONResponse:
     """
-    Hhttp-бэкенд отправки уведомлений пользователям
-    :param data:
+    Hhttp-бэкенд отправки уведомлений пользователям.
+    Тело принимается в JSON или msgpack, формат определяется по Content-Type
+    :param request:
     :param tg_client:
     :return:
     """
     try:
-        await send_messages_to_users(data.dict(), tg_client)
-        return JSONResponse(status_code=200, content={"status": "ok"})
+        payload = load_message(await request.body(), request.headers.get("content-type"))
+        data = parse_links_update(payload)
+    except ValueError as e:
+        return error_response("Некорректное тело обновлений", e)
+
+    try:
+        await send_messages_to_users(data.model_dump(), tg_client)
+        return ORJSONResponse(status_code=200, content={"status": "ok"})
     except RPCError as e:
-        error_response = ApiErrorResponse(
-            description="Internal error processing the update",
-            code="400",
-            exception_name=e.__class__.__name__,
-            exception_message=str(e),
-            stacktrace=[str(e)],
-        )
-        return JSONResponse(status_code=400, content=error_response.dict())
+        return error_response("Internal error processing the update", e)
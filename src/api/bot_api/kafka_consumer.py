@@ -1,8 +1,24 @@
-import json
 import os
-from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+import time
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, TopicPartition
 from dotenv import load_dotenv
+from opentelemetry.trace import SpanKind
+
 from src.api.bot_api.bot_send_message import send_messages_to_users
+from src.api.utils.tracing import extract_kafka_context, record_error, tracer
+from src.api.utils.metrics import (
+    KAFKA_CONSUME_DELAY_SECONDS,
+    KAFKA_CONSUMER_LAG,
+    KAFKA_PRODUCE_SECONDS,
+    observe_seconds,
+)
+from src.api.utils.serialization import (
+    dead_letter_payload,
+    dump_message,
+    kafka_media_type,
+    load_message,
+    parse_links_update,
+)
 
 from telethon import TelegramClient
 from logger.logger_init import logger
@@ -27,7 +43,7 @@ async def consume_messages(
     consumer = AIOKafkaConsumer(topic, bootstrap_servers=kafka_servers, group_id="bot_group")
 
     dlq_producer = AIOKafkaProducer(
-        bootstrap_servers=kafka_servers, value_serializer=lambda v: json.dumps(v).encode("utf-8")
+        bootstrap_servers=kafka_servers, value_serializer=dump_message
     )
 
     await consumer.start()
@@ -35,17 +51,43 @@ async def consume_messages(
     await dlq_producer.start()
     try:
         async for msg in consumer:
-            try:
-                data = json.loads(msg.value.decode("utf-8"))
-                logger.debug(f"Данные получены!!!\n{data}")
-                await send_messages_to_users(data, bot_client)
-            except Exception as e:
-                print("Ошибка обработки сообщения:", e)
-                dead_letter_payload = {
-                    "error": str(e),
-                    "original_message": msg.value.decode("utf-8", errors="ignore"),
-                }
-                await dlq_producer.send_and_wait(dlq_topic, dead_letter_payload)
+            observe_consumer_lag(consumer, msg)
+            # обработка продолжает трассу тика, записавшего сообщение
+            with tracer.start_as_current_span(
+                f"{msg.topic} process",
+                context=extract_kafka_context(msg.headers),
+                kind=SpanKind.CONSUMER,
+            ) as span:
+                try:
+                    payload = load_message(msg.value, kafka_media_type(msg.headers))
+                    data = parse_links_update(payload).model_dump()
+                    logger.debug("Получено обновлений из Kafka: %s", len(data["links"]))
+                    await send_messages_to_users(data, bot_client)
+                except Exception as e:
+                    logger.exception("Ошибка обработки сообщения из %s", msg.topic)
+                    record_error(span, e)
+                    dead_letter = dead_letter_payload(
+                        e, msg.value, kafka_media_type(msg.headers)
+                    )
+                    with observe_seconds(KAFKA_PRODUCE_SECONDS, dlq_topic):
+                        await dlq_producer.send_and_wait(dlq_topic, dead_letter)
     finally:
         await consumer.stop()
         await dlq_producer.stop()
+
+
+def observe_consumer_lag(consumer: AIOKafkaConsumer, msg) -> None:
+    """
+    Отставание consumer: сколько сообщений партиции еще не прочитано
+    и сколько прочитанное сообщение пролежало в Kafka
+    :param consumer:
+    :param msg:
+    :return:
+    """
+    highwater = consumer.highwater(TopicPartition(msg.topic, msg.partition))
+    if highwater is not None:
+        KAFKA_CONSUMER_LAG.labels(msg.topic, str(msg.partition)).set(highwater - msg.offset - 1)
+    if msg.timestamp is not None and msg.timestamp > 0:
+        KAFKA_CONSUME_DELAY_SECONDS.labels(msg.topic).observe(
+            max(time.time() - msg.timestamp / 1000, 0)
+        )
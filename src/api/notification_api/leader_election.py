@@ -0,0 +1,138 @@
+import asyncio
+import time
+import uuid
+
+import redis.asyncio as redis
+
+from src.logger.logger_init import logger
+
+# Захват аренды: ключ ставится только если его нет (SET NX PX),
+# а вместе с ним монотонно растет fencing-токен
+ACQUIRE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local token = redis.call('INCR', KEYS[2])
+redis.call('SET', KEYS[1], token .. '|' .. ARGV[1], 'PX', ARGV[2])
+return token
+"""
+
+# Продление и освобождение разрешены только владельцу текущей аренды
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderLease:
+    """
+    Аренда лидерства в Redis. Тик планировщика выполняет только держатель аренды,
+    остальные реплики бота ждут и перехватывают её, как только она истечет
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        name: str,
+        ttl_ms: int = 15000,
+        instance_id: str | None = None,
+    ):
+        self.redis_client = redis_client
+        self.name = name
+        self.ttl_ms = ttl_ms
+        self.instance_id = instance_id or uuid.uuid4().hex
+        self.lease_key = f"leader:{name}:lease"
+        self.fencing_key = f"leader:{name}:fencing"
+
+        self.fencing_token: int | None = None
+        self._lease_value: str | None = None
+        self._valid_until = 0.0
+
+        self._acquire = self.redis_client.register_script(ACQUIRE_SCRIPT)
+        self._renew = self.redis_client.register_script(RENEW_SCRIPT)
+        self._release = self.redis_client.register_script(RELEASE_SCRIPT)
+
+    @property
+    def is_leader(self) -> bool:
+        """
+        Лидерство считается действующим, пока локально не истекла аренда.
+        Запас в треть TTL защищает от расхождения часов и задержек сети
+        :return:
+        """
+        return self._lease_value is not None and time.monotonic() < self._valid_until
+
+    async def heartbeat(self) -> bool:
+        """
+        Продлевает аренду, если она наша, или пытается её захватить
+        :return:
+        """
+        started_at = time.monotonic()
+        try:
+            if self._lease_value is not None:
+                renewed = await self._renew(
+                    keys=[self.lease_key], args=[self._lease_value, self.ttl_ms]
+                )
+                if renewed:
+                    self._extend(started_at)
+                    return True
+                logger.info("Аренда лидера %s потеряна", self.name)
+                self._reset()
+
+            token = await self._acquire(
+                keys=[self.lease_key, self.fencing_key], args=[self.instance_id, self.ttl_ms]
+            )
+        except redis.RedisError as e:
+            logger.warning("Не удалось продлить аренду лидера %s: %s", self.name, e)
+            return self.is_leader
+
+        if not token:
+            return False
+
+        self.fencing_token = int(token)
+        self._lease_value = f"{self.fencing_token}|{self.instance_id}"
+        self._extend(started_at)
+        logger.info("Стали лидером %s, fencing-токен %s", self.name, self.fencing_token)
+        return True
+
+    async def keep_alive(self) -> None:
+        """
+        Фоновый цикл продления аренды. Период в треть TTL дает быстрый
+        перехват планировщика другой репликой, если лидер упал
+        :return:
+        """
+        interval = self.ttl_ms / 3 / 1000
+        try:
+            while True:
+                await self.heartbeat()
+                await asyncio.sleep(interval)
+        finally:
+            await self.release()
+
+    async def release(self) -> None:
+        """
+        Добровольно отдает аренду, чтобы другая реплика подхватила её без ожидания TTL
+        :return:
+        """
+        if self._lease_value is None:
+            return
+        try:
+            await self._release(keys=[self.lease_key], args=[self._lease_value])
+        finally:
+            self._reset()
+
+    def _extend(self, started_at: float) -> None:
+        self._valid_until = started_at + self.ttl_ms * 2 / 3 / 1000
+
+    def _reset(self) -> None:
+        self._lease_value = None
+        self.fencing_token = None
+        self._valid_until = 0.0
@@ -1,16 +1,24 @@
 import httpx
-import json
 import os
 from http import HTTPStatus
 from aiokafka import AIOKafkaProducer
 from dotenv import load_dotenv
+from opentelemetry.trace import SpanKind
 
 from src.logger.logger_init import logger
 from src.api.schemas.schemas import ListLinksUpdate
+from src.api.utils.metrics import KAFKA_PRODUCE_SECONDS, observe_seconds
+from src.api.utils.tracing import inject_headers, kafka_trace_headers, tracer
+from src.api.utils.serialization import (
+    dump_message,
+    kafka_headers,
+    load_message,
+    message_media_type,
+)
+from src.initialization.scrapper_client_init import scrapper_client
 
 
 load_dotenv()
-SCRAPPER_API_URL = os.getenv("SCRAPPER_API_URL")
 BOT_API_URL = os.getenv("BOT_API_URL")
 
 
@@ -28,49 +36,78 @@ class NotificationService:
                 self.send_func = self._send_via_http
 
     @staticmethod
-    async def get_updated_links() -> ListLinksUpdate:
+    async def get_updated_links(fencing_token: int | None = None) -> ListLinksUpdate | None:
         """
-        Делает hhtp-запрос на scrapper для получения апдейтов
+        Делает hhtp-запрос на scrapper для получения апдейтов.
+        Fencing-токен лидера позволяет scrapper отклонить запрос бывшего лидера
+        :param fencing_token:
         :return:
         """
-        async with httpx.AsyncClient() as scrapper_api_client:
-            response = await scrapper_api_client.get(f"{SCRAPPER_API_URL}/updates")
-            if response.status_code == HTTPStatus.OK:
-                return response.json()
+        with tracer.start_as_current_span("notification.get_updated_links"):
+            response = await scrapper_client.get_updates(fencing_token)
+        if response.status_code == HTTPStatus.OK:
+            return load_message(response.content, response.headers.get("content-type"))
+        if response.status_code == HTTPStatus.CONFLICT:
+            logger.warning("Scrapper отклонил устаревший fencing-токен %s", fencing_token)
+        return None
 
-    async def _send_via_http(self) -> None:
+    async def _send_via_http(self, fencing_token: int | None = None) -> None:
         """
         Делает http-запрос на сервис бота, чтобы отправить апдейты
+        :param fencing_token:
         :return:
         """
-        list_links = await self.get_updated_links()
+        list_links = await self.get_updated_links(fencing_token)
+        if not list_links:
+            return
+        media_type = message_media_type()
         async with httpx.AsyncClient() as bot_api_client:
-            response = await bot_api_client.post(f"{BOT_API_URL}/updates", json=list_links)
+            with tracer.start_as_current_span("bot POST /updates", kind=SpanKind.CLIENT):
+                response = await bot_api_client.post(
+                    f"{BOT_API_URL}/updates",
+                    content=dump_message(list_links, media_type),
+                    headers=inject_headers({"content-type": media_type}),
+                )
             if response.status_code != HTTPStatus.OK:
                 logger.error("Ошибка отправки уведомлений")
 
-    async def _send_via_kafka(self):
+    async def _send_via_kafka(self, fencing_token: int | None = None):
         """
         Consumer записывает уведомления в топик апдейтов Kafka
+        :param fencing_token:
         :return:
         """
-        list_links = await self.get_updated_links()
-        if len(list_links) > 0:
+        list_links = await self.get_updated_links(fencing_token)
+        if list_links:
+            # Формат значения передается в заголовке, consumer разбирает оба варианта
+            media_type = message_media_type()
             producer = AIOKafkaProducer(
                 bootstrap_servers="localhost:9092",
-                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+                value_serializer=lambda v: dump_message(v, media_type),
             )
             await producer.start()
+            topic = os.getenv("KAFKA_UPDATES_TOPIC")
             try:
-                await producer.send_and_wait(os.getenv("KAFKA_UPDATES_TOPIC"), list_links)
+                with (
+                    tracer.start_as_current_span(f"{topic} publish", kind=SpanKind.PRODUCER),
+                    observe_seconds(KAFKA_PRODUCE_SECONDS, topic),
+                ):
+                    await producer.send_and_wait(
+                        topic,
+                        list_links,
+                        headers=kafka_headers(media_type) + kafka_trace_headers(),
+                    )
                 logger.debug("Уведомления отправлены в Kafka")
             finally:
                 await producer.stop()
 
-    async def send_notifications(self):
+    async def send_notifications(self, fencing_token: int | None = None):
         """
         Функция, для внешнего дерганья,
         инкапсулирующая отправку уведомлений
+        :param fencing_token:
         :return:
         """
-        await self.send_func()
+        # корневой спан тика: от него идут запрос к scrapper и доставка боту
+        with tracer.start_as_current_span("notification.send"):
+            await self.send_func(fencing_token)
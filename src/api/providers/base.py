@@ -0,0 +1,363 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from http import HTTPStatus
+from operator import attrgetter
+from typing import Any, AsyncIterator, Callable, NamedTuple
+
+import httpx
+from opentelemetry.trace import SpanKind
+
+from src.api.providers.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.api.schemas.schemas import UpdateInfo
+from src.api.scrapper_api.http_client import PROVIDER_TIMEOUT_SECONDS, get_http_client
+from src.api.scrapper_api.link_target import LinkProvider, LinkTarget
+from src.api.scrapper_api.utils_scrapper_api import make_preview
+from src.api.utils.json_stream import iter_json_array
+from src.api.utils.tracing import record_error, tracer
+from src.api.utils.metrics import (
+    PROVIDER_CIRCUIT_STATE,
+    PROVIDER_RATE_LIMIT_REMAINING,
+    PROVIDER_REQUEST_SECONDS,
+    PROVIDER_REQUESTS,
+    PROVIDER_RESPONSE_BYTES,
+    observe_seconds,
+)
+
+ETAG_CACHE_SIZE = 10000
+# Сколько событий одной ссылки отдается за проверку и сколько страниц API читается
+MAX_EVENTS_PER_LINK = int(os.getenv("MAX_EVENTS_PER_LINK", "50"))
+MAX_PAGES_PER_LINK = int(os.getenv("MAX_PAGES_PER_LINK", "3"))
+EVENT_TIME = attrgetter("created_at")
+
+
+class TrackedLink(NamedTuple):
+    target: LinkTarget | None
+    # момент самого нового уже отправленного события, None - ссылка еще не проверялась
+    watermark: datetime | None
+    # id уже отправленных событий, созданных ровно в момент водяного знака
+    seen_ids: frozenset[str] = frozenset()
+
+
+class LinkCheckResult(NamedTuple):
+    # события новее водяного знака, от старых к новым
+    events: list[UpdateInfo]
+    watermark: datetime | None
+    seen_ids: frozenset[str] = frozenset()
+
+    @property
+    def last_event(self) -> UpdateInfo | None:
+        return self.events[-1] if self.events else None
+
+
+def advance_watermark(
+    link: TrackedLink, events: list[UpdateInfo], default: datetime | None = None
+) -> LinkCheckResult:
+    """
+    Результат проверки ссылки по найденным событиям: знак сдвигается на момент
+    самого нового события и запоминает id событий этого момента. Без событий
+    остается прежний знак, а у еще не проверявшейся ссылки - default
+    :param link:
+    :param events: события новее знака ссылки, от старых к новым
+    :param default:
+    :return:
+    """
+    if not events:
+        return LinkCheckResult([], link.watermark or default, link.seen_ids)
+    watermark = events[-1].created_at
+    seen_ids = frozenset(
+        event.event_id
+        for event in events
+        if event.created_at == watermark and event.event_id is not None
+    )
+    if watermark == link.watermark:
+        seen_ids |= link.seen_ids
+    return LinkCheckResult(events, watermark, seen_ids)
+
+
+@dataclass(frozen=True)
+class ProviderCapabilities:
+    # batch_fetch умеет проверять несколько целей одним запросом к API
+    batchable: bool = False
+    max_batch_size: int = 1
+    # API отвечает 304 на If-None-Match, такой ответ не тратит лимит запросов
+    conditional_requests: bool = False
+    # API умеет отдавать только события новее заданного момента,
+    # иначе события старше водяного знака отбрасываются после запроса
+    supports_since: bool = False
+    # сколько запросов к провайдеру движок проверки выполняет одновременно: зависший
+    # API занимает не больше max_concurrency соединений общего пула
+    max_concurrency: int = 20
+    # таймаут запроса к API провайдера, у каждого провайдера свой
+    timeout_seconds: float = PROVIDER_TIMEOUT_SECONDS
+
+
+class UpdateProvider(ABC):
+    """
+    Источник обновлений для одного вида ссылок. Провайдер получает уже разобранные
+    цели (LinkTarget) с водяными знаками и возвращает все события новее знака.
+    Для еще не проверявшейся цели (знак None) отдается только самое новое событие.
+    Новый источник - это подкласс с fetch и запись в реестре провайдеров
+    """
+
+    provider: LinkProvider
+    capabilities = ProviderCapabilities()
+    # заголовки каждого запроса к API, например Accept с форматом ответа
+    request_headers: dict[str, str] = {}
+
+    def __init__(self):
+        # url -> (ETag, тело ответа) для условных запросов
+        self._etags: OrderedDict[str, tuple[str, Any]] = OrderedDict()
+        # хост API -> размыкатель цепи
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return get_http_client()
+
+    @abstractmethod
+    async def fetch(self, target: LinkTarget, since: datetime | None) -> list[UpdateInfo]:
+        """
+        События одной цели новее since
+        :param target:
+        :param since:
+        :return:
+        """
+
+    async def batch_fetch(
+        self, targets: dict[LinkTarget, datetime | None]
+    ) -> dict[LinkTarget, list[UpdateInfo]]:
+        """
+        События нескольких целей. По умолчанию - отдельный fetch на цель,
+        провайдеры с batchable переопределяют метод и ходят в API одним запросом
+        :param targets: цель -> водяной знак
+        :return:
+        """
+        results = await asyncio.gather(
+            *(self.fetch(target, since) for target, since in targets.items())
+        )
+        return dict(zip(targets, results))
+
+    @staticmethod
+    def newer_than(
+        events: list[UpdateInfo], since: datetime | None, seen_ids: frozenset[str] = frozenset()
+    ) -> list[UpdateInfo]:
+        """
+        Оставляет события новее водяного знака, от старых к новым, не больше
+        MAX_EVENTS_PER_LINK самых новых. Без знака - только самое новое событие.
+        События сравниваются со знаком как datetime, граница ищется бинарным поиском.
+        Время у API с точностью до секунды, поэтому события ровно в момент знака
+        остаются, если их id нет среди уже отправленных
+        :param events:
+        :param since:
+        :param seen_ids: id отправленных событий момента since
+        :return:
+        """
+        events = sorted(events, key=EVENT_TIME)
+        if since is None:
+            return events[-1:]
+        start = bisect_left(events, since, key=EVENT_TIME)
+        end = bisect_right(events, since, key=EVENT_TIME)
+        unseen = [
+            event
+            for event in events[start:end]
+            if event.event_id is not None and event.event_id not in seen_ids
+        ]
+        return (unseen + events[end:])[-MAX_EVENTS_PER_LINK:]
+
+    async def get_json(self, url: str) -> Any | None:
+        """
+        GET-запрос к API провайдера. Тело ответа или None, если статус не 200.
+        При поддержке условных запросов неизменившийся ответ берется из кэша по ETag
+        :param url:
+        :return:
+        """
+        async with self._get(url) as (response, cached):
+            if cached is not None:
+                return cached
+            if response.status_code != HTTPStatus.OK:
+                return None
+            await response.aread()
+            data = response.json()
+        self.observe_quota(data)
+        self._remember(url, response, data)
+        return data
+
+    async def get_json_items(
+        self, url: str, limit: int, stop: Callable[[Any], bool] | None = None
+    ) -> list[Any] | None:
+        """
+        GET-запрос, ответ которого - JSON-массив. Элементы разбираются по мере
+        получения тела, чтение прекращается после limit элементов или на первом
+        элементе, для которого stop вернул True (он входит в результат).
+        Остаток ответа не скачивается и не разбирается. Условия остановки должны
+        зависеть только от url: по ETag кэшируется прочитанная часть
+        :param url:
+        :param limit:
+        :param stop:
+        :return: прочитанные элементы или None, если статус не 200
+        """
+        async with self._get(url) as (response, cached):
+            if cached is not None:
+                return cached
+            if response.status_code != HTTPStatus.OK:
+                return None
+            items = []
+            async for item in iter_json_array(response.aiter_bytes()):
+                items.append(item)
+                if len(items) >= limit or stop is not None and stop(item):
+                    break
+        self._remember(url, response, items)
+        return items
+
+    @asynccontextmanager
+    async def _get(self, url: str) -> AsyncIterator[tuple[httpx.Response, Any | None]]:
+        """
+        GET-запрос с непрочитанным телом ответа. Тело читает вызывающий код
+        внутри блока, при выходе из него соединение закрывается.
+        Пока цепь хоста разомкнута, запрос не отправляется
+        :param url:
+        :return: ответ и тело из кэша, если API ответил 304 на If-None-Match
+        """
+        headers = dict(self.request_headers)
+        cached = self._etags.get(url) if self.capabilities.conditional_requests else None
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+        request = self.client.build_request(
+            "GET", url, headers=headers, timeout=self.capabilities.timeout_seconds
+        )
+        breaker = self.breaker(request.url.host)
+        if not breaker.allow():
+            PROVIDER_REQUESTS.labels(self.provider.value, "circuit_open").inc()
+            raise CircuitOpenError(f"Circuit for {request.url.host} is open", request=request)
+
+        failed = True
+        try:
+            with tracer.start_as_current_span(
+                f"{self.provider.value} GET",
+                kind=SpanKind.CLIENT,
+                attributes={"http.request.method": "GET", "url.full": url},
+            ) as span:
+                try:
+                    with observe_seconds(PROVIDER_REQUEST_SECONDS, self.provider.value):
+                        async with self._deadline(request):
+                            response = await self.client.send(request, stream=True)
+                            try:
+                                span.set_attribute(
+                                    "http.response.status_code", response.status_code
+                                )
+                                self._observe_response(response)
+                                failed = self.is_failure(response)
+                                if (
+                                    response.status_code == HTTPStatus.NOT_MODIFIED
+                                    and cached is not None
+                                ):
+                                    self._etags.move_to_end(url)
+                                    yield response, cached[1]
+                                else:
+                                    yield response, None
+                            finally:
+                                await response.aclose()
+                                PROVIDER_RESPONSE_BYTES.labels(self.provider.value).inc(
+                                    response.num_bytes_downloaded
+                                )
+                except httpx.HTTPError as e:
+                    failed = True
+                    record_error(span, e)
+                    raise
+        finally:
+            breaker.record(failed)
+            PROVIDER_CIRCUIT_STATE.labels(self.provider.value, breaker.name).set(breaker.state)
+
+    @asynccontextmanager
+    async def _deadline(self, request: httpx.Request) -> AsyncIterator[None]:
+        """
+        Общий срок запроса вместе с чтением тела. Таймауты httpx ограничивают
+        каждую операцию чтения отдельно и не действуют на ASGI-транспорт
+        :param request:
+        :return:
+        """
+        timeout = self.capabilities.timeout_seconds
+        try:
+            async with asyncio.timeout(timeout):
+                yield
+        except TimeoutError as e:
+            raise httpx.ReadTimeout(
+                f"No response from {request.url.host} in {timeout} s", request=request
+            ) from e
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host)
+        return self._breakers[host]
+
+    def is_failure(self, response: httpx.Response) -> bool:
+        """
+        Ответ, который считается ошибкой API для размыкателя цепи: перегрузка
+        или сбой на стороне провайдера, а не отсутствующий объект
+        :param response:
+        :return:
+        """
+        return (
+            response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+            or response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+        )
+
+    def _observe_response(self, response: httpx.Response) -> None:
+        PROVIDER_REQUESTS.labels(self.provider.value, str(response.status_code)).inc()
+        remaining = response.headers.get("x-ratelimit-remaining")
+        if remaining is not None:
+            PROVIDER_RATE_LIMIT_REMAINING.labels(self.provider.value).set(int(remaining))
+
+    def _remember(self, url: str, response: httpx.Response, data: Any) -> None:
+        """
+        Кэширует тело ответа по ETag для условных запросов
+        :param url:
+        :param response:
+        :param data:
+        :return:
+        """
+        etag = response.headers.get("etag")
+        if self.capabilities.conditional_requests and etag:
+            self._etags[url] = (etag, data)
+            self._etags.move_to_end(url)
+            if len(self._etags) > ETAG_CACHE_SIZE:
+                self._etags.popitem(last=False)
+
+    def observe_quota(self, data: Any) -> None:
+        """
+        Остаток лимита из тела ответа - для API, которые не отдают его в заголовках
+        :param data:
+        :return:
+        """
+
+    @staticmethod
+    def make_update_info(
+        title: str,
+        user_name: str,
+        created_at: datetime,
+        body: str | None,
+        event_id: str | None = None,
+    ) -> UpdateInfo:
+        """
+        Общий для провайдеров вид события: точный момент без перевода
+        в часовой пояс (он нужен только при выводе) и превью фиксированной длины
+        :param title:
+        :param user_name:
+        :param created_at: момент события с часовым поясом
+        :param body:
+        :param event_id: id события у провайдера
+        :return:
+        """
+        return UpdateInfo(
+            title=title,
+            user_name=user_name,
+            preview=make_preview(body or ""),
+            created_at=created_at,
+            event_id=event_id,
+        )
@@ -0,0 +1,124 @@
+import os
+import time
+from collections import deque
+from enum import IntEnum
+from typing import Callable
+
+import httpx
+from dotenv import load_dotenv
+
+from src.logger.logger_init import logger
+
+load_dotenv()
+
+# Доля неудачных запросов за окно, при которой цепь размыкается,
+# и сколько запросов должно быть в окне, чтобы доля что-то значила
+CIRCUIT_FAILURE_RATIO = float(os.getenv("CIRCUIT_FAILURE_RATIO", "0.5"))
+CIRCUIT_MIN_CALLS = int(os.getenv("CIRCUIT_MIN_CALLS", "10"))
+CIRCUIT_WINDOW_SECONDS = float(os.getenv("CIRCUIT_WINDOW_SECONDS", "60"))
+# Сколько цепь остается разомкнутой до пробного запроса
+CIRCUIT_OPEN_SECONDS = float(os.getenv("CIRCUIT_OPEN_SECONDS", "30"))
+
+
+class CircuitState(IntEnum):
+    # значения - для метрики состояния
+    CLOSED = 0
+    HALF_OPEN = 1
+    OPEN = 2
+
+
+class CircuitOpenError(httpx.RequestError):
+    """Запрос не отправлен: цепь хоста разомкнута после серии ошибок"""
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи для одного хоста API. Пока доля ошибок за окно ниже порога,
+    запросы идут как обычно. После всплеска ошибок цепь размыкается, и запросы
+    сразу завершаются CircuitOpenError, не дожидаясь таймаута. Через open_seconds
+    пропускается один пробный запрос: успех замыкает цепь, ошибка снова размыкает
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_ratio: float = CIRCUIT_FAILURE_RATIO,
+        min_calls: int = CIRCUIT_MIN_CALLS,
+        window_seconds: float = CIRCUIT_WINDOW_SECONDS,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self.state = CircuitState.CLOSED
+        # (момент, неудача) запросов за последние window_seconds
+        self._calls: deque[tuple[float, bool]] = deque()
+        self._failures = 0
+        self._opened_at = 0.0
+        # момент отправки пробного запроса, None - проба еще не отправлялась
+        self._probe_at: float | None = None
+
+    def allow(self) -> bool:
+        """
+        Можно ли отправить запрос. В полуразомкнутом состоянии разрешен
+        только один пробный запрос до его результата; пробу без результата
+        дольше open_seconds заменяет новая
+        :return:
+        """
+        now = self._clock()
+        if self.state == CircuitState.OPEN:
+            if now - self._opened_at < self.open_seconds:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self._probe_at = None
+        if self.state == CircuitState.HALF_OPEN:
+            if self._probe_at is not None and now - self._probe_at < self.open_seconds:
+                return False
+            self._probe_at = now
+        return True
+
+    def record(self, failed: bool) -> None:
+        """
+        Учитывает результат запроса
+        :param failed: ошибка соединения, таймаут или ответ о перегрузке API
+        :return:
+        """
+        now = self._clock()
+        if self.state == CircuitState.HALF_OPEN:
+            if failed:
+                logger.warning("Цепь %s снова разомкнута: пробный запрос неудачен", self.name)
+                self._open(now)
+            else:
+                logger.info("Цепь %s замкнута: пробный запрос успешен", self.name)
+                self.state = CircuitState.CLOSED
+            return
+        if self.state == CircuitState.OPEN:
+            # ответ на запрос, отправленный до размыкания
+            return
+
+        self._calls.append((now, failed))
+        self._failures += failed
+        while self._calls and self._calls[0][0] <= now - self.window_seconds:
+            self._failures -= self._calls.popleft()[1]
+        if (
+            len(self._calls) >= self.min_calls
+            and self._failures >= self.failure_ratio * len(self._calls)
+        ):
+            logger.warning(
+                "Цепь %s разомкнута на %s с: %s ошибок из %s запросов",
+                self.name,
+                self.open_seconds,
+                self._failures,
+                len(self._calls),
+            )
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = CircuitState.OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self._failures = 0
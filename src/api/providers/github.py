@@ -0,0 +1,200 @@
+import os
+from datetime import datetime, timezone
+from http import HTTPStatus
+from typing import Any
+
+import httpx
+
+from src.api.providers.base import (
+    MAX_EVENTS_PER_LINK,
+    MAX_PAGES_PER_LINK,
+    ProviderCapabilities,
+    UpdateProvider,
+)
+from src.api.schemas.schemas import UpdateInfo
+from src.api.scrapper_api.http_client import PROVIDER_TIMEOUT_SECONDS
+from src.api.scrapper_api.link_target import LinkKind, LinkProvider, LinkTarget
+from src.api.scrapper_api.utils_scrapper_api import github_comments_api_url, get_github_api_url
+
+GITHUB_PAGE_SIZE = 100
+GITHUB_TIMEOUT_SECONDS = float(os.getenv("GITHUB_TIMEOUT_SECONDS", PROVIDER_TIMEOUT_SECONDS))
+# Тело issue и комментария - только исходный markdown, без body_html и body_text.
+# Разреженных наборов полей у REST API нет, reactions и ссылки приходят всегда
+GITHUB_HEADERS = {
+    "Accept": "application/vnd.github.raw+json",
+    "X-GitHub-Api-Version": "2022-11-28",
+}
+
+
+def parse_github_time(value: str) -> datetime:
+    # ISO 8601 с "Z" разбирается fromisoformat сразу в UTC, без strptime
+    return datetime.fromisoformat(value)
+
+
+def github_since(since: datetime) -> str:
+    return since.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_github_item(item: dict[str, Any], preview: str) -> UpdateInfo:
+    """
+    Строит UpdateInfo из issue или PR GitHub API
+    :param item:
+    :param preview:
+    :return:
+    """
+    return GitHubProvider.make_update_info(
+        title=item.get("title", ""),
+        user_name=item.get("user", {}).get("login", "Unknown"),
+        created_at=parse_github_time(item.get("created_at")),
+        body=preview,
+        # у PR из списка issues и из /pulls разные id, но один html_url
+        event_id=item.get("html_url"),
+    )
+
+
+def parse_github_comment(title: str, comment: dict[str, Any]) -> UpdateInfo:
+    """
+    Строит UpdateInfo из комментария к issue или PR
+    :param title: заголовок issue или PR
+    :param comment:
+    :return:
+    """
+    return GitHubProvider.make_update_info(
+        title=title,
+        user_name=comment.get("user", {}).get("login", "Unknown"),
+        created_at=parse_github_time(comment.get("created_at")),
+        body=comment.get("body"),
+        event_id=comment.get("html_url"),
+    )
+
+
+class GitHubProvider(UpdateProvider):
+    """
+    Issues, pull requests и репозитории GitHub. REST API не умеет отдавать
+    несколько репозиториев одним запросом, зато отвечает 304 по ETag
+    и фильтрует issues и комментарии параметром since
+    """
+
+    provider = LinkProvider.GITHUB
+    capabilities = ProviderCapabilities(
+        conditional_requests=True, supports_since=True, timeout_seconds=GITHUB_TIMEOUT_SECONDS
+    )
+    request_headers = GITHUB_HEADERS
+
+    async def fetch(self, target: LinkTarget, since: datetime | None) -> list[UpdateInfo]:
+        """
+        Для репозитория - новые issues и PR, для issue или PR - он сам, если создан
+        после водяного знака, и все новые комментарии к нему
+        :param target:
+        :param since:
+        :return:
+        """
+        api_url, is_direct = get_github_api_url(target)
+        if not is_direct:
+            items = await self._fetch_repo_items(api_url, since)
+            return self.newer_than(
+                [parse_github_item(item, item.get("body") or "") for item in items], since
+            )
+
+        item = await self.get_json(api_url)
+        if not item:
+            return []
+        events = [parse_github_item(item, item.get("body") or "")]
+        if since is not None:
+            comments = await self._fetch_pages(
+                f"{github_comments_api_url(target)}?since={github_since(since)}"
+            )
+            events.extend(parse_github_comment(item.get("title", ""), c) for c in comments)
+        return self.newer_than(events, since)
+
+    def is_failure(self, response: httpx.Response) -> bool:
+        # исчерпанный лимит GitHub отвечает 403 с нулевым остатком: до сброса лимита
+        # запросы бесполезны, цепь размыкается так же, как при сбое API
+        return super().is_failure(response) or (
+            response.status_code == HTTPStatus.FORBIDDEN
+            and response.headers.get("x-ratelimit-remaining") == "0"
+        )
+
+    async def _fetch_repo_items(self, api_url: str, since: datetime | None) -> list[dict]:
+        """
+        Issues и PR репозитория по убыванию даты создания. GitHub фильтрует since
+        по времени изменения, поэтому страница читается потоком до первого элемента,
+        созданного раньше водяного знака, и не дальше MAX_EVENTS_PER_LINK элементов:
+        более старые события newer_than все равно отбросит. Созданные в ту же секунду,
+        что и знак, читаются: среди них могут быть еще не отправленные
+        :param api_url:
+        :param since:
+        :return:
+        """
+        if since is None:
+            return await self.get_json(f"{api_url}&per_page=1") or []
+
+        def created_before_watermark(item: dict) -> bool:
+            return parse_github_time(item["created_at"]) < since
+
+        limit = min(GITHUB_PAGE_SIZE, MAX_EVENTS_PER_LINK)
+        items = []
+        for page in range(1, MAX_PAGES_PER_LINK + 1):
+            url = f"{api_url}&since={github_since(since)}&per_page={GITHUB_PAGE_SIZE}&page={page}"
+            page_items = await self.get_json_items(url, limit, created_before_watermark) or []
+            items.extend(page_items)
+            if (
+                len(page_items) < GITHUB_PAGE_SIZE
+                or created_before_watermark(page_items[-1])
+                or len(items) >= MAX_EVENTS_PER_LINK
+            ):
+                break
+        return items
+
+    async def _fetch_pages(self, url: str) -> list[dict]:
+        items = []
+        for page in range(1, MAX_PAGES_PER_LINK + 1):
+            page_items = await self.get_json(f"{url}&per_page={GITHUB_PAGE_SIZE}&page={page}")
+            items.extend(page_items or [])
+            if not page_items or len(page_items) < GITHUB_PAGE_SIZE:
+                break
+        return items
+
+
+# Какие действия событий webhook означают новое событие ссылки
+WEBHOOK_ACTIONS = {
+    "issues": "opened",
+    "pull_request": "opened",
+    "issue_comment": "created",
+    "pull_request_review_comment": "created",
+}
+
+
+def parse_github_webhook(
+    event: str, payload: dict[str, Any]
+) -> dict[LinkTarget, list[UpdateInfo]]:
+    """
+    Переводит событие webhook GitHub в события целей: новый issue или PR - событие
+    репозитория и самого элемента, новый комментарий - событие issue или PR
+    :param event: заголовок X-GitHub-Event
+    :param payload:
+    :return:
+    """
+    if event not in WEBHOOK_ACTIONS or WEBHOOK_ACTIONS[event] != payload.get("action"):
+        return {}
+    repository = payload.get("repository") or {}
+    owner, _, repo = (repository.get("full_name") or "").lower().partition("/")
+    if not owner or not repo:
+        return {}
+
+    repo_target = LinkTarget(LinkProvider.GITHUB, owner, repo, LinkKind.REPOSITORY, None)
+    if event in ("issues", "pull_request"):
+        item = payload[event if event == "pull_request" else "issue"]
+        kind = LinkKind.PULL if event == "pull_request" else LinkKind.ISSUE
+        item_target = LinkTarget(LinkProvider.GITHUB, owner, repo, kind, item["number"])
+        update_info = parse_github_item(item, item.get("body") or "")
+        return {repo_target: [update_info], item_target: [update_info]}
+
+    if event == "issue_comment":
+        item = payload["issue"]
+        kind = LinkKind.PULL if "pull_request" in item else LinkKind.ISSUE
+    else:
+        item = payload["pull_request"]
+        kind = LinkKind.PULL
+    item_target = LinkTarget(LinkProvider.GITHUB, owner, repo, kind, item["number"])
+    return {item_target: [parse_github_comment(item.get("title", ""), payload["comment"])]}
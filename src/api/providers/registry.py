@@ -0,0 +1,121 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import httpx
+
+from src.api.providers.base import (
+    LinkCheckResult,
+    TrackedLink,
+    UpdateProvider,
+    advance_watermark,
+)
+from src.api.providers.circuit_breaker import CircuitOpenError
+from src.api.schemas.schemas import UpdateInfo
+from src.api.scrapper_api.link_target import LinkProvider, LinkTarget
+from src.api.utils.metrics import EVENTS_FOUND, LINKS_CHECKED
+from src.api.utils.tracing import tracer
+from src.logger.logger_init import logger
+
+
+class ProviderRegistry:
+    """
+    Провайдеры обновлений по виду ссылки и движок проверки поверх них.
+    Цели группируются по провайдеру, режутся на пакеты по его возможностям
+    и проверяются не более чем max_concurrency запросами к провайдеру одновременно.
+    У каждого провайдера свои таймаут и размыкатели цепи по хостам, поэтому
+    недоступный API задерживает цикл не дольше своего таймаута, а после серии
+    ошибок запросы к нему не отправляются, пока пробный запрос не пройдет
+    """
+
+    def __init__(self, providers: list[UpdateProvider] | None = None):
+        self._providers: dict[LinkProvider, UpdateProvider] = {}
+        self._semaphores: dict[LinkProvider, asyncio.Semaphore] = {}
+        for provider in providers or []:
+            self.register(provider)
+
+    def register(self, provider: UpdateProvider) -> None:
+        self._providers[provider.provider] = provider
+        self._semaphores[provider.provider] = asyncio.Semaphore(
+            provider.capabilities.max_concurrency
+        )
+
+    def get(self, provider: LinkProvider) -> UpdateProvider | None:
+        return self._providers.get(provider)
+
+    async def fetch_updates(self, links: dict[int, TrackedLink]) -> dict[int, LinkCheckResult]:
+        """
+        Проверяет ссылки, уже разобранные при добавлении, и возвращает события
+        новее их водяных знаков вместе с новыми знаками. Ссылки с одинаковой целью
+        (например, записанные до канонизации) запрашиваются один раз
+        :param links: id ссылки -> цель и водяной знак
+        :return:
+        """
+        with tracer.start_as_current_span("providers.fetch_updates") as span:
+            span.set_attribute("linktracker.links", len(links))
+            return await self._fetch_updates(links)
+
+    async def _fetch_updates(self, links: dict[int, TrackedLink]) -> dict[int, LinkCheckResult]:
+        link_ids_by_target: dict[LinkTarget, list[int]] = defaultdict(list)
+        for link_id, link in links.items():
+            if link.target is not None:
+                link_ids_by_target[link.target].append(link_id)
+
+        targets_by_provider: dict[LinkProvider, dict[LinkTarget, datetime | None]] = (
+            defaultdict(dict)
+        )
+        for target, link_ids in link_ids_by_target.items():
+            watermarks = [links[link_id].watermark for link_id in link_ids]
+            since = None if None in watermarks else min(watermarks)
+            targets_by_provider[target.provider][target] = since
+
+        batches = []
+        for provider_key, targets in targets_by_provider.items():
+            provider = self.get(provider_key)
+            if provider is None:
+                logger.warning("Нет провайдера для ссылок %s", provider_key)
+                continue
+            batch_size = provider.capabilities.max_batch_size
+            if not provider.capabilities.batchable:
+                batch_size = 1
+            items = list(targets.items())
+            batches.extend(
+                self._fetch_batch(provider, dict(items[start : start + batch_size]))
+                for start in range(0, len(items), batch_size)
+            )
+
+        events_by_target: dict[LinkTarget, list[UpdateInfo]] = {}
+        for batch_results in await asyncio.gather(*batches):
+            events_by_target.update(batch_results)
+
+        now = datetime.now(timezone.utc)
+        results = {}
+        for link_id, link in links.items():
+            if link.target not in events_by_target:
+                results[link_id] = LinkCheckResult([], link.watermark, link.seen_ids)
+                continue
+            # у ссылок с общей целью знаки могут отличаться: запрошено с самого старого
+            events = UpdateProvider.newer_than(
+                events_by_target[link.target], link.watermark, link.seen_ids
+            )
+            results[link_id] = advance_watermark(link, events, now)
+            LINKS_CHECKED.labels(link.target.provider.value).inc()
+            EVENTS_FOUND.labels(link.target.provider.value).inc(len(events))
+        return results
+
+    async def _fetch_batch(
+        self, provider: UpdateProvider, targets: dict[LinkTarget, datetime | None]
+    ) -> dict[LinkTarget, list[UpdateInfo]]:
+        async with self._semaphores[provider.provider]:
+            try:
+                return await provider.batch_fetch(targets)
+            except CircuitOpenError as e:
+                logger.debug(
+                    "Провайдер %s пропущен для %s целей: %s", provider.provider, len(targets), e
+                )
+                return {}
+            except httpx.HTTPError as e:
+                logger.warning(
+                    "Провайдер %s не ответил для %s целей: %s", provider.provider, len(targets), e
+                )
+                return {}
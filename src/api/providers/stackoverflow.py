@@ -0,0 +1,207 @@
+import asyncio
+import os
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any
+
+from src.api.providers.base import ProviderCapabilities, UpdateProvider
+from src.api.schemas.schemas import UpdateInfo
+from src.api.scrapper_api.http_client import PROVIDER_TIMEOUT_SECONDS
+from src.api.scrapper_api.link_target import LinkProvider, LinkTarget
+from src.api.utils.metrics import PROVIDER_RATE_LIMIT_REMAINING
+from src.api.scrapper_api.utils_scrapper_api import (
+    STACKEXCHANGE_BODY_FILTER,
+    stackexchange_filter_create_api_url,
+    stackoverflow_comments_api_url,
+    stackoverflow_info_api_url,
+    stackoverflow_last_answer_api_url,
+)
+
+# StackExchange API принимает до 100 id через ";" и отдает до 100 элементов на страницу
+STACKEXCHANGE_MAX_IDS = 100
+STACKEXCHANGE_MAX_PAGES = 5
+# Поля, которые нужны провайдеру: остальное (счетчики, репутация, ссылки, лицензия)
+# фильтр убирает из ответа. Полей с отрывком тела у ответов и комментариев нет,
+# тело приходит целиком и обрезается make_preview
+STACKEXCHANGE_FILTER_FIELDS = (
+    ".items",
+    ".has_more",
+    ".quota_remaining",
+    "question.question_id",
+    "question.title",
+    "answer.answer_id",
+    "answer.question_id",
+    "answer.creation_date",
+    "answer.owner",
+    "answer.body",
+    "comment.comment_id",
+    "comment.post_id",
+    "comment.creation_date",
+    "comment.owner",
+    "comment.body",
+    "shallow_user.display_name",
+)
+# Id уже созданного фильтра: фильтры StackExchange неизменяемы, поэтому id
+# можно создать один раз и задать здесь; без него фильтр создается при первом запросе
+STACKEXCHANGE_FILTER = os.getenv("STACKEXCHANGE_FILTER") or None
+STACKEXCHANGE_TIMEOUT_SECONDS = float(
+    os.getenv("STACKEXCHANGE_TIMEOUT_SECONDS", PROVIDER_TIMEOUT_SECONDS)
+)
+
+
+def parse_stackoverflow_item(title: str, item: dict[str, Any]) -> UpdateInfo:
+    """
+    Строит UpdateInfo из ответа или комментария StackExchange API
+    :param title:
+    :param item:
+    :return:
+    """
+    return StackOverflowProvider.make_update_info(
+        title=title,
+        user_name=item.get("owner", {}).get("display_name", "Unknown"),
+        created_at=datetime.fromtimestamp(item.get("creation_date", 0), timezone.utc),
+        body=item.get("body", ""),
+        event_id=stackoverflow_event_id(item),
+    )
+
+
+def stackoverflow_event_id(item: dict[str, Any]) -> str | None:
+    # у ответов и комментариев свои последовательности id
+    if "answer_id" in item:
+        return f"answer:{item['answer_id']}"
+    if "comment_id" in item:
+        return f"comment:{item['comment_id']}"
+    return None
+
+
+class StackOverflowProvider(UpdateProvider):
+    """
+    Вопросы StackOverflow. Вопросы, ответы и комментарии пакета целей
+    запрашиваются по одному разу на пакет, а не на каждый вопрос
+    """
+
+    provider = LinkProvider.STACKOVERFLOW
+    capabilities = ProviderCapabilities(
+        batchable=True,
+        max_batch_size=STACKEXCHANGE_MAX_IDS,
+        supports_since=True,
+        timeout_seconds=STACKEXCHANGE_TIMEOUT_SECONDS,
+    )
+
+    def __init__(self):
+        super().__init__()
+        self._filter = STACKEXCHANGE_FILTER
+        self._filter_lock = asyncio.Lock()
+
+    async def fetch(self, target: LinkTarget, since: datetime | None) -> list[UpdateInfo]:
+        return (await self.batch_fetch({target: since}))[target]
+
+    def observe_quota(self, data: Any) -> None:
+        # StackExchange сообщает остаток дневной квоты в каждом ответе
+        if isinstance(data, dict) and "quota_remaining" in data:
+            PROVIDER_RATE_LIMIT_REMAINING.labels(self.provider.value).set(data["quota_remaining"])
+
+    async def batch_fetch(
+        self, targets: dict[LinkTarget, datetime | None]
+    ) -> dict[LinkTarget, list[UpdateInfo]]:
+        """
+        Ответы и комментарии к вопросам пакета. Для уже проверявшихся вопросов
+        запрашивается всё, что появилось с самого старого из их водяных знаков (fromdate),
+        для новых - только самые свежие элементы
+        :param targets: цель -> водяной знак
+        :return:
+        """
+        api_filter = await self.api_filter()
+        question_ids = {target.number for target in targets}
+        titles = {
+            item["question_id"]: item.get("title", "")
+            for item in await self._fetch_titles(question_ids, api_filter)
+        }
+
+        items: dict[int, list[dict[str, Any]]] = defaultdict(list)
+        initial = {target.number for target, since in targets.items() if since is None}
+        watermarks = [since for since in targets.values() if since is not None]
+        groups = [(initial, None)]
+        if watermarks:
+            groups.append((question_ids - initial, min(watermarks)))
+        for group_ids, fromdate in groups:
+            if not group_ids:
+                continue
+            ids = join_ids(group_ids)
+            for url, key in (
+                (stackoverflow_last_answer_api_url(ids, api_filter), "question_id"),
+                (stackoverflow_comments_api_url(ids, api_filter), "post_id"),
+            ):
+                for question_id, question_items in (
+                    await self._fetch_items(url, key, group_ids, fromdate)
+                ).items():
+                    items[question_id].extend(question_items)
+
+        return {
+            target: self.newer_than(
+                [
+                    parse_stackoverflow_item(titles[target.number], item)
+                    for item in items[target.number]
+                ],
+                since,
+            )
+            if target.number in titles
+            else []
+            for target, since in targets.items()
+        }
+
+    async def api_filter(self) -> str:
+        """
+        Фильтр с полями STACKEXCHANGE_FILTER_FIELDS. Создается один раз на процесс,
+        пока создать его не удалось - запросы идут со встроенным withbody
+        :return: id фильтра
+        """
+        if self._filter is None:
+            async with self._filter_lock:
+                if self._filter is None:
+                    self._filter = await self._create_filter()
+        return self._filter or STACKEXCHANGE_BODY_FILTER
+
+    async def _create_filter(self) -> str | None:
+        data = await self.get_json(stackexchange_filter_create_api_url(STACKEXCHANGE_FILTER_FIELDS))
+        items = (data or {}).get("items") or [{}]
+        return items[0].get("filter")
+
+    async def _fetch_titles(self, question_ids: set[int], api_filter: str) -> list[dict[str, Any]]:
+        url = stackoverflow_info_api_url(join_ids(question_ids), api_filter)
+        data = await self.get_json(f"{url}&pagesize={len(question_ids)}")
+        return (data or {}).get("items", [])
+
+    async def _fetch_items(
+        self, url: str, key: str, question_ids: set[int], fromdate: datetime | None
+    ) -> dict[int, list[dict[str, Any]]]:
+        """
+        Элементы по вопросам, от новых к старым. С fromdate читаются все страницы
+        (но не больше STACKEXCHANGE_MAX_PAGES), без него - пока для каждого
+        вопроса не найден самый свежий элемент; для одного вопроса это страница из
+        одного элемента
+        :param url:
+        :param key: поле с id вопроса
+        :param question_ids:
+        :param fromdate:
+        :return:
+        """
+        if fromdate is not None:
+            url = f"{url}&fromdate={int(fromdate.timestamp())}"
+        pagesize = 1 if fromdate is None and len(question_ids) == 1 else STACKEXCHANGE_MAX_IDS
+        items: dict[int, list[dict[str, Any]]] = defaultdict(list)
+        for page in range(1, STACKEXCHANGE_MAX_PAGES + 1):
+            data = await self.get_json(f"{url}&pagesize={pagesize}&page={page}")
+            if not data:
+                break
+            for item in data.get("items", []):
+                items[item.get(key)].append(item)
+            if not data.get("has_more"):
+                break
+            if fromdate is None and question_ids <= items.keys():
+                break
+        return items
+
+
+def join_ids(question_ids: set[int]) -> str:
+    return ";".join(str(question_id) for question_id in sorted(question_ids))
@@ -1,4 +1,11 @@
-from pydantic import BaseModel, HttpUrl, validator
+from datetime import datetime, time
+from enum import StrEnum
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from pydantic import BaseModel, Field, HttpUrl, field_validator, validator
+
+# часовой пояс, в котором выводятся даты, пока пользователь не выбрал свой
+DEFAULT_TIMEZONE = "Europe/Moscow"
 
 
 class ApiErrorResponse(BaseModel):
@@ -9,14 +16,32 @@ class ApiErrorResponse(BaseModel):
     stacktrace: list[str]
 
 
+class UpdateInfo(BaseModel):
+    title: str
+    user_name: str
+    preview: str
+    # точный момент события: по нему сдвигается водяной знак ссылки,
+    # в часовой пояс пользователя переводится только при выводе
+    created_at: datetime
+    # id события у провайдера: различает события одной секунды на границе водяного знака
+    event_id: str | None = None
+
+
 class LinkUpdate(BaseModel):
     id: int
     url: str
     description: str
     tg_chat_id: int
+    # Детали события нужны только внутри scrapper (накопление дайджеста)
+    update_info: UpdateInfo | None = Field(default=None, exclude=True)
+
+
+# Версия схемы сообщений с обновлениями. Сообщения без поля schema_version - версия 1
+UPDATES_SCHEMA_VERSION = 1
 
 
 class ListLinksUpdate(BaseModel):
+    schema_version: int = UPDATES_SCHEMA_VERSION
     links: list[LinkUpdate]
 
 
@@ -36,14 +61,48 @@ class AddLinkRequest(BaseModel):
 class ListLinksResponse(BaseModel):
     links: list[LinkResponse]
     size: int
+    next_after_id: int | None = None
+    prev_before_id: int | None = None
 
 
 class RemoveLinkRequest(BaseModel):
     url: str
 
 
-class UpdateInfo(BaseModel):
-    title: str
-    user_name: str
-    creation_date: str
-    preview: str
+class NotificationMode(StrEnum):
+    IMMEDIATE = "immediate"
+    DIGEST = "digest"
+
+
+class NotificationSettingsRequest(BaseModel):
+    mode: NotificationMode
+    digest_time: time = time(hour=20, minute=0)
+
+
+class TimezoneRequest(BaseModel):
+    # имя из базы IANA, например Europe/Berlin
+    timezone: str
+
+    @field_validator("timezone")
+    @classmethod
+    def check_timezone(cls, value: str) -> str:
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"Unknown timezone: {value}")
+        return value
+
+
+class PendingEvent(BaseModel):
+    id: int
+    link_id: int
+    url: str
+    tg_chat_id: int
+    notification_mode: NotificationMode
+    description: str
+    title: str = ""
+    user_name: str = ""
+    event_at: datetime | None = None
+    preview: str = ""
+    timezone: str = DEFAULT_TIMEZONE
+
@@ -0,0 +1,77 @@
+import hashlib
+import hmac
+import os
+from typing import Any, TYPE_CHECKING
+
+from src.api.providers.base import UpdateProvider, advance_watermark
+from src.api.providers.github import parse_github_webhook
+
+if TYPE_CHECKING:
+    from src.database.orm_database import OrmDbProcessor
+    from src.database.sql_database import SqlDbProcessor
+
+# секрет, заданный в настройках webhook репозитория GitHub; без него webhook выключен
+GITHUB_WEBHOOK_SECRET = os.getenv("GITHUB_WEBHOOK_SECRET", "")
+SIGNATURE_PREFIX = "sha256="
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """
+    Подпись тела запроса в формате заголовка X-Hub-Signature-256
+    :param secret:
+    :param body:
+    :return:
+    """
+    return SIGNATURE_PREFIX + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret: str, body: bytes, signature: str | None) -> bool:
+    """
+    Проверяет HMAC-SHA256 подпись GitHub, сравнение - за постоянное время
+    :param secret:
+    :param body: тело запроса как есть, до разбора JSON
+    :param signature: заголовок X-Hub-Signature-256
+    :return:
+    """
+    if not secret or not signature:
+        return False
+    return hmac.compare_digest(sign_payload(secret, body), signature)
+
+
+async def ingest_github_event(
+    db_processor: "SqlDbProcessor | OrmDbProcessor",
+    event: str,
+    payload: dict[str, Any],
+) -> int:
+    """
+    Записывает событие webhook в тот же конвейер, что и цикл проверки: состояние
+    и водяной знак ссылки, отложенные обновления подписчиков. Найденные ссылки
+    помечаются push_fed, и цикл проверки перестает их опрашивать
+    :param db_processor:
+    :param event: заголовок X-GitHub-Event
+    :param payload:
+    :return: число записанных обновлений
+    """
+    target_events = parse_github_webhook(event, payload)
+    if not target_events:
+        return 0
+    links = await db_processor.mark_push_fed_links(list(target_events))
+
+    link_states = {}
+    for link_id, link in links.items():
+        # повторная доставка того же события отсекается водяным знаком
+        events = UpdateProvider.newer_than(
+            target_events[link.target], link.watermark, link.seen_ids
+        )
+        if events:
+            link_states[link_id] = advance_watermark(link, events)
+    if not link_states:
+        return 0
+
+    await db_processor.save_link_states(link_states)
+    updates = await db_processor.build_link_updates(
+        {link_id: state.events for link_id, state in link_states.items()}
+    )
+    if updates:
+        await db_processor.save_pending_updates(updates)
+    return len(updates)
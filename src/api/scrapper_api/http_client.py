@@ -0,0 +1,56 @@
+import asyncio
+import os
+
+import httpx
+
+PROVIDER_MAX_CONNECTIONS = int(os.getenv("PROVIDER_MAX_CONNECTIONS", "100"))
+PROVIDER_TIMEOUT_SECONDS = float(os.getenv("PROVIDER_TIMEOUT_SECONDS", "10"))
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_transport: httpx.AsyncBaseTransport | None = None
+
+
+def use_transport(transport: httpx.AsyncBaseTransport | None) -> None:
+    """
+    Подменяет транспорт пула, например на заглушки API в нагрузочном тесте.
+    Действует на клиенты, созданные после вызова
+    :param transport: None - обычные сетевые соединения
+    :return:
+    """
+    global _transport, _client
+    _transport = transport
+    _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Возвращает общий для процесса пул соединений к внешним API.
+    Пул привязан к event loop, поэтому в каждом процессе и цикле создается свой
+    :return:
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=PROVIDER_MAX_CONNECTIONS,
+                max_keepalive_connections=PROVIDER_MAX_CONNECTIONS,
+            ),
+            timeout=httpx.Timeout(PROVIDER_TIMEOUT_SECONDS),
+            transport=_transport,
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    """
+    Закрывает пул соединений текущего процесса
+    :return:
+    """
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
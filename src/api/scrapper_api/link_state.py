@@ -0,0 +1,63 @@
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from src.logger.logger_init import logger
+
+if TYPE_CHECKING:
+    from src.database.orm_database import OrmDbProcessor
+    from src.database.sql_database import SqlDbProcessor
+
+LINK_STALE_SECONDS = int(os.getenv("LINK_STALE_SECONDS", "300"))
+REFRESH_MAX_LINKS = int(os.getenv("REFRESH_MAX_LINKS", "20"))
+REFRESH_TIMEOUT_SECONDS = float(os.getenv("REFRESH_TIMEOUT_SECONDS", "5"))
+# ссылки с webhook опрашиваются, только если от него не было событий дольше этого времени
+PUSH_FED_POLL_SECONDS = int(os.getenv("PUSH_FED_POLL_SECONDS", "86400"))
+DEFAULT_UPDATES_WINDOW = timedelta(days=1)
+USER_UPDATES_LIMIT = 100
+
+
+async def refresh_stale_links(
+    db_processor: "SqlDbProcessor | OrmDbProcessor",
+    tg_chat_id: int,
+    tags: list[str] | None = None,
+) -> int:
+    """
+    Обновляет состояние ссылок пользователя, которые давно не проверялись.
+    Запрашивается не больше REFRESH_MAX_LINKS ссылок и не дольше
+    REFRESH_TIMEOUT_SECONDS, поэтому время ответа не зависит от числа подписок.
+    Найденные события сдвигают водяной знак, поэтому плановая проверка их уже
+    не увидит: уведомления подписчиков откладываются здесь же, как для webhook
+    :param db_processor:
+    :param tg_chat_id:
+    :param tags:
+    :return: число обновленных ссылок
+    """
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=LINK_STALE_SECONDS)
+    stale_links = await db_processor.get_stale_user_links(
+        tg_chat_id, tags, stale_before, REFRESH_MAX_LINKS
+    )
+    if not stale_links:
+        return 0
+
+    try:
+        link_states = await asyncio.wait_for(
+            db_processor.fetch_link_states(stale_links), REFRESH_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        logger.warning(
+            "Обновление %s ссылок чата %s не уложилось в %s с",
+            len(stale_links),
+            tg_chat_id,
+            REFRESH_TIMEOUT_SECONDS,
+        )
+        return 0
+
+    await db_processor.save_link_states(link_states)
+    updates = await db_processor.build_link_updates(
+        {link_id: state.events for link_id, state in link_states.items() if state.events}
+    )
+    if updates:
+        await db_processor.save_pending_updates(updates)
+    return len(link_states)
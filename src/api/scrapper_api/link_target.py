@@ -0,0 +1,136 @@
+import re
+from enum import StrEnum
+from typing import Any, NamedTuple
+
+
+class LinkProvider(StrEnum):
+    GITHUB = "github"
+    STACKOVERFLOW = "stackoverflow"
+
+
+class LinkKind(StrEnum):
+    REPOSITORY = "repository"
+    ISSUE = "issue"
+    PULL = "pull"
+    QUESTION = "question"
+
+
+# Шаблоны компилируются один раз при импорте. Схема, www, завершающий слэш,
+# query и fragment не влияют на то, что отслеживается
+GITHUB_URL_PATTERN = re.compile(
+    r"^(?:https?://)?(?:www\.)?github\.com/([^/?#]+)/([^/?#]+?)(?:\.git)?"
+    r"(?:/(issues|pull)/(\d+))?/?(?:[?#].*)?$",
+    re.IGNORECASE,
+)
+STACKOVERFLOW_URL_PATTERN = re.compile(
+    r"^(?:https?://)?(?:www\.)?stackoverflow\.com/(?:questions|q)/(\d+)"
+    r"(?:/[^?#]*)?(?:[?#].*)?$",
+    re.IGNORECASE,
+)
+
+GITHUB_ITEM_KINDS = {"issues": LinkKind.ISSUE, "pull": LinkKind.PULL}
+
+
+class LinkTarget(NamedTuple):
+    provider: LinkProvider
+    owner: str | None
+    repo: str | None
+    kind: LinkKind
+    number: int | None
+
+    @property
+    def canonical_url(self) -> str:
+        """
+        Единственное написание ссылки, под которым она хранится в links
+        :return:
+        """
+        if self.provider == LinkProvider.STACKOVERFLOW:
+            return f"https://stackoverflow.com/questions/{self.number}"
+        base_url = f"https://github.com/{self.owner}/{self.repo}"
+        if self.kind == LinkKind.ISSUE:
+            return f"{base_url}/issues/{self.number}"
+        if self.kind == LinkKind.PULL:
+            return f"{base_url}/pull/{self.number}"
+        return base_url
+
+
+def classify_url(url: str) -> LinkTarget | None:
+    """
+    Разбирает ссылку в LinkTarget или возвращает None для неподдерживаемых ссылок.
+    Имена владельца и репозитория GitHub не зависят от регистра,
+    поэтому приводятся к нижнему
+    :param url:
+    :return:
+    """
+    url = url.strip()
+    match = GITHUB_URL_PATTERN.match(url)
+    if match:
+        owner, repo, item_type, number = match.groups()
+        if item_type is None:
+            kind, number = LinkKind.REPOSITORY, None
+        else:
+            kind, number = GITHUB_ITEM_KINDS[item_type.lower()], int(number)
+        return LinkTarget(LinkProvider.GITHUB, owner.lower(), repo.lower(), kind, number)
+
+    match = STACKOVERFLOW_URL_PATTERN.match(url)
+    if match:
+        return LinkTarget(LinkProvider.STACKOVERFLOW, None, None, LinkKind.QUESTION, int(match[1]))
+    return None
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Каноническая форма ссылки, неподдерживаемые ссылки возвращаются без изменений
+    :param url:
+    :return:
+    """
+    target = classify_url(url)
+    return target.canonical_url if target else url.strip()
+
+
+def stored_url_variants(url: str) -> list[str]:
+    """
+    Написания, под которыми ссылка может лежать в links: каноническое и присланное
+    пользователем (так хранятся строки, записанные до канонизации)
+    :param url:
+    :return:
+    """
+    return list(dict.fromkeys((canonicalize_url(url), url.strip(), url)))
+
+
+def target_columns(target: LinkTarget | None) -> dict[str, Any]:
+    """
+    Значения колонок links для разобранной ссылки
+    :param target:
+    :return:
+    """
+    if target is None:
+        return {"provider": None, "owner": None, "repo": None, "kind": None, "number": None}
+    return {
+        "provider": target.provider.value,
+        "owner": target.owner,
+        "repo": target.repo,
+        "kind": target.kind.value,
+        "number": target.number,
+    }
+
+
+def target_from_columns(
+    provider: str | None,
+    owner: str | None,
+    repo: str | None,
+    kind: str | None,
+    number: int | None,
+) -> LinkTarget | None:
+    """
+    Восстанавливает LinkTarget из колонок links без разбора строки
+    :param provider:
+    :param owner:
+    :param repo:
+    :param kind:
+    :param number:
+    :return:
+    """
+    if provider is None or kind is None:
+        return None
+    return LinkTarget(LinkProvider(provider), owner, repo, LinkKind(kind), number)
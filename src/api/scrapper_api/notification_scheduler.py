@@ -0,0 +1,126 @@
+from collections import defaultdict
+from datetime import datetime, time
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+from src.api.schemas.schemas import LinkUpdate, NotificationMode, PendingEvent
+from src.api.utils.string_makers import make_digest_description
+
+if TYPE_CHECKING:
+    from src.database.orm_database import OrmDbProcessor
+    from src.database.sql_database import SqlDbProcessor
+
+SCHEDULE_TIMEZONE = ZoneInfo("Europe/Moscow")
+MINUTES_PER_DAY = 24 * 60
+SCHEDULER_LEASE_NAME = "notification_scheduler"
+
+
+class StaleFencingTokenError(Exception):
+    """Запрос бывшего лидера: его fencing-токен старше последнего принятого"""
+
+
+def time_to_bucket(value: time) -> int:
+    """
+    Переводит время дайджеста в номер временной корзины (минута суток)
+    :param value:
+    :return:
+    """
+    return value.hour * 60 + value.minute
+
+
+def bucket_to_time(bucket: int) -> time:
+    """
+    Обратное преобразование номера корзины во время суток
+    :param bucket:
+    :return:
+    """
+    bucket %= MINUTES_PER_DAY
+    return time(hour=bucket // 60, minute=bucket % 60)
+
+
+def due_digest_buckets(last_bucket: int | None, bucket: int) -> list[int]:
+    """
+    Корзины дайджеста, наступившие с прошлого тика: (last_bucket, bucket] по кругу
+    суток, поэтому пропущенные минуты не откладывают дайджест на сутки.
+    Без прошлого тика или на повторном тике той же минуты - только текущая корзина
+    :param last_bucket: корзина прошлого тика
+    :param bucket: текущая корзина
+    :return:
+    """
+    if last_bucket is None or last_bucket == bucket:
+        return [bucket]
+    missed = (bucket - last_bucket) % MINUTES_PER_DAY
+    return [(last_bucket + step) % MINUTES_PER_DAY for step in range(1, missed + 1)]
+
+
+def current_bucket(moment: datetime | None = None) -> int:
+    """
+    Возвращает корзину, которой соответствует момент времени (по МСК)
+    :param moment:
+    :return:
+    """
+    if moment is None:
+        moment = datetime.now(SCHEDULE_TIMEZONE)
+    else:
+        moment = moment.astimezone(SCHEDULE_TIMEZONE)
+    return moment.hour * 60 + moment.minute
+
+
+async def collect_due_updates(
+    db_processor: "SqlDbProcessor | OrmDbProcessor",
+    fresh_updates: list[LinkUpdate],
+    moment: datetime | None = None,
+    fencing_token: int | None = None,
+) -> list[LinkUpdate]:
+    """
+    Откладывает свежие обновления в очередь ожидающих и забирает из неё
+    то, что пора отправить на этом тике: обновления пользователей
+    с мгновенным режимом и пользователей, чья корзина дайджеста наступила.
+    Токен проверяется в одной транзакции с выборкой очереди, поэтому бывший лидер
+    не заберет обновления, даже если новый лидер появился после первой проверки
+    :param db_processor:
+    :param fresh_updates:
+    :param moment:
+    :param fencing_token:
+    :return:
+    """
+    if fresh_updates:
+        await db_processor.save_pending_updates(fresh_updates)
+    due_events = await db_processor.pop_due_updates(
+        current_bucket(moment), fencing_token=fencing_token
+    )
+    return build_due_updates(due_events)
+
+
+def build_due_updates(events: list[PendingEvent]) -> list[LinkUpdate]:
+    """
+    Мгновенные события отдает как есть, а накопленные для дайджеста
+    сворачивает в одну сводку на пару (чат, ссылка) без обращения к внешним API
+    :param events:
+    :return:
+    """
+    updates = []
+    digest_groups: dict[tuple[int, int], list[PendingEvent]] = defaultdict(list)
+    for event in sorted(events, key=lambda event: event.id):
+        if event.notification_mode == NotificationMode.DIGEST:
+            digest_groups[(event.tg_chat_id, event.link_id)].append(event)
+        else:
+            updates.append(
+                LinkUpdate(
+                    id=event.link_id,
+                    url=event.url,
+                    description=event.description,
+                    tg_chat_id=event.tg_chat_id,
+                )
+            )
+
+    for (tg_chat_id, link_id), group in digest_groups.items():
+        updates.append(
+            LinkUpdate(
+                id=link_id,
+                url=group[0].url,
+                description=make_digest_description(group),
+                tg_chat_id=tg_chat_id,
+            )
+        )
+    return updates
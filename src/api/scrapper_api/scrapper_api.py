@@ -1,7 +1,28 @@
-from fastapi import APIRouter, Header, Body, Query
-from fastapi.responses import JSONResponse
+import os
+from datetime import datetime, timezone
+
+import orjson
+from fastapi import APIRouter, Header, Body, Query, Request
+from fastapi.responses import ORJSONResponse
 
 from src.initialization.database_init import db_processor
+from src.initialization.links_cache_init import links_cache
+from src.api.scrapper_api.link_state import (
+    DEFAULT_UPDATES_WINDOW,
+    USER_UPDATES_LIMIT,
+    refresh_stale_links,
+)
+from src.api.scrapper_api.notification_scheduler import (
+    SCHEDULER_LEASE_NAME,
+    StaleFencingTokenError,
+    collect_due_updates,
+    time_to_bucket,
+)
+from src.api.scrapper_api.link_target import canonicalize_url
+from src.api.scrapper_api import github_webhooks
+from src.api.scrapper_api.github_webhooks import ingest_github_event, verify_signature
+from src.api.utils.metrics import CHECK_CYCLE_SECONDS, CHECK_CYCLE_UPDATES, observe_seconds
+from src.api.utils.serialization import MsgPackResponse, accepts_msgpack
 from src.api.schemas.schemas import (
     ApiErrorResponse,
     LinkResponse,
@@ -9,10 +30,20 @@ from src.api.schemas.schemas import (
     RemoveLinkRequest,
     ListLinksResponse,
     ListLinksUpdate,
+    NotificationSettingsRequest,
+    TimezoneRequest,
 )
 
 scrapper_api_router = APIRouter()
 
+# inline - ссылки проверяет сам /updates, workers - их проверяют воркеры scrapper_worker
+# по своим шардам, а /updates только забирает накопленное
+UPDATES_CHECK_MODE = os.getenv("UPDATES_CHECK_MODE", "inline").lower()
+# Планировщик бота работает через аренду лидера и передает fencing-токен с каждым тиком;
+# false разрешает /updates без токена (один экземпляр планировщика без Redis)
+REQUIRE_FENCING_TOKEN = os.getenv("REQUIRE_FENCING_TOKEN", "true").lower() == "true"
+MAX_LINKS_PAGE_SIZE = 100
+
 
 @scrapper_api_router.post(
     "/tg-chat/{tg_chat_id}",
@@ -21,7 +52,7 @@ scrapper_api_router = APIRouter()
         400: {"model": ApiErrorResponse, "description": "Некорректные параметры запроса"},
     },
 )
-async def register_user(tg_chat_id: int) -> JSONResponse:
+async def register_user(tg_chat_id: int) -> ORJSONResponse:
     """
     Зарегистрировать чат
     :param tg_chat_id:
@@ -30,7 +61,7 @@ async def register_user(tg_chat_id: int) -> JSONResponse:
 
     try:
         await db_processor.add_user(tg_chat_id)
-        return JSONResponse(status_code=200, content={"message": "Чат зарегистрирован"})
+        return ORJSONResponse(status_code=200, content={"message": "Чат зарегистрирован"})
     except (KeyError, ValueError) as e:
         error_response = ApiErrorResponse(
             description="Некорректные параметры запроса",
@@ -39,7 +70,7 @@ async def register_user(tg_chat_id: int) -> JSONResponse:
             exception_message=str(e),
             stacktrace=[],
         )
-        return JSONResponse(status_code=400, content=error_response.dict())
+        return ORJSONResponse(status_code=400, content=error_response.model_dump())
 
 
 @scrapper_api_router.delete(
@@ -50,7 +81,7 @@ async def register_user(tg_chat_id: int) -> JSONResponse:
         404: {"model": ApiErrorResponse, "description": "Чат не существует"},
     },
 )
-async def delete_chat(tg_chat_id: int) -> JSONResponse:
+async def delete_chat(tg_chat_id: int) -> ORJSONResponse:
     """
     Удалить чат
     :param tg_chat_id:
@@ -65,9 +96,10 @@ async def delete_chat(tg_chat_id: int) -> JSONResponse:
                 exception_name="KeyError",
                 exception_message="KeyError",
                 stacktrace=[],
-            ).dict()
-            return JSONResponse(status_code=404, content=error_data)
-        return JSONResponse(status_code=200, content={"message": "Чат удален"})
+            ).model_dump()
+            return ORJSONResponse(status_code=404, content=error_data)
+        await links_cache.invalidate(tg_chat_id)
+        return ORJSONResponse(status_code=200, content={"message": "Чат удален"})
     except (KeyError, ValueError) as e:
         error_data = ApiErrorResponse(
             description="Некорректные параметры запроса",
@@ -75,8 +107,65 @@ async def delete_chat(tg_chat_id: int) -> JSONResponse:
             exception_name=type(e).__name__,
             exception_message=str(e),
             stacktrace=[],
-        ).dict()
-        return JSONResponse(status_code=400, content=error_data)
+        ).model_dump()
+        return ORJSONResponse(status_code=400, content=error_data)
+
+
+@scrapper_api_router.put(
+    "/tg-chat/{tg_chat_id}/notifications",
+    responses={
+        200: {"description": "Режим уведомлений сохранен"},
+        404: {"model": ApiErrorResponse, "description": "Чат не существует"},
+    },
+)
+async def set_notification_settings(
+    tg_chat_id: int, data: NotificationSettingsRequest = Body(...)
+) -> ORJSONResponse:
+    """
+    Сохранить режим уведомлений и время дайджеста чата
+    :param tg_chat_id:
+    :param data:
+    :return:
+    """
+    updated = await db_processor.set_notification_settings(
+        tg_chat_id, data.mode, time_to_bucket(data.digest_time)
+    )
+    if not updated:
+        error_data = ApiErrorResponse(
+            description="Чат не существует",
+            code="404",
+            exception_name="KeyError",
+            exception_message="KeyError",
+            stacktrace=[],
+        ).model_dump()
+        return ORJSONResponse(status_code=404, content=error_data)
+    return ORJSONResponse(status_code=200, content={"message": "Режим уведомлений сохранен"})
+
+
+@scrapper_api_router.put(
+    "/tg-chat/{tg_chat_id}/timezone",
+    responses={
+        200: {"description": "Часовой пояс сохранен"},
+        404: {"model": ApiErrorResponse, "description": "Чат не существует"},
+    },
+)
+async def set_timezone(tg_chat_id: int, data: TimezoneRequest = Body(...)) -> ORJSONResponse:
+    """
+    Сохранить часовой пояс, в котором чату выводятся даты событий
+    :param tg_chat_id:
+    :param data:
+    :return:
+    """
+    if not await db_processor.set_timezone(tg_chat_id, data.timezone):
+        error_data = ApiErrorResponse(
+            description="Чат не существует",
+            code="404",
+            exception_name="KeyError",
+            exception_message="KeyError",
+            stacktrace=[],
+        ).model_dump()
+        return ORJSONResponse(status_code=404, content=error_data)
+    return ORJSONResponse(status_code=200, content={"message": "Часовой пояс сохранен"})
 
 
 @scrapper_api_router.get(
@@ -87,15 +176,44 @@ async def delete_chat(tg_chat_id: int) -> JSONResponse:
         400: {"model": ApiErrorResponse, "description": "Некорректные параметры запроса"},
     },
 )
-async def get_links(tg_chat_id: int = Header(...)) -> ListLinksResponse | JSONResponse:
+async def get_links(
+    tg_chat_id: int = Header(...),
+    limit: int | None = Query(default=None, ge=1, le=MAX_LINKS_PAGE_SIZE),
+    after_id: int | None = Query(default=None),
+    before_id: int | None = Query(default=None),
+) -> ListLinksResponse | ORJSONResponse:
     """
-    Получить все отслеживаемые ссылки
+    Получить отслеживаемые ссылки. Без limit отдаются все ссылки,
+    с limit - страница после after_id (или перед before_id) и курсоры соседних страниц
     :param tg_chat_id:
+    :param limit:
+    :param after_id:
+    :param before_id:
     :return:
     """
     try:
-        links = await db_processor.get_user_links(tg_chat_id)
-        return ListLinksResponse(links=links, size=len(links))
+        if after_id is not None and before_id is not None:
+            raise ValueError("after_id и before_id нельзя передавать одновременно")
+        if limit is None:
+            links = await db_processor.get_user_links(tg_chat_id)
+            return ListLinksResponse(links=links, size=len(links))
+
+        # лишняя запись показывает, есть ли еще страница в направлении чтения
+        links = await db_processor.get_user_links(
+            tg_chat_id, limit=limit + 1, after_id=after_id, before_id=before_id
+        )
+        if before_id is not None:
+            has_prev, has_next = len(links) > limit, True
+            links = links[-limit:]
+        else:
+            has_prev, has_next = after_id is not None, len(links) > limit
+            links = links[:limit]
+        return ListLinksResponse(
+            links=links,
+            size=len(links),
+            next_after_id=links[-1].id if links and has_next else None,
+            prev_before_id=links[0].id if links and has_prev else None,
+        )
     except (KeyError, ValueError) as e:
         error_response = ApiErrorResponse(
             description="Некорректные параметры запроса",
@@ -103,8 +221,8 @@ async def get_links(tg_chat_id: int = Header(...)) -> ListLinksResponse | JSONRe
             exception_name=type(e).__name__,
             exception_message=str(e),
             stacktrace=[],
-        ).dict()
-        return JSONResponse(status_code=400, content=error_response)
+        ).model_dump()
+        return ORJSONResponse(status_code=400, content=error_response)
 
 
 @scrapper_api_router.post(
@@ -118,7 +236,7 @@ async def get_links(tg_chat_id: int = Header(...)) -> ListLinksResponse | JSONRe
 )
 async def add_link(
     tg_chat_id: int = Header(...), data: AddLinkRequest = Body(...)
-) -> LinkResponse | JSONResponse:
+) -> LinkResponse | ORJSONResponse:
     """
     Добавление новой ссылки
     :param tg_chat_id:
@@ -127,10 +245,13 @@ async def add_link(
     """
     try:
         new_link_id = await db_processor.add_link_for_user(tg_chat_id, data)
-        return LinkResponse(id=new_link_id, url=data.url, tags=data.tags, filters=data.filters)
+        await links_cache.invalidate(tg_chat_id)
+        return LinkResponse(
+            id=new_link_id, url=canonicalize_url(data.url), tags=data.tags, filters=data.filters
+        )
 
     except ValueError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=409,
             content={
                 "description": "Ссылка уже добавлена пользователем",
@@ -153,7 +274,7 @@ async def add_link(
 )
 async def delete_link(
     tg_chat_id: int = Header(...), data: RemoveLinkRequest = Query(...)
-) -> LinkResponse | JSONResponse:
+) -> LinkResponse | ORJSONResponse:
     """
     Убрать отслеживание ссылки
     :param tg_chat_id:
@@ -164,7 +285,7 @@ async def delete_link(
         result = await db_processor.remove_user_link(tg_chat_id, data.url)
 
         if result is None:
-            return JSONResponse(
+            return ORJSONResponse(
                 status_code=404,
                 content={
                     "description": "Ссылка не найдена",
@@ -176,10 +297,13 @@ async def delete_link(
             )
 
         link_id, link_tags, link_filters = result
-        return LinkResponse(id=link_id, url=data.url, tags=link_tags, filters=link_filters)
+        await links_cache.invalidate(tg_chat_id)
+        return LinkResponse(
+            id=link_id, url=canonicalize_url(data.url), tags=link_tags, filters=link_filters
+        )
 
     except (KeyError, ValueError) as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400,
             content={
                 "description": "Некорректные параметры запроса",
@@ -191,6 +315,19 @@ async def delete_link(
         )
 
 
+def stale_fencing_token_response(fencing_token: int | None) -> ORJSONResponse:
+    return ORJSONResponse(
+        status_code=409,
+        content={
+            "description": "Устаревший fencing-токен",
+            "code": "409",
+            "exception_name": "StaleFencingToken",
+            "exception_message": f"Токен {fencing_token} устарел",
+            "stacktrace": [],
+        },
+    )
+
+
 @scrapper_api_router.get(
     "/updates",
     response_model=None,
@@ -198,19 +335,56 @@ async def delete_link(
         200: {"description": "Обновления успешно проверены"},
         400: {"model": ApiErrorResponse, "description": "Некорректные параметры запроса"},
         404: {"model": ApiErrorResponse, "description": "Ссылка не найдена"},
+        409: {"model": ApiErrorResponse, "description": "Устаревший fencing-токен"},
     },
 )
-async def check_updates() -> ListLinksUpdate | JSONResponse:
+async def check_updates(
+    request: Request,
+    x_fencing_token: int | None = Header(default=None),
+) -> ListLinksUpdate | MsgPackResponse | ORJSONResponse:
     """
-    Проверить обновления
+    Проверить обновления и вернуть те, что пора отправить на этом тике.
+    Запрос бывшего лидера с устаревшим fencing-токеном отклоняется: до проверки ссылок
+    и еще раз в одной транзакции с выборкой очереди.
+    Клиенту с Accept: application/x-msgpack ответ отдается в msgpack
+    :param request:
+    :param x_fencing_token:
     :return:
     """
+    if x_fencing_token is None and REQUIRE_FENCING_TOKEN:
+        return ORJSONResponse(
+            status_code=400,
+            content={
+                "description": "Некорректные параметры запроса",
+                "code": "400",
+                "exception_name": "MissingFencingToken",
+                "exception_message": "Нужен заголовок X-Fencing-Token",
+                "stacktrace": [],
+            },
+        )
+    if x_fencing_token is not None and not await db_processor.accept_fencing_token(
+        SCHEDULER_LEASE_NAME, x_fencing_token
+    ):
+        return stale_fencing_token_response(x_fencing_token)
+
     try:
-        updates = await db_processor.check_updates_for_all_users()
+        fresh_updates = []
+        if UPDATES_CHECK_MODE == "inline":
+            with observe_seconds(CHECK_CYCLE_SECONDS):
+                fresh_updates = await db_processor.check_updates_for_all_users()
+            CHECK_CYCLE_UPDATES.inc(len(fresh_updates))
+        updates = await collect_due_updates(
+            db_processor, fresh_updates, fencing_token=x_fencing_token
+        )
+        if accepts_msgpack(request):
+            return MsgPackResponse(content=ListLinksUpdate(links=updates).model_dump())
         return ListLinksUpdate(links=updates)
 
+    except StaleFencingTokenError:
+        return stale_fencing_token_response(x_fencing_token)
+
     except KeyError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=404,
             content={
                 "description": "Ссылка не найдена",
@@ -222,7 +396,7 @@ async def check_updates() -> ListLinksUpdate | JSONResponse:
         )
 
     except ValueError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400,
             content={
                 "description": "Некорректные параметры запроса",
@@ -235,28 +409,42 @@ async def check_updates() -> ListLinksUpdate | JSONResponse:
 
 
 @scrapper_api_router.get(
-    "/updates_by_tags",
+    "/users/{tg_chat_id}/updates",
     response_model=None,
     responses={
-        200: {"description": "Обновления успешно проверены"},
+        200: {"description": "Обновления пользователя получены"},
         400: {"model": ApiErrorResponse, "description": "Некорректные параметры запроса"},
     },
 )
-async def check_updates_by_tags(
-    tg_chat_id: int = Query(...), tags: list[str] = Query(...)
-) -> ListLinksUpdate | JSONResponse:
+async def get_user_updates(
+    tg_chat_id: int,
+    since: datetime | None = Query(default=None),
+    tags: list[str] | None = Query(default=None),
+    refresh: bool = Query(default=False),
+) -> ListLinksUpdate | ORJSONResponse:
     """
-    Проверить обновления по тегам
+    Обновления пользователя из сохраненного состояния ссылок.
+    refresh=true перед ответом перепроверяет только давно не проверявшиеся ссылки
     :param tg_chat_id:
-    :param tags:
+    :param since: по умолчанию - за последние сутки
+    :param tags: только ссылки хотя бы с одним из тегов
+    :param refresh:
     :return:
     """
+    if since is None:
+        since = datetime.now(timezone.utc) - DEFAULT_UPDATES_WINDOW
+    elif since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
     try:
-        updates = await db_processor.get_updates_for_one_user_by_tags(tg_chat_id, tags)
+        if refresh:
+            await refresh_stale_links(db_processor, tg_chat_id, tags)
+        updates = await db_processor.get_user_updates(
+            tg_chat_id, since, tags, limit=USER_UPDATES_LIMIT
+        )
         return ListLinksUpdate(links=updates)
 
     except ValueError as e:
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=400,
             content={
                 "description": "Некорректные параметры запроса",
@@ -266,3 +454,70 @@ async def check_updates_by_tags(
                 "stacktrace": [],
             },
         )
+
+
+@scrapper_api_router.post(
+    "/webhooks/github",
+    response_model=None,
+    responses={
+        200: {"description": "Событие принято"},
+        400: {"model": ApiErrorResponse, "description": "Некорректное тело события"},
+        401: {"model": ApiErrorResponse, "description": "Неверная подпись"},
+        404: {"model": ApiErrorResponse, "description": "Webhook не настроен"},
+    },
+)
+async def github_webhook(
+    request: Request,
+    x_github_event: str = Header(default=""),
+    x_hub_signature_256: str | None = Header(default=None),
+) -> ORJSONResponse:
+    """
+    Принять событие webhook GitHub. Подпись X-Hub-Signature-256 проверяется
+    по сырому телу, события issues, PR и комментариев сразу попадают в обновления
+    :param request:
+    :param x_github_event:
+    :param x_hub_signature_256:
+    :return:
+    """
+    if not github_webhooks.GITHUB_WEBHOOK_SECRET:
+        return ORJSONResponse(
+            status_code=404,
+            content={
+                "description": "Webhook не настроен",
+                "code": "404",
+                "exception_name": "KeyError",
+                "exception_message": "GITHUB_WEBHOOK_SECRET не задан",
+                "stacktrace": [],
+            },
+        )
+
+    body = await request.body()
+    if not verify_signature(github_webhooks.GITHUB_WEBHOOK_SECRET, body, x_hub_signature_256):
+        return ORJSONResponse(
+            status_code=401,
+            content={
+                "description": "Неверная подпись",
+                "code": "401",
+                "exception_name": "InvalidSignature",
+                "exception_message": "Подпись X-Hub-Signature-256 не совпала",
+                "stacktrace": [],
+            },
+        )
+
+    try:
+        payload = orjson.loads(body)
+        if not isinstance(payload, dict):
+            raise ValueError("Тело события должно быть JSON-объектом")
+        updates = await ingest_github_event(db_processor, x_github_event, payload)
+    except (KeyError, TypeError, ValueError) as e:
+        return ORJSONResponse(
+            status_code=400,
+            content={
+                "description": "Некорректное тело события",
+                "code": "400",
+                "exception_name": type(e).__name__,
+                "exception_message": str(e),
+                "stacktrace": [],
+            },
+        )
+    return ORJSONResponse(status_code=200, content={"event": x_github_event, "updates": updates})
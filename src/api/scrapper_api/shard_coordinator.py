@@ -0,0 +1,83 @@
+import asyncio
+import time
+import uuid
+from typing import NamedTuple
+
+import redis.asyncio as redis
+
+from src.logger.logger_init import logger
+
+
+class ShardAssignment(NamedTuple):
+    index: int
+    count: int
+
+
+class ShardCoordinator:
+    """
+    Членство воркеров scrapper в Redis. Каждый воркер периодически продлевает
+    свою запись в sorted set (score = момент истечения), а свой шард вычисляет
+    как позицию в отсортированном списке живых воркеров: воркер с позицией i
+    проверяет ссылки, у которых links.id % count == i.
+    При входе или выходе воркера шарды перераспределяются на следующем heartbeat
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        group: str = "scrapper",
+        ttl_ms: int = 30000,
+        worker_id: str | None = None,
+    ):
+        self.redis_client = redis_client
+        self.members_key = f"shards:{group}:workers"
+        self.ttl_ms = ttl_ms
+        self.worker_id = worker_id or uuid.uuid4().hex
+        self.assignment = ShardAssignment(index=0, count=1)
+
+    async def heartbeat(self) -> ShardAssignment:
+        """
+        Продлевает членство, вычищает истекших воркеров и пересчитывает свой шард
+        :return:
+        """
+        now_ms = int(time.time() * 1000)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.members_key, {self.worker_id: now_ms + self.ttl_ms})
+            pipe.zremrangebyscore(self.members_key, "-inf", now_ms)
+            pipe.zrange(self.members_key, 0, -1)
+            _, _, members = await pipe.execute()
+
+        members = sorted(
+            member.decode() if isinstance(member, bytes) else member for member in members
+        )
+        assignment = ShardAssignment(index=members.index(self.worker_id), count=len(members))
+        if assignment != self.assignment:
+            logger.info(
+                "Воркер %s получил шард %s из %s",
+                self.worker_id,
+                assignment.index,
+                assignment.count,
+            )
+        self.assignment = assignment
+        return assignment
+
+    async def keep_alive(self) -> None:
+        """
+        Фоновое продление членства, чтобы долгий цикл проверки
+        не приводил к исключению воркера из группы
+        :return:
+        """
+        interval = self.ttl_ms / 3 / 1000
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.heartbeat()
+            except redis.RedisError as e:
+                logger.warning("Не удалось продлить членство воркера %s: %s", self.worker_id, e)
+
+    async def leave(self) -> None:
+        """
+        Выходит из группы, чтобы оставшиеся воркеры сразу забрали его ссылки
+        :return:
+        """
+        await self.redis_client.zrem(self.members_key, self.worker_id)
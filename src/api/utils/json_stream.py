@@ -0,0 +1,92 @@
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator
+
+_WHITESPACE = re.compile(r"\s*")
+_NUMBER_START = frozenset("-0123456789")
+_NUMBER = re.compile(r"[-+.eE0-9]*")
+
+
+class JsonArrayReader:
+    """
+    Делит JSON-массив верхнего уровня на элементы по мере поступления байтов.
+    Каждый элемент разбирается JSONDecoder.raw_decode, как только пришел его конец,
+    поэтому память - один элемент и недочитанный хвост, а байты после нужных
+    элементов можно не читать
+    """
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        # после "[" или "," ждется элемент, после элемента - "," или "]"
+        self._expect_value = True
+        self._first = True
+        self.done = False
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """
+        Добавляет очередную часть тела ответа
+        :param chunk:
+        :return: элементы массива, закончившиеся в этой части
+        """
+        self._buffer += self._decoder.decode(chunk)
+        items = []
+        while not self.done:
+            pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if pos == len(self._buffer):
+                break
+            char = self._buffer[pos]
+            if not self._started:
+                if char != "[":
+                    raise json.JSONDecodeError("Expected JSON array", self._buffer, pos)
+                self._started, self._pos = True, pos + 1
+            elif self._expect_value and not (self._first and char == "]"):
+                # число могло оборваться на границе части: "12" из "12.5"
+                number_end = _NUMBER.match(self._buffer, pos).end()
+                if char in _NUMBER_START and number_end == len(self._buffer):
+                    break
+                try:
+                    item, end = self._json.raw_decode(self._buffer, pos)
+                except json.JSONDecodeError:
+                    # элемент еще не пришел целиком и будет разобран заново со следующей
+                    # частью; настоящую ошибку в нем покажет close
+                    break
+                items.append(item)
+                self._pos, self._expect_value, self._first = end, False, False
+            elif char in ",]":
+                self._pos, self._expect_value = pos + 1, char == ","
+                self.done = char == "]"
+            else:
+                raise json.JSONDecodeError("Expected ',' or ']'", self._buffer, pos)
+        # разобранные элементы больше не нужны
+        self._buffer = self._buffer[self._pos :]
+        self._pos = 0
+        return items
+
+    def close(self) -> None:
+        """
+        Проверяет, что поток закончился вместе с массивом
+        :return:
+        """
+        if not self.done:
+            raise json.JSONDecodeError("Unterminated JSON array", self._buffer, len(self._buffer))
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """
+    Элементы JSON-массива из потока байтов, например response.aiter_bytes().
+    Если перестать итерировать, оставшаяся часть потока не читается
+    :param chunks:
+    :return:
+    """
+    reader = JsonArrayReader()
+    async for chunk in chunks:
+        for item in reader.feed(chunk):
+            yield item
+        if reader.done:
+            return
+    reader.close()
@@ -0,0 +1,233 @@
+import asyncio
+import random
+import time
+import uuid
+from contextlib import suppress
+from typing import Awaitable, Callable
+
+import redis.asyncio as redis
+
+from src.api.schemas.schemas import ListLinksResponse
+from src.api.utils.metrics import LINKS_CACHE_REQUESTS
+from src.logger.logger_init import logger
+
+LOCK_POLL_INTERVAL = 0.05
+VERSION_FIELD = "version"
+PAGE_PREFIX = "page:"
+ALL_LINKS_PAGE = "all"
+
+# Страница записывается, только если версия, при которой её прочитали, всё ещё
+# текущая. Страницы прошлой версии удаляются вместе с хэшем
+WRITE_PAGE_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[2]) or '0') ~= tonumber(ARGV[1]) then
+    return 0
+end
+if redis.call('HGET', KEYS[1], 'version') ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    redis.call('HSET', KEYS[1], 'version', ARGV[1])
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# Снимает блокировку заполнения, только если она всё ещё наша
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class LinksCache:
+    """
+    Кэш списков ссылок пользователей для /list.
+    Страницы списка хранятся в хэше links:{user_id} (поле на страницу) вместе
+    с версией, при которой они были прочитаны из scrapper. Scrapper после каждого изменения
+    увеличивает счетчик links:{user_id}:version, поэтому список, собранный
+    до изменения, ни одна реплика бота уже не отдаст
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        ttl_seconds: int = 600,
+        jitter_seconds: int = 60,
+        lock_ttl_ms: int = 5000,
+        lock_wait_seconds: float = 2.0,
+    ):
+        self.redis_client = redis_client
+        self.ttl_seconds = ttl_seconds
+        self.jitter_seconds = jitter_seconds
+        self.lock_ttl_ms = lock_ttl_ms
+        self.lock_wait_seconds = lock_wait_seconds
+        self._inflight: dict[tuple[int, str], asyncio.Future] = {}
+        self._release_lock = self.redis_client.register_script(RELEASE_LOCK_SCRIPT)
+        self._write_page = self.redis_client.register_script(WRITE_PAGE_SCRIPT)
+
+    @staticmethod
+    def _data_key(user_id: int) -> str:
+        return f"links:{user_id}"
+
+    @staticmethod
+    def _version_key(user_id: int) -> str:
+        return f"links:{user_id}:version"
+
+    @staticmethod
+    def _lock_key(user_id: int, page: str) -> str:
+        return f"links:{user_id}:lock:{page}"
+
+    @staticmethod
+    def page_key(
+        limit: int | None = None, after_id: int | None = None, before_id: int | None = None
+    ) -> str:
+        """
+        Ключ страницы списка по параметрам запроса к scrapper
+        :param limit:
+        :param after_id:
+        :param before_id:
+        :return:
+        """
+        if limit is None:
+            return ALL_LINKS_PAGE
+        return f"{limit}:{after_id or ''}:{before_id or ''}"
+
+    async def get(self, user_id: int, page: str = ALL_LINKS_PAGE) -> ListLinksResponse | None:
+        """
+        Возвращает страницу из кэша, если она собрана при актуальной версии
+        :param user_id:
+        :param page:
+        :return:
+        """
+        links, _ = await self._read(user_id, page)
+        return links
+
+    async def get_or_load(
+        self,
+        user_id: int,
+        loader: Callable[[], Awaitable[ListLinksResponse | None]],
+        page: str = ALL_LINKS_PAGE,
+    ) -> ListLinksResponse | None:
+        """
+        Отдает страницу из кэша, а при промахе загружает её один раз:
+        параллельные запросы внутри процесса ждут одну загрузку,
+        а реплики договариваются через блокировку в Redis
+        :param user_id:
+        :param loader: загрузка страницы из scrapper, None при ошибке
+        :param page: ключ страницы, см. page_key
+        :return:
+        """
+        inflight_key = (user_id, page)
+        future = self._inflight.get(inflight_key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(user_id, page, loader))
+            self._inflight[inflight_key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+        return await asyncio.shield(future)
+
+    async def invalidate(self, user_id: int) -> None:
+        """
+        Публикует изменение списка ссылок пользователя: новая версия
+        делает недействительными и текущий кэш, и заполнения, начатые до неё
+        :param user_id:
+        :return:
+        """
+        try:
+            async with self.redis_client.pipeline(transaction=True) as pipe:
+                pipe.incr(self._version_key(user_id))
+                pipe.delete(self._data_key(user_id))
+                await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Не удалось инвалидировать кэш ссылок чата %s: %s", user_id, e)
+
+    async def _load(
+        self,
+        user_id: int,
+        page: str,
+        loader: Callable[[], Awaitable[ListLinksResponse | None]],
+    ) -> ListLinksResponse | None:
+        lock_token = uuid.uuid4().hex
+        try:
+            links, version = await self._read(user_id, page)
+            if links is not None:
+                logger.debug("Данные для /list найдены в кэше.")
+                LINKS_CACHE_REQUESTS.labels("hit").inc()
+                return links
+
+            locked = await self.redis_client.set(
+                self._lock_key(user_id, page), lock_token, nx=True, px=self.lock_ttl_ms
+            )
+            if not locked:
+                links, version = await self._wait_for_fill(user_id, page, version)
+                if links is not None:
+                    LINKS_CACHE_REQUESTS.labels("hit").inc()
+                    return links
+        except redis.RedisError as e:
+            logger.warning("Кэш ссылок недоступен, читаем из scrapper: %s", e)
+            LINKS_CACHE_REQUESTS.labels("error").inc()
+            return await loader()
+
+        LINKS_CACHE_REQUESTS.labels("miss").inc()
+        try:
+            links = await loader()
+            if links is not None:
+                await self._write(user_id, page, version, links)
+            return links
+        finally:
+            if locked:
+                with suppress(redis.RedisError):
+                    await self._release_lock(
+                        keys=[self._lock_key(user_id, page)], args=[lock_token]
+                    )
+
+    async def _wait_for_fill(
+        self, user_id: int, page: str, version: int
+    ) -> tuple[ListLinksResponse | None, int]:
+        """
+        Ждет, пока другая реплика заполнит кэш. Если не дождались,
+        вызывающий загружает страницу сам
+        :param user_id:
+        :param page:
+        :param version:
+        :return:
+        """
+        deadline = time.monotonic() + self.lock_wait_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            links, version = await self._read(user_id, page)
+            if links is not None:
+                return links, version
+        return None, version
+
+    async def _read(self, user_id: int, page: str) -> tuple[ListLinksResponse | None, int]:
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            pipe.get(self._version_key(user_id))
+            pipe.hmget(self._data_key(user_id), [VERSION_FIELD, f"{PAGE_PREFIX}{page}"])
+            raw_version, (cached_version, cached_page) = await pipe.execute()
+
+        version = int(raw_version or 0)
+        if cached_page is None or int(cached_version or -1) != version:
+            return None, version
+        return ListLinksResponse.model_validate_json(cached_page), version
+
+    async def _write(
+        self, user_id: int, page: str, version: int, links: ListLinksResponse
+    ) -> None:
+        """
+        Сохраняет страницу с версией, при которой она была прочитана.
+        TTL со случайной добавкой разносит истечение ключей во времени
+        :param user_id:
+        :param page:
+        :param version:
+        :param links:
+        :return:
+        """
+        ttl = self.ttl_seconds + random.randint(0, self.jitter_seconds)
+        try:
+            await self._write_page(
+                keys=[self._data_key(user_id), self._version_key(user_id)],
+                args=[version, f"{PAGE_PREFIX}{page}", links.model_dump_json(), ttl],
+            )
+        except redis.RedisError as e:
+            logger.warning("Не удалось сохранить кэш ссылок чата %s: %s", user_id, e)
@@ -0,0 +1,172 @@
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from fastapi import APIRouter
+from starlette.responses import Response
+
+try:
+    import prometheus_client
+except ImportError:  # prometheus_client - необязательная зависимость, без неё метрики не собираются
+    prometheus_client = None
+
+METRICS_PREFIX = "linktracker"
+# границы корзин гистограмм времени, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CYCLE_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class _NoopMetric:
+    """Метрика без prometheus_client: принимает те же вызовы и ничего не делает"""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        pass
+
+    def observe(self, amount: float) -> None:
+        pass
+
+
+def _metric(kind: str, name: str, documentation: str, labels: tuple[str, ...] = (), **kwargs):
+    if prometheus_client is None:
+        return _NoopMetric()
+    metric_class = getattr(prometheus_client, kind)
+    return metric_class(f"{METRICS_PREFIX}_{name}", documentation, labels, **kwargs)
+
+
+# Провайдеры обновлений (src/api/providers)
+PROVIDER_REQUESTS = _metric(
+    "Counter", "provider_requests_total", "Запросы к API провайдеров", ("provider", "status")
+)
+PROVIDER_REQUEST_SECONDS = _metric(
+    "Histogram",
+    "provider_request_seconds",
+    "Время запроса к API провайдера",
+    ("provider",),
+    buckets=LATENCY_BUCKETS,
+)
+PROVIDER_RESPONSE_BYTES = _metric(
+    "Counter",
+    "provider_response_bytes_total",
+    "Байты ответов API провайдеров, полученные по сети",
+    ("provider",),
+)
+PROVIDER_CIRCUIT_STATE = _metric(
+    "Gauge",
+    "provider_circuit_state",
+    "Состояние цепи хоста API: 0 - замкнута, 1 - пробный запрос, 2 - разомкнута",
+    ("provider", "host"),
+)
+PROVIDER_RATE_LIMIT_REMAINING = _metric(
+    "Gauge",
+    "provider_rate_limit_remaining",
+    "Остаток лимита запросов по последнему ответу провайдера",
+    ("provider",),
+)
+
+# Цикл проверки ссылок
+LINKS_CHECKED = _metric("Counter", "links_checked_total", "Проверенные ссылки", ("provider",))
+EVENTS_FOUND = _metric(
+    "Counter", "events_found_total", "Найденные события ссылок", ("provider",)
+)
+CHECK_CYCLE_UPDATES = _metric(
+    "Counter", "check_cycle_updates_total", "Обновления подписчиков, найденные циклом проверки"
+)
+CHECK_CYCLE_SECONDS = _metric(
+    "Histogram", "check_cycle_seconds", "Длительность цикла проверки", buckets=CYCLE_BUCKETS
+)
+
+# Пул соединений с БД
+DB_POOL_CONNECTIONS = _metric(
+    "Gauge", "db_pool_connections", "Соединения пула БД по состоянию", ("state",)
+)
+
+# Kafka
+KAFKA_PRODUCE_SECONDS = _metric(
+    "Histogram",
+    "kafka_produce_seconds",
+    "Время записи сообщения в Kafka до подтверждения",
+    ("topic",),
+    buckets=LATENCY_BUCKETS,
+)
+KAFKA_CONSUMER_LAG = _metric(
+    "Gauge",
+    "kafka_consumer_lag_messages",
+    "Сообщения партиции, которые consumer еще не прочитал",
+    ("topic", "partition"),
+)
+KAFKA_CONSUME_DELAY_SECONDS = _metric(
+    "Histogram",
+    "kafka_consume_delay_seconds",
+    "Время от записи сообщения в Kafka до его чтения consumer",
+    ("topic",),
+    buckets=CYCLE_BUCKETS,
+)
+
+# Telegram
+TELEGRAM_SEND_SECONDS = _metric(
+    "Histogram",
+    "telegram_send_seconds",
+    "Время отправки сообщения в Telegram",
+    buckets=LATENCY_BUCKETS,
+)
+TELEGRAM_FLOOD_WAITS = _metric(
+    "Counter", "telegram_flood_waits_total", "Ответы FloodWait от Telegram"
+)
+
+# Кэш /list; доля попаданий - hit / (hit + miss)
+LINKS_CACHE_REQUESTS = _metric(
+    "Counter", "links_cache_requests_total", "Чтения кэша списков ссылок", ("result",)
+)
+
+
+@contextmanager
+def observe_seconds(histogram, *labels: str) -> Iterator[None]:
+    """
+    Записывает в гистограмму время выполнения блока, в том числе завершившегося ошибкой
+    :param histogram:
+    :param labels: значения меток гистограммы
+    :return:
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(*labels) if labels else histogram
+        metric.observe(time.perf_counter() - started)
+
+
+def track_pool_usage(pool_usage: Callable[[], dict[str, int]]) -> None:
+    """
+    Привязывает метрику пула к процессору БД: значения читаются в момент сбора метрик
+    :param pool_usage: метод pool_usage процессора БД
+    :return:
+    """
+    for state in ("size", "in_use", "idle"):
+        DB_POOL_CONNECTIONS.labels(state).set_function(
+            lambda state=state: pool_usage().get(state, 0)
+        )
+
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Метрики процесса в текстовом формате Prometheus
+    :return:
+    """
+    if prometheus_client is None:
+        return Response("prometheus_client не установлен", status_code=404)
+    return Response(
+        prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,131 @@
+import base64
+import os
+
+import orjson
+from dotenv import load_dotenv
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    import msgpack
+except ImportError:  # msgpack - необязательная зависимость, без неё остается только JSON
+    msgpack = None
+
+from src.api.schemas.schemas import UPDATES_SCHEMA_VERSION, ListLinksUpdate
+
+load_dotenv()
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+CONTENT_TYPE_HEADER = "content-type"
+
+# Формат, в котором бот запрашивает и пересылает обновления: json или msgpack
+UPDATES_MESSAGE_FORMAT = os.getenv("UPDATES_MESSAGE_FORMAT", "json").lower()
+
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: object) -> bytes:
+        return dump_message(content, MSGPACK_MEDIA_TYPE)
+
+
+def message_media_type(message_format: str = UPDATES_MESSAGE_FORMAT) -> str:
+    """
+    Тип содержимого для настроенного формата сообщений.
+    Без установленного msgpack всегда используется JSON
+    :param message_format:
+    :return:
+    """
+    if message_format == "msgpack" and msgpack is not None:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def accepts_msgpack(request: Request) -> bool:
+    """
+    Клиент явно перечислил msgpack в заголовке Accept
+    :param request:
+    :return:
+    """
+    return msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def dump_message(payload: object, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+    """
+    Сериализует словарь сообщения в байты выбранного формата
+    :param payload:
+    :param media_type:
+    :return:
+    """
+    if media_type == MSGPACK_MEDIA_TYPE:
+        if msgpack is None:
+            raise RuntimeError("Формат msgpack недоступен: пакет msgpack не установлен")
+        return msgpack.packb(payload, use_bin_type=True)
+    return orjson.dumps(payload)
+
+
+def load_message(body: bytes, media_type: str | None = None) -> dict:
+    """
+    Разбирает сообщение по его типу содержимого, без типа считается JSON
+    :param body:
+    :param media_type:
+    :return:
+    """
+    if media_type is not None and media_type.split(";")[0].strip() == MSGPACK_MEDIA_TYPE:
+        if msgpack is None:
+            raise ValueError("Получено сообщение msgpack, но пакет msgpack не установлен")
+        return msgpack.unpackb(body, raw=False)
+    return orjson.loads(body)
+
+
+def parse_links_update(payload: dict) -> ListLinksUpdate:
+    """
+    Проверяет версию схемы обновлений. Сообщения без версии считаются первой версией,
+    сообщения более новой схемы отклоняются, чтобы старый бот не терял поля
+    :param payload:
+    :return:
+    """
+    version = payload.get("schema_version", 1)
+    if not isinstance(version, int) or version > UPDATES_SCHEMA_VERSION:
+        raise ValueError(f"Неподдерживаемая версия схемы обновлений: {version}")
+    return ListLinksUpdate.model_validate(payload)
+
+
+def kafka_headers(media_type: str) -> list[tuple[str, bytes]]:
+    """
+    Заголовки сообщения Kafka с типом содержимого значения
+    :param media_type:
+    :return:
+    """
+    return [(CONTENT_TYPE_HEADER, media_type.encode())]
+
+
+def dead_letter_payload(error: Exception, value: bytes, media_type: str | None) -> dict:
+    """
+    Сообщение для dead-letter topic. JSON сохраняется текстом, значение другого
+    формата (msgpack) - байтами в base64, чтобы сообщение можно было отправить повторно
+    :param error:
+    :param value: исходное значение сообщения Kafka
+    :param media_type: тип содержимого из заголовков, None - JSON
+    :return:
+    """
+    payload = {"error": str(error), "content_type": media_type or JSON_MEDIA_TYPE}
+    if media_type is None or media_type.split(";")[0].strip() == JSON_MEDIA_TYPE:
+        payload["original_message"] = value.decode("utf-8", errors="replace")
+    else:
+        payload["original_message"] = base64.b64encode(value).decode("ascii")
+        payload["original_encoding"] = "base64"
+    return payload
+
+
+def kafka_media_type(headers: list[tuple[str, bytes]] | None) -> str | None:
+    """
+    Тип содержимого значения сообщения Kafka из его заголовков
+    :param headers:
+    :return:
+    """
+    for key, value in headers or ():
+        if key.lower() == CONTENT_TYPE_HEADER:
+            return value.decode()
+    return None
@@ -1,13 +1,33 @@
-from src.api.schemas.schemas import UpdateInfo
+from collections import Counter
+from datetime import datetime
+from zoneinfo import ZoneInfo
 
+from src.api.schemas.schemas import DEFAULT_TIMEZONE, PendingEvent, UpdateInfo
 
-async def make_description(update_info: UpdateInfo) -> str:
+DIGEST_TOP_AUTHORS = 3
+DIGEST_LATEST_PREVIEWS = 3
+DIGEST_PREVIEW_LENGTH = 80
+DATE_FORMAT = "%Y-%m-%d %H:%M"
+
+
+def format_event_time(moment: datetime, timezone: str = DEFAULT_TIMEZONE) -> str:
+    """
+    Момент события для вывода пользователю в его часовом поясе
+    :param moment: момент с часовым поясом
+    :param timezone: имя пояса IANA, ZoneInfo кэширует загруженные пояса
+    :return:
+    """
+    return moment.astimezone(ZoneInfo(timezone)).strftime(DATE_FORMAT)
+
+
+async def make_description(update_info: UpdateInfo, timezone: str = DEFAULT_TIMEZONE) -> str:
     """
     Создать описание обновления
     :param update_info:
+    :param timezone: часовой пояс получателя
     :return:
     """
-    date_str = update_info.creation_date
+    date_str = format_event_time(update_info.created_at, timezone)
     preview = update_info.preview
     return (
         f"Тема: {update_info.title}\n"
@@ -15,3 +35,36 @@ async def make_description(update_info: UpdateInfo) -> str:
         f"Дата: {date_str}\n"
         f"Содержание: {preview}"
     )
+
+
+def make_digest_description(events: list[PendingEvent]) -> str:
+    """
+    Собирает компактную сводку накопленных за сутки событий одной ссылки:
+    количество, самые активные авторы и превью последних событий.
+    Даты выводятся в часовом поясе получателя
+    :param events:
+    :return:
+    """
+    authors = Counter(event.user_name for event in events if event.user_name)
+    top_authors = ", ".join(
+        f"{name} ({count})" for name, count in authors.most_common(DIGEST_TOP_AUTHORS)
+    )
+
+    lines = [f"Событий за период: {len(events)}"]
+    if top_authors:
+        lines.append(f"Авторы: {top_authors}")
+    lines.append("Последние:")
+
+    latest = sorted(
+        events,
+        key=lambda event: (event.event_at.timestamp() if event.event_at else 0, event.id),
+        reverse=True,
+    )
+    for event in latest[:DIGEST_LATEST_PREVIEWS]:
+        date_str = format_event_time(event.event_at, event.timezone) if event.event_at else ""
+        preview = event.preview or event.description
+        if len(preview) > DIGEST_PREVIEW_LENGTH:
+            preview = preview[:DIGEST_PREVIEW_LENGTH] + "..."
+        title = f"{event.title}: " if event.title else ""
+        lines.append(f"• {date_str} {event.user_name} — {title}{preview}".strip())
+    return "\n".join(lines)
@@ -0,0 +1,214 @@
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from dotenv import load_dotenv
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+from starlette.requests import Request
+from starlette.responses import Response
+
+try:
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import (
+        BatchSpanProcessor,
+        ConsoleSpanExporter,
+        SimpleSpanProcessor,
+        SpanExporter,
+    )
+    from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+except ImportError:  # без SDK спаны не записываются, но входящий контекст передается дальше
+    TracerProvider = None
+
+from src.logger.logger_init import logger
+
+load_dotenv()
+
+# none - трассировка выключена, console - спаны в stdout, otlp - в коллектор
+# по OTEL_EXPORTER_OTLP_ENDPOINT (по умолчанию http://localhost:4318)
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+# доля трасс, которые начинаются в этом сервисе; продолжение чужой трассы следует решению родителя
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+DB_STATEMENT_MAX_LENGTH = 500
+
+tracer = trace.get_tracer("linktracker")
+
+
+def configure_tracing(
+    service_name: str,
+    exporter: str = TRACING_EXPORTER,
+    span_exporter: "SpanExporter | None" = None,
+) -> bool:
+    """
+    Настраивает запись спанов процесса. Вызывается один раз при старте сервиса
+    :param service_name: service.name в трассах
+    :param exporter: none, console или otlp
+    :param span_exporter: готовый экспортер вместо exporter, например для тестов
+    :return: включена ли запись спанов
+    """
+    if span_exporter is None and exporter == "none":
+        return False
+    if TracerProvider is None:
+        logger.warning("Трассировка выключена: не установлен пакет opentelemetry-sdk")
+        return False
+
+    processor_class = BatchSpanProcessor
+    if span_exporter is None and exporter == "console":
+        span_exporter, processor_class = ConsoleSpanExporter(), SimpleSpanProcessor
+    elif span_exporter is None and exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("Трассировка выключена: не установлен opentelemetry-exporter-otlp")
+            return False
+        span_exporter = OTLPSpanExporter()
+    elif span_exporter is None:
+        raise ValueError(f"Unknown TRACING_EXPORTER: {exporter}")
+    else:
+        processor_class = SimpleSpanProcessor
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO)),
+    )
+    provider.add_span_processor(processor_class(span_exporter))
+    trace.set_tracer_provider(provider)
+    return True
+
+
+def shutdown_tracing() -> None:
+    """
+    Отправляет накопленные спаны перед остановкой процесса
+    :return:
+    """
+    provider = trace.get_tracer_provider()
+    if hasattr(provider, "shutdown"):
+        provider.shutdown()
+
+
+def inject_headers(headers: dict[str, str] | None = None) -> dict[str, str]:
+    """
+    Добавляет к HTTP-заголовкам контекст текущего спана (traceparent)
+    :param headers:
+    :return:
+    """
+    headers = {} if headers is None else headers
+    propagate.inject(headers)
+    return headers
+
+
+def kafka_trace_headers() -> list[tuple[str, bytes]]:
+    """
+    Контекст текущего спана в виде заголовков сообщения Kafka
+    :return:
+    """
+    return [(key, value.encode()) for key, value in inject_headers().items()]
+
+
+def extract_kafka_context(headers: Any) -> otel_context.Context:
+    """
+    Контекст трассы из заголовков прочитанного сообщения Kafka
+    :param headers: msg.headers - последовательность пар (ключ, байты)
+    :return:
+    """
+    carrier = {
+        key: value.decode("utf-8", errors="ignore")
+        for key, value in headers or ()
+        if isinstance(value, bytes)
+    }
+    return propagate.extract(carrier)
+
+
+def record_error(span: trace.Span, error: BaseException) -> None:
+    span.record_exception(error)
+    span.set_status(Status(StatusCode.ERROR, str(error)))
+
+
+async def trace_requests(
+    request: Request, call_next: Callable[[Request], Awaitable[Response]]
+) -> Response:
+    """
+    HTTP-middleware: серверный спан на запрос, продолжающий трассу из заголовков клиента.
+    Имя спана - шаблон пути, а не конкретный URL
+    :param request:
+    :param call_next:
+    :return:
+    """
+    with tracer.start_as_current_span(
+        f"{request.method} {request.url.path}",
+        context=propagate.extract(request.headers),
+        kind=SpanKind.SERVER,
+        attributes={"http.request.method": request.method, "url.path": request.url.path},
+    ) as span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            span.update_name(f"{request.method} {route.path}")
+            span.set_attribute("http.route", route.path)
+        span.set_attribute("http.response.status_code", response.status_code)
+        if response.status_code >= 500:
+            span.set_status(Status(StatusCode.ERROR))
+        return response
+
+
+def db_span_attributes(statement: str) -> dict[str, str]:
+    return {
+        "db.system": "postgresql",
+        "db.statement": " ".join(statement.split())[:DB_STATEMENT_MAX_LENGTH],
+    }
+
+
+def trace_asyncpg_query(record: Any) -> None:
+    """
+    Логгер запросов asyncpg (Connection.add_query_logger): спан запроса
+    строится задним числом по его длительности. Вызывается через call_soon
+    с контекстом выполнившей запрос задачи, поэтому спан попадает в её трассу
+    :param record: asyncpg LoggedQuery
+    :return:
+    """
+    end_time = time.time_ns()
+    span = tracer.start_span(
+        "db.query",
+        kind=SpanKind.CLIENT,
+        start_time=end_time - int(record.elapsed * 1e9),
+        attributes=db_span_attributes(record.query),
+    )
+    if record.exception is not None:
+        record_error(span, record.exception)
+    span.end(end_time=end_time)
+
+
+def instrument_sqlalchemy(engine: Any) -> None:
+    """
+    Спаны запросов SQLAlchemy по событиям движка. Контекст задачи доходит
+    до синхронных событий, потому что SQLAlchemy копирует его в greenlet
+    :param engine: AsyncEngine
+    :return:
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_span(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("tracing_spans", []).append(
+            tracer.start_span(
+                "db.query", kind=SpanKind.CLIENT, attributes=db_span_attributes(statement)
+            )
+        )
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _end_span(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("tracing_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _fail_span(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("tracing_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            record_error(span, exception_context.original_exception)
+            span.end()
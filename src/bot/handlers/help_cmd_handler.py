@@ -1,10 +1,7 @@
 from telethon.events import NewMessage
-from telethon import events
 from src.bot.lexicon.lexicon import Commands
-from src.initialization.bot_client_init import bot_client
 
 
-@bot_client.on(events.NewMessage(pattern="/help"))  # type: ignore
 async def help_cmd_handler(event: NewMessage.Event) -> None:
     """
     Показывает список доступных команд
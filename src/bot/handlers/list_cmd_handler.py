@@ -1,55 +1,119 @@
-import os
-import httpx
-import json
-import redis.asyncio as redis
-
-from dotenv import load_dotenv
 from http import HTTPStatus
-from telethon import events
+from telethon import events, Button
 
+from src.api.schemas.schemas import ListLinksResponse
 from src.initialization.bot_client_init import bot_client
-from src.logger.logger_init import logger
+from src.initialization.links_cache_init import links_cache
+from src.initialization.scrapper_client_init import scrapper_client
+
+LIST_PAGE_SIZE = 10
+
+
+async def fetch_user_links(
+    user_id: int, after_id: int | None = None, before_id: int | None = None
+) -> ListLinksResponse | None:
+    """
+    Загружает из scrapper одну страницу ссылок пользователя
+    :param user_id:
+    :param after_id:
+    :param before_id:
+    :return: None, если scrapper ответил ошибкой
+    """
+    response = await scrapper_client.get_links(
+        user_id, limit=LIST_PAGE_SIZE, after_id=after_id, before_id=before_id
+    )
+    if response.status_code != HTTPStatus.OK:
+        return None
+    return ListLinksResponse.model_validate(response.json())
+
+
+async def load_links_page(
+    user_id: int, after_id: int | None = None, before_id: int | None = None
+) -> ListLinksResponse | None:
+    """
+    Страница ссылок через кэш
+    :param user_id:
+    :param after_id:
+    :param before_id:
+    :return:
+    """
+    return await links_cache.get_or_load(
+        user_id,
+        lambda: fetch_user_links(user_id, after_id, before_id),
+        page=links_cache.page_key(LIST_PAGE_SIZE, after_id, before_id),
+    )
+
+
+def render_links_page(data: ListLinksResponse, start: int) -> tuple[str, list | None]:
+    """
+    Текст страницы и кнопки перехода. В кнопку кладется курсор соседней
+    страницы и номер её первой ссылки, чтобы нумерация шла сквозная
+    :param data:
+    :param start: номер первой ссылки страницы
+    :return:
+    """
+    if data.size == 0:
+        return "Список отслеживаемых ссылок пуст\nВы можете добавить ссылку с помощью /track", None
 
-load_dotenv()
-SCRAPPER_API_URL = os.getenv("SCRAPPER_API_URL")
-REDIS_URL = os.getenv("REDIS_URL")
+    text = "Список отслеживаемых ссылок🔗:\n\n"
+    for num, link in enumerate(data.links, start=start):
+        text += f"{num}. {link.url}\n"
 
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+    buttons = []
+    if data.prev_before_id is not None:
+        prev_start = max(start - LIST_PAGE_SIZE, 1)
+        buttons.append(Button.inline("⬅️ Назад", f"list_prev:{data.prev_before_id}:{prev_start}"))
+    if data.next_after_id is not None:
+        next_start = start + data.size
+        buttons.append(Button.inline("Вперед ➡️", f"list_next:{data.next_after_id}:{next_start}"))
+    return text, [buttons] if buttons else None
 
 
-@bot_client.on(events.NewMessage(pattern="/list"))  # type: ignore
 async def list_cmd_handler(event: events.NewMessage.Event):
     """
-    Показывает список отслеживаемых ссылок
+    Показывает первую страницу отслеживаемых ссылок
     :param event:
     :return:
     """
-    user_id = event.sender_id
-    cache_key = f"links:{user_id}"
-    cached_value = await redis_client.get(cache_key)
-    if cached_value:
-        logger.debug("Данные для /list найдены в кэше.")
-        data = json.loads(cached_value)
-    else:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{SCRAPPER_API_URL}/links", headers={"tg-chat-id": str(user_id)}
-            )
-
-            match response.status_code:
-                case HTTPStatus.OK:
-                    data = response.json()
-                    await redis_client.set(cache_key, json.dumps(data))
-                case _:
-                    await event.respond(
-                        "❌ Произошла ошибка при получении списка отслеживаемых ссылок"
-                    )
-                    return
-
-    if data["size"] == 0:
-        text = "Список отслеживаемых ссылок пуст\nВы можете добавить ссылку с помощью /track"
+    data = await load_links_page(event.sender_id)
+    if data is None:
+        await event.respond("❌ Произошла ошибка при получении списка отслеживаемых ссылок")
+        return
+
+    text, buttons = render_links_page(data, start=1)
+    if buttons is None:
+        await event.respond(text, parse_mode="Markdown")
     else:
-        text = "Список отслеживаемых ссылок🔗:\n\n"
-        for num, link in enumerate(data["links"], start=1):
-            text += f"{num}. {link['url']}\n"
-    await event.respond(text, parse_mode="Markdown")
+        await event.respond(text, parse_mode="Markdown", buttons=buttons)
+
+
+@bot_client.on(events.CallbackQuery(pattern=b"list_"))  # type: ignore
+async def list_page_callback_handler(event: events.CallbackQuery.Event) -> None:
+    """
+    Переход по страницам списка:
+      - "list_next:<after_id>:<номер>" - следующая страница
+      - "list_prev:<before_id>:<номер>" - предыдущая страница
+    :param event:
+    :return:
+    """
+    try:
+        direction, cursor, start = event.data.decode().split(":")
+        cursor_id, start_num = int(cursor), int(start)
+    except ValueError:
+        await event.answer("Неизвестный выбор!", alert=True)
+        return
+
+    match direction:
+        case "list_next":
+            data = await load_links_page(event.sender_id, after_id=cursor_id)
+        case "list_prev":
+            data = await load_links_page(event.sender_id, before_id=cursor_id)
+        case _:
+            await event.answer("Неизвестный выбор!", alert=True)
+            return
+
+    if data is None:
+        await event.answer("❌ Произошла ошибка при получении списка отслеживаемых ссылок")
+        return
+    text, buttons = render_links_page(data, start=start_num)
+    await event.edit(text, parse_mode="Markdown", buttons=buttons)
@@ -1,89 +1,157 @@
 import aiocron
 
-from dotenv import load_dotenv
+from datetime import time
+from http import HTTPStatus
+from pydantic import ValidationError
 from telethon import events, Button
 
-from src.initialization.notification_service_init import notif_service
+from src.api.schemas.schemas import NotificationMode, NotificationSettingsRequest, TimezoneRequest
+from src.initialization.notification_service_init import notif_service, leader_lease
 from src.initialization.bot_client_init import bot_client
+from src.initialization.scrapper_client_init import scrapper_client
 from src.logger.logger_init import logger
 
-load_dotenv()
+# Планировщик тикает каждую минуту, а кому что отправлять на тике,
+# решает scrapper по сохраненным настройкам чатов
+notification_tick_pattern = "* * * * *"
+default_digest_time = time(hour=20, minute=0)
 
-immediate_cron_pattern = "* * * * *"
-digest_cron_pattern = "* 20 * * *"  # Каждый день в 20:00
 
-current_cron_expression = immediate_cron_pattern
-current_cron_handle = None
+def parse_digest_time(text: str) -> time | None:
+    """
+    Достает время дайджеста из команды вида "/notifications 09:30"
+    :param text:
+    :return:
+    """
+    parts = text.split(maxsplit=1)
+    if len(parts) < 2:
+        return default_digest_time
+    try:
+        return time.fromisoformat(parts[1].strip())
+    except ValueError:
+        return None
 
 
-@bot_client.on(events.NewMessage(pattern="/notifications"))  # type: ignore
 async def notifications_cmd_handler(event: events.NewMessage.Event) -> None:
     """
     Выбор режима уведомлений
     :param event:
     :return:
     """
+    digest_time = parse_digest_time(event.message.text)
+    if digest_time is None:
+        await event.respond("❌ Некорректное время дайджеста. Пример: /notifications 09:30")
+        return
+
+    digest_time_str = digest_time.strftime("%H:%M")
     buttons = [
         [
             Button.inline("Сразу (каждую минуту)", b"notif_immediate"),
-            Button.inline("Дайджест (раз в сутки)", b"notif_digest"),
+            Button.inline(
+                f"Дайджест (раз в сутки в {digest_time_str})",
+                f"notif_digest:{digest_time_str}".encode(),
+            ),
         ]
     ]
     await event.respond("Выберите режим уведомлений:", buttons=buttons)
 
 
+def parse_timezone(text: str) -> TimezoneRequest | None:
+    """
+    Достает часовой пояс из команды вида "/timezone Europe/Berlin"
+    :param text:
+    :return: None, если пояс не указан или неизвестен
+    """
+    parts = text.split(maxsplit=1)
+    if len(parts) < 2:
+        return None
+    try:
+        return TimezoneRequest(timezone=parts[1].strip())
+    except ValidationError:
+        return None
+
+
+async def timezone_cmd_handler(event: events.NewMessage.Event) -> None:
+    """
+    Выбор часового пояса, в котором выводятся даты событий
+    :param event:
+    :return:
+    """
+    data = parse_timezone(event.message.text)
+    if data is None:
+        await event.respond("❌ Укажите часовой пояс. Пример: /timezone Europe/Berlin")
+        return
+    response = await scrapper_client.set_timezone(event.sender_id, data)
+    if response.status_code != HTTPStatus.OK:
+        await event.respond("❌ Не удалось сохранить часовой пояс")
+        return
+    await event.respond(f"Даты в уведомлениях будут выводиться в поясе {data.timezone}")
+
+
 async def send_notifications_global():
     """
     Дерагет метод отправки уведомлений пользователям
     у объекта сервиса нотификации
     :return:
     """
+    if not leader_lease.is_leader:
+        logger.debug("Тик пропущен: планировщик выполняет другая реплика.")
+        return
     try:
-        logger.debug("Отправка уведомлений согласно новому расписанию.")
-        await notif_service.send_notifications()
+        logger.debug("Тик планировщика уведомлений.")
+        await notif_service.send_notifications(leader_lease.fencing_token)
     except Exception as e:
         logger.exception("Ошибка при отправке уведомлений: %s", e)
 
 
-def schedule_notifications(cron_pattern: str):
+async def save_notification_settings(user_id: int, settings: NotificationSettingsRequest) -> bool:
     """
-    Останавливает текущую задачу, если она уже запущена,
-    и создает новую с заданным расписанием
-    :param cron_pattern:
+    Сохраняет выбранный режим уведомлений чата в scrapper
+    :param user_id:
+    :param settings:
     :return:
     """
-    global current_cron_handle
-    if current_cron_handle is not None:
-        current_cron_handle.stop()
-    current_cron_handle = aiocron.crontab(cron_pattern, start=True)(send_notifications_global)
-    logger.info("Создана крон-задача уведомлений с расписанием: %s", cron_pattern)
+    response = await scrapper_client.set_notification_settings(user_id, settings)
+    return response.status_code == HTTPStatus.OK
 
 
-@bot_client.on(events.CallbackQuery)  # type: ignore
+@bot_client.on(events.CallbackQuery(pattern=b"notif_"))  # type: ignore
 async def notifications_callback_handler(event: events.CallbackQuery.Event) -> None:
     """
     Обработчик выбора режима уведомлений:
       - "notif_immediate" для немедленных уведомлений (каждую минуту)
-      - "notif_digest" для дайджеста (раз в сутки)
+      - "notif_digest:HH:MM" для дайджеста (раз в сутки в указанное время)
     :param event:
     :return:
     """
-    global current_cron_expression
     data = event.data
     if data == b"notif_immediate":
-        current_cron_expression = immediate_cron_pattern
-        schedule_notifications(current_cron_expression)
-        await event.edit(
-            "Режим уведомлений обновлен: *Сразу* (каждую минуту)", parse_mode="Markdown"
+        settings = NotificationSettingsRequest(mode=NotificationMode.IMMEDIATE)
+        text = "Режим уведомлений обновлен: *Сразу* (каждую минуту)"
+    elif data.startswith(b"notif_digest:"):
+        try:
+            digest_time = time.fromisoformat(data.removeprefix(b"notif_digest:").decode())
+        except ValueError:
+            await event.answer("Неизвестный выбор!", alert=True)
+            return
+        settings = NotificationSettingsRequest(
+            mode=NotificationMode.DIGEST, digest_time=digest_time
         )
-    elif data == b"notif_digest":
-        current_cron_expression = digest_cron_pattern
-        schedule_notifications(current_cron_expression)
-        await event.edit(
-            "Режим уведомлений обновлен: *Дайджест* (раз в сутки)", parse_mode="Markdown"
+        text = (
+            "Режим уведомлений обновлен: *Дайджест* "
+            f"(раз в сутки в {digest_time.strftime('%H:%M')})"
         )
     else:
         await event.answer("Неизвестный выбор!", alert=True)
+        return
+
+    if not await save_notification_settings(event.sender_id, settings):
+        await event.answer("❌ Не удалось сохранить режим уведомлений", alert=True)
+        return
+    await event.edit(text, parse_mode="Markdown")
 
 
-schedule_notifications(current_cron_expression)
+notification_cron = aiocron.crontab(notification_tick_pattern, start=True)(
+    send_notifications_global
+)
+logger.info("Создана крон-задача уведомлений с расписанием: %s", notification_tick_pattern)
@@ -1,16 +1,9 @@
 from telethon.events import NewMessage
-from src.initialization.bot_client_init import bot_client
-from telethon import events
-from dotenv import load_dotenv
-import os
-import httpx
 from http import HTTPStatus
 
-load_dotenv()
-SCRAPPER_API_URL = os.getenv("SCRAPPER_API_URL")
+from src.initialization.scrapper_client_init import scrapper_client
 
 
-@bot_client.on(events.NewMessage(pattern="/start"))  # type: ignore
 async def start_cmd_handler(event: NewMessage.Event) -> None:
     """
     Обрабатывает команду /start
@@ -19,8 +12,7 @@ async def start_cmd_handler(event: NewMessage.Event) -> None:
     :return:
     """
     user_id = event.sender_id
-    async with httpx.AsyncClient() as client:
-        response = await client.post(f"{SCRAPPER_API_URL}/tg-chat/{user_id}")
+    response = await scrapper_client.register_chat(user_id)
     match response.status_code:
         case HTTPStatus.OK:
             text = (
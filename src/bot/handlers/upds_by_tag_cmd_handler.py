@@ -1,41 +1,34 @@
-import httpx
-import os
+from typing import Any
 from telethon import events
 
-from src.database.sql_database import user_states
-from src.initialization.bot_client_init import bot_client
+from src.bot.states.states import UpdsByTagsState
+from src.initialization.scrapper_client_init import scrapper_client
+from src.initialization.state_store_init import state_store
 
-# сюда нужно положить ваш SCRAPPER_API_URL из конфига
-SCRAPPER_API_URL = os.getenv("SCRAPPER_API_URL")
 
-
-@bot_client.on(events.NewMessage())
-async def upds_by_tag_handler(event: events.NewMessage.Event):
+async def upds_by_tag_handler(
+    event: events.NewMessage.Event, user_id: int, user_data: dict[str, Any] | None = None
+):
     """
     Высылает обновления по выбранным тегам
     :param event:
+    :param user_id:
+    :param user_data:
     :return:
     """
     chat_id = event.chat_id
-    state = user_states.get(chat_id)
-    if state != "AWAITING_UPDS_TAGS":
+    if not await state_store.transition(user_id, UpdsByTagsState.WAITING_FOR_TAGS, None):
         return
-    user_states.pop(chat_id, None)
 
     tags = event.raw_text.strip().split()
     if not tags:
-        await event.reply("❗ Нужен хотя бы один тег. Попробуйте заново: /upds_by_tag")
+        await event.reply("❗ Нужен хотя бы один тег. Попробуйте заново: /upds_by_tags")
         return
 
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
-                f"{SCRAPPER_API_URL}/updates_by_tags",
-                params={"tg_chat_id": chat_id, **{"tags": tags}},
-                timeout=10.0,
-            )
-            resp.raise_for_status()
-            data = resp.json()
+        resp = await scrapper_client.get_user_updates(chat_id, tags)
+        resp.raise_for_status()
+        data = resp.json()
     except Exception as e:
         await event.reply(f"❌ Ошибка при запросе обновлений: {e}")
         return
@@ -50,13 +43,11 @@ async def upds_by_tag_handler(event: events.NewMessage.Event):
         await event.reply(text)
 
 
-@bot_client.on(events.NewMessage(pattern="/upds_by_tags"))
 async def upds_by_tag_cmd_handler(event: events.NewMessage.Event):
     """
     Ожидает ввод тегов
     :param event:
     :return:
     """
-    chat_id = event.chat_id
     await event.reply("📝 Введите один или несколько тегов через пробел:")
-    user_states[chat_id] = "AWAITING_UPDS_TAGS"
+    await state_store.set_state(event.sender_id, UpdsByTagsState.WAITING_FOR_TAGS)
@@ -7,6 +7,9 @@ class Commands(StrEnum):
     TRACK = "/track"
     UNTRACK = "/untrack"
     LIST = "/list"
+    NOTIFICATIONS = "/notifications"
+    TIMEZONE = "/timezone"
+    UPDS_BY_TAGS = "/upds_by_tags"
 
 
 class Responses(StrEnum):
@@ -0,0 +1,89 @@
+from enum import Enum
+from typing import Any, Awaitable, Callable
+
+from telethon import events
+
+from src.bot.handlers import (
+    help_cmd_handler,
+    list_cmd_handler,
+    notification_cmd_handler,
+    start_cmd_handler,
+    track_cmd_handler,
+    unknown_cmd_handler,
+    untrack_cmd_handler,
+    upds_by_tag_cmd_handler,
+)
+from src.bot.lexicon.lexicon import Commands
+from src.bot.states.states import TrackState, UnTrackState, UpdsByTagsState
+from src.initialization.bot_client_init import bot_client
+from src.initialization.state_store_init import state_store
+
+CommandHandler = Callable[[events.NewMessage.Event], Awaitable[None]]
+StateHandler = Callable[[events.NewMessage.Event, int, dict[str, Any]], Awaitable[None]]
+
+COMMAND_HANDLERS: dict[str, CommandHandler] = {
+    Commands.START: start_cmd_handler.start_cmd_handler,
+    Commands.HELP: help_cmd_handler.help_cmd_handler,
+    Commands.TRACK: track_cmd_handler.track_cmd_handler,
+    Commands.UNTRACK: untrack_cmd_handler.untrack_cmd_handler,
+    Commands.LIST: list_cmd_handler.list_cmd_handler,
+    Commands.NOTIFICATIONS: notification_cmd_handler.notifications_cmd_handler,
+    Commands.TIMEZONE: notification_cmd_handler.timezone_cmd_handler,
+    Commands.UPDS_BY_TAGS: upds_by_tag_cmd_handler.upds_by_tag_cmd_handler,
+}
+
+STATE_HANDLERS: dict[Enum, StateHandler] = {
+    TrackState.WAITING_FOR_LINK: track_cmd_handler.handle_waiting_for_link,
+    TrackState.WAITING_FOR_TAGS: track_cmd_handler.handle_waiting_for_tags,
+    TrackState.WAITING_FOR_FILTERS: track_cmd_handler.handle_waiting_for_filters,
+    TrackState.WAITING_FOR_CONFIRMATION: track_cmd_handler.handle_waiting_for_confirmation,
+    UnTrackState.WAITING_FOR_CHOICE: untrack_cmd_handler.handle_waiting_for_choice,
+    UnTrackState.WAITING_FOR_CONFIRMATION: untrack_cmd_handler.handle_waiting_for_confirmation,
+    UpdsByTagsState.WAITING_FOR_TAGS: upds_by_tag_cmd_handler.upds_by_tag_handler,
+}
+
+
+def parse_command(text: str) -> str | None:
+    """
+    Выделяет команду из текста сообщения: "/track@bot ссылка" -> "/track"
+    :param text:
+    :return:
+    """
+    if not text.startswith("/"):
+        return None
+    return text.split(maxsplit=1)[0].split("@", 1)[0]
+
+
+async def dispatch_message(event: events.NewMessage.Event) -> None:
+    """
+    Единая точка входа для всех сообщений. Команда отдается своему обработчику,
+    иначе состояние диалога читается один раз и сообщение уходит обработчику
+    этого состояния. Каждое сообщение обрабатывает ровно один обработчик
+    :param event:
+    :return:
+    """
+    text = event.message.text or ""
+    command = parse_command(text)
+    if command is not None:
+        handler = COMMAND_HANDLERS.get(command)
+        if handler is None:
+            await unknown_cmd_handler.unknown_cmd_handler(event)
+        else:
+            await handler(event)
+        return
+
+    user_id = event.sender_id
+    state, user_data = await state_store.load(user_id)
+    if state is None:
+        return
+    state_handler = STATE_HANDLERS.get(state)
+    if state_handler is not None:
+        await state_handler(event, user_id, user_data)
+
+
+def register_router() -> None:
+    """
+    Регистрирует роутер единственным обработчиком новых сообщений
+    :return:
+    """
+    bot_client.add_event_handler(dispatch_message, events.NewMessage())
@@ -0,0 +1,218 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any
+
+import httpx
+from opentelemetry.trace import SpanKind
+
+from src.api.schemas.schemas import (
+    AddLinkRequest,
+    NotificationSettingsRequest,
+    TimezoneRequest,
+    RemoveLinkRequest,
+)
+from src.api.utils.serialization import JSON_MEDIA_TYPE, message_media_type
+from src.api.utils.tracing import inject_headers, record_error, tracer
+from src.logger.logger_init import logger
+
+IDEMPOTENT_METHODS = frozenset({"get", "put"})
+RETRY_STATUSES = frozenset(
+    {HTTPStatus.BAD_GATEWAY, HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.GATEWAY_TIMEOUT}
+)
+
+
+@dataclass
+class RequestStats:
+    count: int = 0
+    errors: int = 0
+    retries: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def avg_seconds(self) -> float:
+        return self.total_seconds / self.count if self.count else 0.0
+
+
+class ScrapperApiClient:
+    """
+    Клиент API scrapper для бота. Создается один раз при старте и держит
+    пул keep-alive соединений, поэтому команды пользователей не открывают
+    новое TCP-соединение. Идемпотентные запросы повторяются при сетевых
+    ошибках и 502/503/504, время ответа копится по каждому эндпоинту
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_seconds: float = 5.0,
+        connect_timeout_seconds: float = 2.0,
+        max_connections: int = 50,
+        retries: int = 2,
+        retry_backoff_seconds: float = 0.2,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.retries = retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.stats: dict[str, RequestStats] = {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url or "",
+            timeout=httpx.Timeout(timeout_seconds, connect=connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            transport=transport,
+        )
+
+    async def register_chat(self, tg_chat_id: int) -> httpx.Response:
+        return await self._request("post", "/tg-chat/{tg_chat_id}", tg_chat_id=tg_chat_id)
+
+    async def get_links(
+        self,
+        tg_chat_id: int,
+        limit: int | None = None,
+        after_id: int | None = None,
+        before_id: int | None = None,
+    ) -> httpx.Response:
+        params = {
+            name: value
+            for name, value in (("limit", limit), ("after_id", after_id), ("before_id", before_id))
+            if value is not None
+        }
+        return await self._request(
+            "get", "/links", headers=self._chat_header(tg_chat_id), params=params
+        )
+
+    async def add_link(self, tg_chat_id: int, data: AddLinkRequest) -> httpx.Response:
+        return await self._request(
+            "post", "/links", headers=self._chat_header(tg_chat_id), json=data.model_dump()
+        )
+
+    async def remove_link(self, tg_chat_id: int, data: RemoveLinkRequest) -> httpx.Response:
+        # повтор удаления после таймаута вернул бы 404 на уже удаленную ссылку
+        return await self._request(
+            "delete",
+            "/links",
+            headers=self._chat_header(tg_chat_id),
+            params={"url": data.url},
+        )
+
+    async def set_notification_settings(
+        self, tg_chat_id: int, settings: NotificationSettingsRequest
+    ) -> httpx.Response:
+        return await self._request(
+            "put",
+            "/tg-chat/{tg_chat_id}/notifications",
+            tg_chat_id=tg_chat_id,
+            json=settings.model_dump(mode="json"),
+        )
+
+    async def set_timezone(self, tg_chat_id: int, data: TimezoneRequest) -> httpx.Response:
+        return await self._request(
+            "put",
+            "/tg-chat/{tg_chat_id}/timezone",
+            tg_chat_id=tg_chat_id,
+            json=data.model_dump(),
+        )
+
+    async def get_user_updates(
+        self, tg_chat_id: int, tags: list[str], refresh: bool = True
+    ) -> httpx.Response:
+        return await self._request(
+            "get",
+            "/users/{tg_chat_id}/updates",
+            tg_chat_id=tg_chat_id,
+            params={"tags": tags, "refresh": str(refresh).lower()},
+        )
+
+    async def get_updates(self, fencing_token: int | None = None) -> httpx.Response:
+        media_type = message_media_type()
+        # JSON остается запасным вариантом, если scrapper не умеет msgpack
+        headers = {"accept": ", ".join(dict.fromkeys((media_type, JSON_MEDIA_TYPE)))}
+        if fencing_token is not None:
+            headers["x-fencing-token"] = str(fencing_token)
+        # /updates забирает накопленные обновления, повтор мог бы их потерять
+        return await self._request("get", "/updates", headers=headers, idempotent=False)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    @staticmethod
+    def _chat_header(tg_chat_id: int) -> dict[str, str]:
+        return {"tg-chat-id": str(tg_chat_id)}
+
+    async def _request(
+        self,
+        method: str,
+        route: str,
+        idempotent: bool | None = None,
+        tg_chat_id: int | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Выполняет запрос с повторами для идемпотентных методов и учетом времени ответа.
+        Метрики группируются по шаблону пути, а не по конкретному чату
+        :param method:
+        :param route: шаблон пути, например "/tg-chat/{tg_chat_id}"
+        :param idempotent: по умолчанию определяется по методу
+        :param tg_chat_id:
+        :param kwargs: параметры httpx-запроса
+        :return:
+        """
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        attempts = self.retries + 1 if idempotent else 1
+        path = route.format(tg_chat_id=tg_chat_id)
+        stats = self.stats.setdefault(f"{method.upper()} {route}", RequestStats())
+        with tracer.start_as_current_span(
+            f"scrapper {method.upper()} {route}", kind=SpanKind.CLIENT
+        ) as span:
+            kwargs["headers"] = inject_headers(dict(kwargs.get("headers") or {}))
+            try:
+                response = await self._send(method, path, stats, attempts, **kwargs)
+            except httpx.TransportError as e:
+                record_error(span, e)
+                raise
+            span.set_attribute("http.response.status_code", response.status_code)
+            return response
+
+    async def _send(
+        self, method: str, path: str, stats: RequestStats, attempts: int, **kwargs: Any
+    ) -> httpx.Response:
+        send = getattr(self._client, method)
+        attempt = 0
+        while True:
+            started_at = time.perf_counter()
+            try:
+                response = await send(path, **kwargs)
+            except httpx.TransportError as e:
+                self._observe(stats, started_at, failed=True)
+                if attempt + 1 >= attempts:
+                    raise
+                logger.warning("Запрос %s %s не выполнен: %s, повтор", method.upper(), path, e)
+            else:
+                failed = response.status_code >= HTTPStatus.INTERNAL_SERVER_ERROR
+                self._observe(stats, started_at, failed=failed)
+                if response.status_code not in RETRY_STATUSES or attempt + 1 >= attempts:
+                    return response
+                logger.warning(
+                    "Scrapper ответил %s на %s %s, повтор",
+                    response.status_code,
+                    method.upper(),
+                    path,
+                )
+            stats.retries += 1
+            await asyncio.sleep(self.retry_backoff_seconds * 2**attempt)
+            attempt += 1
+
+    @staticmethod
+    def _observe(stats: RequestStats, started_at: float, failed: bool) -> None:
+        elapsed = time.perf_counter() - started_at
+        stats.count += 1
+        stats.total_seconds += elapsed
+        stats.max_seconds = max(stats.max_seconds, elapsed)
+        if failed:
+            stats.errors += 1
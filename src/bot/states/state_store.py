@@ -0,0 +1,193 @@
+import json
+from abc import ABC, abstractmethod
+from enum import Enum
+from typing import Any
+
+import redis.asyncio as redis
+
+from src.bot.states.states import STATE_TYPES
+
+STATE_FIELD = "state"
+DATA_PREFIX = "data:"
+
+# Переход выполняется, только если текущее состояние совпадает с ожидаемым.
+# Пустое новое состояние завершает диалог и удаляет хэш пользователя
+TRANSITION_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'state')
+if (current or '') ~= ARGV[1] then
+    return 0
+end
+if ARGV[2] == '' then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+redis.call('HSET', KEYS[1], 'state', ARGV[2])
+for i = 4, #ARGV, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+def dump_state(state: Enum | None) -> str:
+    if state is None:
+        return ""
+    return f"{type(state).__name__}.{state.name}"
+
+
+def load_state(raw: str | None) -> Enum | None:
+    if not raw:
+        return None
+    type_name, _, name = raw.partition(".")
+    state_type = STATE_TYPES.get(type_name)
+    if state_type is None or name not in state_type.__members__:
+        return None
+    return state_type[name]
+
+
+class StateStore(ABC):
+    """
+    Хранилище состояний диалогов (FSM) и введенных данных,
+    изолированное по пользователям
+    """
+
+    @abstractmethod
+    async def load(self, user_id: int) -> tuple[Enum | None, dict[str, Any]]:
+        """
+        Возвращает состояние и данные пользователя за одно обращение
+        :param user_id:
+        :return:
+        """
+
+    @abstractmethod
+    async def set_state(self, user_id: int, state: Enum, **data: Any) -> None:
+        """
+        Устанавливает состояние и дописывает данные диалога
+        :param user_id:
+        :param state:
+        :param data:
+        :return:
+        """
+
+    @abstractmethod
+    async def transition(
+        self, user_id: int, expected: Enum | None, state: Enum | None, **data: Any
+    ) -> bool:
+        """
+        Атомарно переводит пользователя в новое состояние,
+        если текущее совпадает с ожидаемым. state=None завершает диалог
+        :param user_id:
+        :param expected:
+        :param state:
+        :param data:
+        :return:
+        """
+
+    @abstractmethod
+    async def clear(self, user_id: int) -> None:
+        """
+        Сбрасывает состояние и данные пользователя
+        :param user_id:
+        :return:
+        """
+
+    async def get_state(self, user_id: int) -> Enum | None:
+        state, _ = await self.load(user_id)
+        return state
+
+    async def get_data(self, user_id: int) -> dict[str, Any]:
+        _, data = await self.load(user_id)
+        return data
+
+
+class RedisStateStore(StateStore):
+    """
+    Состояния в Redis: хэш fsm:{user_id} с полем state и полями data:<ключ>,
+    TTL продлевается при каждой записи. Общий для всех реплик бота
+    """
+
+    def __init__(self, redis_client: redis.Redis, ttl_seconds: int = 86400):
+        self.redis_client = redis_client
+        self.ttl_seconds = ttl_seconds
+        self._transition = self.redis_client.register_script(TRANSITION_SCRIPT)
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"fsm:{user_id}"
+
+    @staticmethod
+    def _dump_data(data: dict[str, Any]) -> dict[str, str]:
+        return {
+            f"{DATA_PREFIX}{key}": json.dumps(value, ensure_ascii=False)
+            for key, value in data.items()
+        }
+
+    async def load(self, user_id: int) -> tuple[Enum | None, dict[str, Any]]:
+        raw = await self.redis_client.hgetall(self._key(user_id))
+        fields = {
+            (key.decode() if isinstance(key, bytes) else key): (
+                value.decode() if isinstance(value, bytes) else value
+            )
+            for key, value in raw.items()
+        }
+        data = {
+            key.removeprefix(DATA_PREFIX): json.loads(value)
+            for key, value in fields.items()
+            if key.startswith(DATA_PREFIX)
+        }
+        return load_state(fields.get(STATE_FIELD)), data
+
+    async def set_state(self, user_id: int, state: Enum, **data: Any) -> None:
+        key = self._key(user_id)
+        async with self.redis_client.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={STATE_FIELD: dump_state(state), **self._dump_data(data)})
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def transition(
+        self, user_id: int, expected: Enum | None, state: Enum | None, **data: Any
+    ) -> bool:
+        args: list[Any] = [dump_state(expected), dump_state(state), self.ttl_seconds]
+        for field, value in self._dump_data(data).items():
+            args.extend((field, value))
+        return bool(await self._transition(keys=[self._key(user_id)], args=args))
+
+    async def clear(self, user_id: int) -> None:
+        await self.redis_client.delete(self._key(user_id))
+
+
+class MemoryStateStore(StateStore):
+    """
+    Состояния в памяти процесса. Подходит для тестов и запуска в одну реплику
+    """
+
+    def __init__(self):
+        self._states: dict[int, Enum] = {}
+        self._data: dict[int, dict[str, Any]] = {}
+
+    async def load(self, user_id: int) -> tuple[Enum | None, dict[str, Any]]:
+        return self._states.get(user_id), dict(self._data.get(user_id, {}))
+
+    async def set_state(self, user_id: int, state: Enum, **data: Any) -> None:
+        self._states[user_id] = state
+        self._data.setdefault(user_id, {}).update(data)
+
+    async def transition(
+        self, user_id: int, expected: Enum | None, state: Enum | None, **data: Any
+    ) -> bool:
+        if self._states.get(user_id) != expected:
+            return False
+        if state is None:
+            await self.clear(user_id)
+        else:
+            await self.set_state(user_id, state, **data)
+        return True
+
+    async def clear(self, user_id: int) -> None:
+        self._states.pop(user_id, None)
+        self._data.pop(user_id, None)
+
+    def reset(self) -> None:
+        self._states.clear()
+        self._data.clear()
@@ -11,3 +11,12 @@ class TrackState(Enum):
 class UnTrackState(Enum):
     WAITING_FOR_CHOICE = auto()
     WAITING_FOR_CONFIRMATION = auto()
+
+
+class UpdsByTagsState(Enum):
+    WAITING_FOR_TAGS = auto()
+
+
+STATE_TYPES: dict[str, type[Enum]] = {
+    state_type.__name__: state_type for state_type in (TrackState, UnTrackState, UpdsByTagsState)
+}
@@ -9,6 +9,7 @@ from concurrent.futures import ThreadPoolExecutor
 from contextlib import AsyncExitStack, asynccontextmanager
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from telethon.errors.rpcerrorlist import ApiIdInvalidError
@@ -16,6 +17,8 @@ from telethon import TelegramClient
 
 from src.api.bot_api.kafka_consumer import consume_messages
 from src.api.bot_api.http_bot_api import bot_api_router
+from src.api.utils.metrics import metrics_router
+from src.api.utils.tracing import configure_tracing, shutdown_tracing, trace_requests
 from src.logger.logger_init import logger
 from src.bot.settings.settings import TGBotSettings
 
@@ -27,6 +30,7 @@ if sys.platform == "win32":
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    configure_tracing("bot")
     settings = TGBotSettings()
     bot_client = TelegramClient(
         "session_files/kafka_bot_session", settings.api_id, settings.api_hash
@@ -49,11 +53,16 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         await stack.aclose()
 
     await loop.shutdown_default_executor()
+    shutdown_tracing()
 
 
 def create_bot_app(lifespan) -> FastAPI:
-    app = FastAPI(title="bot_app", lifespan=lifespan)
+    app = FastAPI(
+        title="bot_app", lifespan=lifespan, default_response_class=ORJSONResponse
+    )
     app.include_router(router=bot_api_router)
+    app.include_router(router=metrics_router)
+    app.middleware("http")(trace_requests)
 
     app.add_middleware(GZipMiddleware, minimum_size=1000)
     app.add_middleware(
@@ -77,6 +86,7 @@ def run_http_bot():
 
 
 async def run_kafka_bot_consumer():
+    configure_tracing("bot")
     settings = TGBotSettings()  # type: ignore[call-arg]
     bot_client = TelegramClient(
         "session_files/kafka_bot_session", settings.api_id, settings.api_hash
@@ -90,6 +100,8 @@ async def run_kafka_bot_consumer():
         except Exception as exc:
             logger.exception("Main loop raised error.", extra={"exc": exc})
             raise
+        finally:
+            shutdown_tracing()
 
 
 if __name__ == "__main__":
@@ -1,16 +1,54 @@
 import asyncio
-
-from sqlalchemy import select
+from datetime import datetime, timedelta
+
+from sqlalchemy import (
+    ColumnElement,
+    Text,
+    and_,
+    any_,
+    case,
+    cast,
+    delete,
+    func,
+    or_,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import lazyload
 from sqlalchemy_utils import create_database, database_exists
 from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine
 
 from src.logger.logger_init import logger
-from src.database.orm_models import Base, User, Link, UserLink
-from src.api.schemas.schemas import AddLinkRequest, LinkResponse, LinkUpdate
-from src.api.scrapper_api.utils_scrapper_api import check_last_update
+from src.database.orm_models import Base, User, Link, UserLink, PendingUpdate, SchedulerFencing
+from src.api.schemas.schemas import (
+    AddLinkRequest,
+    LinkResponse,
+    LinkUpdate,
+    NotificationMode,
+    PendingEvent,
+    UpdateInfo,
+)
+from src.api.providers.base import LinkCheckResult, TrackedLink
+from src.api.scrapper_api.link_state import PUSH_FED_POLL_SECONDS
+from src.api.scrapper_api.notification_scheduler import (
+    SCHEDULER_LEASE_NAME,
+    StaleFencingTokenError,
+    due_digest_buckets,
+)
+from src.api.scrapper_api.link_target import (
+    LinkTarget,
+    classify_url,
+    stored_url_variants,
+    target_columns,
+    target_from_columns,
+)
+from src.initialization.providers_init import provider_registry
 from src.api.utils.string_makers import make_description
+from src.api.utils.tracing import instrument_sqlalchemy
 
 
 class OrmDbProcessor:
@@ -45,6 +83,7 @@ class OrmDbProcessor:
         """
         async_db_url = self.db_url.replace("postgresql://", "postgresql+psycopg://")
         self._engine = create_async_engine(async_db_url, echo=False, future=True)
+        instrument_sqlalchemy(self._engine)
         self._session_factory = async_sessionmaker(bind=self._engine, expire_on_commit=False)
         logger.info(f"Подключение установлено{self._engine}, {self._session_factory}")
 
@@ -53,6 +92,16 @@ class OrmDbProcessor:
             raise RuntimeError("Session factory is not initialized. Call connect() first.")
         return self._session_factory
 
+    def pool_usage(self) -> dict[str, int]:
+        """
+        Соединения пула: всего открыто, занято запросами и свободно
+        """
+        if self._engine is None:
+            return {"size": 0, "in_use": 0, "idle": 0}
+        pool = self._engine.pool
+        in_use, idle = pool.checkedout(), pool.checkedin()
+        return {"size": in_use + idle, "in_use": in_use, "idle": idle}
+
     async def close(self):
         """
         Закрывает подключение к БД
@@ -86,7 +135,10 @@ class OrmDbProcessor:
         """
         Добавляет ссылку пользователю, если её ещё нет.
         Возвращает ID добавленной (или найденной) ссылки.
+        Ссылка разбирается один раз здесь: хранится её каноническая форма и цель
         """
+        target = classify_url(add_link.url)
+        link_url = target.canonical_url if target else add_link.url
         factory = self._get_session_factory()
         async with factory() as session:
             async with session.begin():
@@ -94,21 +146,25 @@ class OrmDbProcessor:
                 if not user:
                     raise ValueError(f"Пользователь {tg_chat_id} не зарегистрирован")
 
-                result = await session.execute(select(Link).filter_by(link_url=add_link.url))
-                link = result.scalars().first()
-                if link is None:
-                    link = Link(link_url=add_link.url)
-                    session.add(link)
-                    await session.flush()
-
+                # ссылка ищется по цели, в том числе среди записанных до канонизации
+                link_match = self._link_match(add_link.url)
                 result = await session.execute(
-                    select(UserLink).filter_by(user_id=tg_chat_id, link_id=link.id)
+                    select(UserLink.link_id)
+                    .join(Link, UserLink.link_id == Link.id)
+                    .where(UserLink.user_id == tg_chat_id, link_match)
                 )
-                exist_track = result.scalars().first()
-                if exist_track:
+                if result.first() is not None:
                     raise ValueError(
                         f"Пользователь {tg_chat_id} уже отслеживает ссылку {add_link.url}"
                     )
+
+                result = await session.execute(select(Link).where(link_match).order_by(Link.id))
+                link = result.unique().scalars().first()
+                if link is None:
+                    link = Link(link_url=link_url, **target_columns(target))
+                    session.add(link)
+                    await session.flush()
+
                 user_link = UserLink(
                     user_id=tg_chat_id,
                     link_id=link.id,
@@ -151,12 +207,33 @@ class OrmDbProcessor:
                 # session.add(user_link)
                 # return link_obj.id
 
-    async def get_user_links(self, tg_chat_id: int) -> list[LinkResponse]:
+    async def get_user_links(
+        self,
+        tg_chat_id: int,
+        limit: int | None = None,
+        after_id: int | None = None,
+        before_id: int | None = None,
+    ) -> list[LinkResponse]:
+        """
+        Возвращает ссылки пользователя по возрастанию id с keyset-пагинацией:
+        страница после after_id или последние limit ссылок перед before_id
+        """
+        query = select(UserLink).where(UserLink.user_id == tg_chat_id)
+        if after_id is not None:
+            query = query.where(UserLink.link_id > after_id)
+        if before_id is not None:
+            query = query.where(UserLink.link_id < before_id).order_by(UserLink.link_id.desc())
+        else:
+            query = query.order_by(UserLink.link_id)
+        if limit is not None:
+            query = query.limit(limit)
+
         factory = self._get_session_factory()
         async with factory() as session:
-            user = await session.get(User, tg_chat_id)
-            if not user:
-                return []
+            result = await session.execute(query)
+            user_links = list(result.unique().scalars().all())
+            if before_id is not None:
+                user_links.reverse()
 
             return [
                 LinkResponse(
@@ -165,7 +242,7 @@ class OrmDbProcessor:
                     tags=ul.tags or [],
                     filters=ul.filters or [],
                 )
-                for ul in user.user_links
+                for ul in user_links
             ]
 
     async def delete_chat(self, tg_chat_id: int) -> bool:
@@ -181,90 +258,478 @@ class OrmDbProcessor:
     async def remove_user_link(
         self, tg_chat_id: int, link_url: str
     ) -> tuple[int, list[str], list[str]] | None:
+        """
+        Удаляет подписку пользователя на ссылку в любом её написании. Если ссылка
+        записана и до канонизации, и после, удаляются обе подписки
+        """
         factory = self._get_session_factory()
         async with factory() as session:
             async with session.begin():
-                user = await session.get(User, tg_chat_id)
-                if not user:
+                result = await session.execute(
+                    select(UserLink)
+                    .join(Link, UserLink.link_id == Link.id)
+                    .where(UserLink.user_id == tg_chat_id, self._link_match(link_url))
+                    .order_by(UserLink.link_id)
+                )
+                user_links = result.unique().scalars().all()
+                if not user_links:
                     return None
 
-                user_link_to_remove = None
-                for ul in user.user_links:
-                    if ul.link and ul.link.link_url == link_url:
-                        user_link_to_remove = ul
-                        break
+                for user_link in user_links:
+                    await session.delete(user_link)
+                first = user_links[0]
+                return first.link_id, first.tags or [], first.filters or []
 
-                if not user_link_to_remove:
-                    return None
+    @staticmethod
+    def _target_condition(target: LinkTarget) -> ColumnElement[bool]:
+        columns = target_columns(target)
+        return and_(
+            Link.provider == columns["provider"],
+            Link.owner.is_not_distinct_from(columns["owner"]),
+            Link.repo.is_not_distinct_from(columns["repo"]),
+            Link.kind == columns["kind"],
+            Link.number.is_not_distinct_from(columns["number"]),
+        )
+
+    @classmethod
+    def _link_match(cls, url: str) -> ColumnElement[bool]:
+        """
+        Строки links для ссылки пользователя: по разобранной цели, а для неразобранных
+        ссылок - по написанию. Так находятся и строки, записанные до канонизации,
+        у которых link_url отличается от канонического
+        :param url:
+        :return:
+        """
+        target = classify_url(url)
+        by_url = Link.link_url.in_(stored_url_variants(url))
+        if target is None:
+            return by_url
+        return or_(cls._target_condition(target), by_url)
+
+    async def set_notification_settings(
+        self, tg_chat_id: int, mode: NotificationMode, digest_bucket: int
+    ) -> bool:
+        """
+        Сохраняет режим уведомлений и корзину дайджеста чата
+        """
+        factory = self._get_session_factory()
+        async with factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(User)
+                    .where(User.tg_chat_id == tg_chat_id)
+                    .values(notification_mode=mode.value, digest_time=digest_bucket)
+                )
+                return bool(result.rowcount)
+
+    async def set_timezone(self, tg_chat_id: int, timezone: str) -> bool:
+        """
+        Сохраняет часовой пояс, в котором чату выводятся даты событий
+        """
+        factory = self._get_session_factory()
+        async with factory() as session:
+            async with session.begin():
+                result = await session.execute(
+                    update(User).where(User.tg_chat_id == tg_chat_id).values(timezone=timezone)
+                )
+                return bool(result.rowcount)
+
+    async def save_pending_updates(self, updates: list[LinkUpdate]) -> None:
+        """
+        Откладывает обновления до отправки, повторы одного события игнорируются
+        """
+        factory = self._get_session_factory()
+        async with factory() as session:
+            async with session.begin():
+                await session.execute(
+                    insert(PendingUpdate)
+                    .values(
+                        [
+                            {
+                                "tg_chat_id": upd.tg_chat_id,
+                                "link_id": upd.id,
+                                "url": upd.url,
+                                "description": upd.description,
+                                **(
+                                    {
+                                        "title": upd.update_info.title,
+                                        "user_name": upd.update_info.user_name,
+                                        "event_at": upd.update_info.created_at,
+                                        "preview": upd.update_info.preview,
+                                        "event_id": upd.update_info.event_id,
+                                    }
+                                    if upd.update_info
+                                    else {}
+                                ),
+                            }
+                            for upd in updates
+                        ]
+                    )
+                    .on_conflict_do_nothing()
+                )
+
+    async def pop_due_updates(
+        self,
+        digest_bucket: int,
+        scheduler: str = SCHEDULER_LEASE_NAME,
+        fencing_token: int | None = None,
+    ) -> list[PendingEvent]:
+        """
+        Забирает обновления чатов с мгновенным режимом и чатов, у которых с прошлого
+        тика планировщика scheduler наступила корзина дайджеста.
+        Fencing-токен проверяется под блокировкой строки планировщика в той же транзакции:
+        устаревший токен - StaleFencingTokenError, и очередь не трогается
+        """
+        tick = insert(SchedulerFencing).values(
+            name=scheduler, token=fencing_token or 0, last_bucket=digest_bucket
+        )
+        tick = tick.on_conflict_do_update(
+            index_elements=[SchedulerFencing.name],
+            set_={
+                "last_bucket": tick.excluded.last_bucket,
+                "token": func.greatest(SchedulerFencing.token, tick.excluded.token),
+            },
+        )
+        factory = self._get_session_factory()
+        async with factory() as session:
+            async with session.begin():
+                state = (
+                    await session.execute(
+                        select(SchedulerFencing.token, SchedulerFencing.last_bucket)
+                        .where(SchedulerFencing.name == scheduler)
+                        .with_for_update()
+                    )
+                ).first()
+                if fencing_token is not None and state and state.token > fencing_token:
+                    raise StaleFencingTokenError(fencing_token)
+                last_bucket = state.last_bucket if state else None
+                await session.execute(tick)
+                due_chats = or_(
+                    User.notification_mode == NotificationMode.IMMEDIATE.value,
+                    and_(
+                        User.notification_mode == NotificationMode.DIGEST.value,
+                        User.digest_time.in_(due_digest_buckets(last_bucket, digest_bucket)),
+                    ),
+                )
+                result = await session.execute(
+                    delete(PendingUpdate)
+                    .where(PendingUpdate.tg_chat_id == User.tg_chat_id)
+                    .where(due_chats)
+                    .returning(
+                        PendingUpdate.id,
+                        PendingUpdate.link_id,
+                        PendingUpdate.url,
+                        PendingUpdate.tg_chat_id,
+                        User.notification_mode,
+                        PendingUpdate.description,
+                        PendingUpdate.title,
+                        PendingUpdate.user_name,
+                        PendingUpdate.event_at,
+                        PendingUpdate.preview,
+                        User.timezone,
+                    )
+                )
+                rows = result.mappings().all()
 
-                link_id = user_link_to_remove.link_id
-                tags = user_link_to_remove.tags or []
-                filters = user_link_to_remove.filters or []
+        return [PendingEvent(**row) for row in rows]
+
+    async def accept_fencing_token(self, name: str, token: int) -> bool:
+        """
+        Принимает fencing-токен лидера, если он не старше последнего увиденного.
+        Запросы бывшего лидера с устаревшим токеном отклоняются
+        """
+        stmt = insert(SchedulerFencing).values(name=name, token=token)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SchedulerFencing.name],
+            set_={"token": stmt.excluded.token},
+            where=SchedulerFencing.token <= stmt.excluded.token,
+        ).returning(SchedulerFencing.token)
 
-                await session.delete(user_link_to_remove)
-                return link_id, tags, filters
+        factory = self._get_session_factory()
+        async with factory() as session:
+            async with session.begin():
+                result = await session.execute(stmt)
+                return result.scalar_one_or_none() is not None
 
-    async def check_updates_for_all_users(self) -> list[LinkUpdate]:
+    async def check_updates_for_all_users(
+        self, shard_index: int = 0, shard_count: int = 1
+    ) -> list[LinkUpdate]:
+        """
+        Проверяет обновления пакетами по BATCH_SIZE ссылок.
+        Воркер с шардом shard_index из shard_count проверяет только ссылки,
+        у которых links.id % shard_count == shard_index. Ссылки с webhook
+        опрашиваются, только если событий не было дольше PUSH_FED_POLL_SECONDS.
+        Пакеты идут по ключу links.id, а не по OFFSET: сохранение состояния
+        пакета меняет checked_at и выводит ссылки из выборки, из-за чего OFFSET
+        перескакивал бы через непроверенные ссылки. Состояние каждой ссылки
+        запрашивается и сохраняется один раз за цикл, а затем раздаётся всем её
+        подписчикам
+        """
         updates = []
-        offset = 0
+        push_fed_before = func.now() - timedelta(seconds=PUSH_FED_POLL_SECONDS)
+        after: int | None = None
         factory = self._get_session_factory()
 
         while True:
             async with factory() as session:
-                result = await session.execute(
-                    select(User)
-                    .options(selectinload(User.user_links).selectinload(UserLink.link))
-                    .offset(offset)
+                query = (
+                    select(Link)
+                    .options(lazyload(Link.user_links))
+                    .where(
+                        Link.id % shard_count == shard_index,
+                        or_(
+                            Link.push_fed.is_(False),
+                            Link.checked_at.is_(None),
+                            Link.checked_at < push_fed_before,
+                        ),
+                        Link.user_links.any(),
+                    )
+                    .order_by(Link.id)
                     .limit(self.BATCH_SIZE)
                 )
-                users = result.scalars().all()
+                if after is not None:
+                    query = query.where(Link.id > after)
+                links = (await session.execute(query)).unique().scalars().all()
 
-                if not users:
+                if not links:
                     break
+                after = links[-1].id
+
+                link_states = await self.fetch_link_states(
+                    {link.id: self._tracked_link(link) for link in links}
+                )
+                await self.save_link_states(link_states)
+
+                # все подписчики ссылок пакета получают одно и то же состояние
+                result = await session.execute(
+                    select(UserLink)
+                    .where(UserLink.link_id.in_(link_states.keys()))
+                    .order_by(UserLink.link_id, UserLink.user_id)
+                )
+                user_links = result.unique().scalars().all()
 
                 tasks = [
-                    asyncio.create_task(self._process_user_link(ul))
-                    for user in users
-                    for ul in user.user_links
-                    if ul.link
+                    asyncio.create_task(
+                        self._process_user_link(ul, link_states[ul.link_id].events)
+                    )
+                    for ul in user_links
                 ]
 
-                batch_results = await asyncio.gather(*tasks)
+                for link_updates in await asyncio.gather(*tasks):
+                    updates.extend(link_updates)
+
+        return updates
 
-                # Отфильтровываем None (если обновлений не было)
-                updates.extend([res for res in batch_results if res is not None])
+    @staticmethod
+    async def fetch_link_states(
+        links: dict[int, TrackedLink],
+    ) -> dict[int, LinkCheckResult]:
+        """
+        Запрашивает во внешнем API события каждой ссылки новее её водяного знака
+        :param links: id ссылки -> цель, разобранная при добавлении, и водяной знак
+        :return:
+        """
+        return await provider_registry.fetch_updates(links)
 
-            offset += self.BATCH_SIZE
+    @staticmethod
+    def _tracked_link(link: Link) -> TrackedLink:
+        target = target_from_columns(link.provider, link.owner, link.repo, link.kind, link.number)
+        return TrackedLink(target, link.watermark, frozenset(link.watermark_ids))
 
-        return updates
+    async def save_link_states(self, link_states: dict[int, LinkCheckResult]) -> None:
+        """
+        Сохраняет время проверки ссылок, водяные знаки и последние найденные события.
+        Водяной знак только растет: результат запроса, начатого раньше, его не откатит
+        """
+        if not link_states:
+            return
+        factory = self._get_session_factory()
+        async with factory() as session:
+            async with session.begin():
+                for link_id, state in link_states.items():
+                    values = {"checked_at": func.now()}
+                    if state.watermark is not None:
+                        values["watermark"] = func.greatest(Link.watermark, state.watermark)
+                        values["watermark_ids"] = self._merge_seen_ids(state)
+                    if state.last_event is not None:
+                        values["last_update_at"] = func.now()
+                        values["last_event"] = state.last_event.model_dump(mode="json")
+                    await session.execute(update(Link).where(Link.id == link_id).values(**values))
 
     @staticmethod
-    async def _process_user_link(ul: UserLink) -> LinkUpdate | None:
-        update_info = await check_last_update(ul.link.link_url)
-        # если есть фильтры, значит ссылку нужно пропускать только если она проходит фильтр
+    def _merge_seen_ids(state: LinkCheckResult) -> ColumnElement[list[str]]:
+        """
+        id событий момента водяного знака: при том же знаке объединяются с сохраненными,
+        при более новом заменяют их, более старый знак их не меняет
+        """
+        seen_ids = cast(sorted(state.seen_ids), ARRAY(Text))
+        merged = func.array(
+            select(func.unnest(Link.watermark_ids.op("||")(seen_ids)))
+            .distinct()
+            .correlate(Link)
+            .scalar_subquery()
+        )
+        return case(
+            (Link.watermark == state.watermark, merged),
+            (or_(Link.watermark.is_(None), Link.watermark < state.watermark), seen_ids),
+            else_=Link.watermark_ids,
+        )
+
+    async def mark_push_fed_links(self, targets: list[LinkTarget]) -> dict[int, TrackedLink]:
+        """
+        Находит ссылки с данными целями и помечает их как получающие события через webhook
+        :param targets:
+        :return: id ссылки -> цель и водяной знак
+        """
+        if not targets:
+            return {}
+        stmt = (
+            update(Link)
+            .where(or_(*(self._target_condition(target) for target in targets)))
+            .values(push_fed=True)
+            .returning(
+                Link.id,
+                Link.provider,
+                Link.owner,
+                Link.repo,
+                Link.kind,
+                Link.number,
+                Link.watermark,
+                Link.watermark_ids,
+            )
+        )
 
-        if update_info and (not ul.filters or update_info.user_name in ul.filters):
-            return LinkUpdate(
+        factory = self._get_session_factory()
+        async with factory() as session:
+            async with session.begin():
+                rows = (await session.execute(stmt)).all()
+        return {
+            link_id: TrackedLink(target_from_columns(*columns), watermark, frozenset(seen_ids))
+            for link_id, *columns, watermark, seen_ids in rows
+        }
+
+    async def build_link_updates(
+        self, link_events: dict[int, list[UpdateInfo]]
+    ) -> list[LinkUpdate]:
+        """
+        Обновления подписчиков ссылок по уже найденным событиям, с учетом фильтров подписок
+        :param link_events: id ссылки -> события от старых к новым
+        :return:
+        """
+        if not link_events:
+            return []
+        factory = self._get_session_factory()
+        async with factory() as session:
+            result = await session.execute(
+                select(UserLink).where(UserLink.link_id.in_(list(link_events)))
+            )
+            user_links = result.unique().scalars().all()
+
+            updates = []
+            for ul in user_links:
+                updates.extend(await self._process_user_link(ul, link_events[ul.link_id]))
+        return updates
+
+    @staticmethod
+    async def _process_user_link(ul: UserLink, events: list[UpdateInfo]) -> list[LinkUpdate]:
+        # если есть фильтры, событие пропускается, только если его автор проходит фильтр
+        return [
+            LinkUpdate(
                 id=ul.link_id,
                 url=ul.link.link_url,
-                description=await make_description(update_info),
+                description=await make_description(update_info, ul.user.timezone),
                 tg_chat_id=ul.user_id,
+                update_info=update_info,
             )
-
-        return None
-
-    async def get_updates_for_one_user_by_tags(
-        self, tg_chat_id: int, tags: list[str]
+            for update_info in events
+            if not ul.filters or update_info.user_name in ul.filters
+        ]
+
+    async def get_user_updates(
+        self,
+        tg_chat_id: int,
+        since: datetime,
+        tags: list[str] | None = None,
+        limit: int = 100,
     ) -> list[LinkUpdate]:
+        """
+        Обновления пользователя из сохраненного состояния ссылок, без запросов
+        во внешние API: события новее since с учетом тегов и фильтров подписки
+        """
+        query = (
+            select(UserLink.link_id, Link.link_url, Link.last_event, User.timezone)
+            .join(Link, UserLink.link_id == Link.id)
+            .join(User, UserLink.user_id == User.tg_chat_id)
+            .where(
+                UserLink.user_id == tg_chat_id,
+                Link.last_update_at > since,
+                or_(
+                    UserLink.filters.is_(None),
+                    func.cardinality(UserLink.filters) == 0,
+                    Link.last_event["user_name"].astext == any_(UserLink.filters),
+                ),
+            )
+            .order_by(Link.last_update_at.desc())
+            .limit(limit)
+        )
+        if tags:
+            query = query.where(UserLink.tags.overlap(tags))
+
         factory = self._get_session_factory()
         async with factory() as session:
-            result = await session.execute(
-                select(UserLink)
-                .options(selectinload(UserLink.link))
-                .where(UserLink.user_id == tg_chat_id, UserLink.tags.overlap(tags))
+            rows = (await session.execute(query)).all()
+
+        updates = []
+        for link_id, link_url, last_event, timezone in rows:
+            update_info = UpdateInfo.model_validate(last_event)
+            updates.append(
+                LinkUpdate(
+                    id=link_id,
+                    url=link_url,
+                    description=await make_description(update_info, timezone),
+                    tg_chat_id=tg_chat_id,
+                    update_info=update_info,
+                )
             )
-            links = result.unique().scalars().all()
+        return updates
+
+    async def get_stale_user_links(
+        self,
+        tg_chat_id: int,
+        tags: list[str] | None,
+        stale_before: datetime,
+        limit: int,
+    ) -> dict[int, TrackedLink]:
+        """
+        Ссылки пользователя, которые не проверялись с момента stale_before,
+        начиная с самых давно проверенных
+        """
+        query = (
+            select(
+                Link.id,
+                Link.provider,
+                Link.owner,
+                Link.repo,
+                Link.kind,
+                Link.number,
+                Link.watermark,
+                Link.watermark_ids,
+            )
+            .join(UserLink, UserLink.link_id == Link.id)
+            .where(
+                UserLink.user_id == tg_chat_id,
+                or_(Link.checked_at.is_(None), Link.checked_at < stale_before),
+            )
+            .order_by(Link.checked_at.asc().nulls_first())
+            .limit(limit)
+        )
+        if tags:
+            query = query.where(UserLink.tags.overlap(tags))
 
-            coros = (self._process_user_link(ul) for ul in links if ul.link)
-            results = await asyncio.gather(*coros)
-            return [upd for upd in results if upd is not None]
+        factory = self._get_session_factory()
+        async with factory() as session:
+            rows = (await session.execute(query)).all()
+        return {
+            link_id: TrackedLink(target_from_columns(*columns), watermark, frozenset(seen_ids))
+            for link_id, *columns, watermark, seen_ids in rows
+        }
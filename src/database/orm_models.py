@@ -1,5 +1,7 @@
-from sqlalchemy import BigInteger, Integer, Text, ForeignKey
-from sqlalchemy.dialects.postgresql import ARRAY
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, Integer, SmallInteger, Text, ForeignKey, func, text
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.orm import DeclarativeBase
 
@@ -12,6 +14,16 @@ class User(Base):  # type: ignore[misc]
     __tablename__ = "users"
 
     tg_chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    notification_mode: Mapped[str] = mapped_column(
+        Text, nullable=False, default="immediate", server_default="immediate"
+    )
+    digest_time: Mapped[int] = mapped_column(
+        SmallInteger, nullable=False, default=1200, server_default="1200"
+    )
+    # часовой пояс IANA, в котором пользователю выводятся даты событий
+    timezone: Mapped[str] = mapped_column(
+        Text, nullable=False, default="Europe/Moscow", server_default="Europe/Moscow"
+    )
     user_links: Mapped[list["UserLink"]] = relationship(
         "UserLink",
         back_populates="user",
@@ -22,9 +34,32 @@ class User(Base):  # type: ignore[misc]
 
 class Link(Base):  # type: ignore[misc]
     __tablename__ = "links"
+    __table_args__ = (Index("ix_links_target", "provider", "owner", "repo", "kind", "number"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     link_url: Mapped[str] = mapped_column(Text, unique=True, nullable=False)
+    # состояние ссылки после последней проверки, из него отдаются обновления пользователю
+    checked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_update_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True, index=True
+    )
+    last_event: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    # цель ссылки, разобранная один раз при добавлении (src/api/scrapper_api/link_target.py)
+    provider: Mapped[str | None] = mapped_column(Text, nullable=True)
+    owner: Mapped[str | None] = mapped_column(Text, nullable=True)
+    repo: Mapped[str | None] = mapped_column(Text, nullable=True)
+    kind: Mapped[str | None] = mapped_column(Text, nullable=True)
+    number: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    # момент самого нового уже найденного события, с него начинается следующая проверка
+    watermark: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # id уже найденных событий, созданных ровно в момент водяного знака
+    watermark_ids: Mapped[list[str]] = mapped_column(
+        ARRAY(Text), nullable=False, default=list, server_default="{}"
+    )
+    # события ссылки приходят через webhook, цикл проверки её не опрашивает
+    push_fed: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default="false"
+    )
     user_links: Mapped[list["UserLink"]] = relationship(
         "UserLink",
         back_populates="link",
@@ -47,3 +82,53 @@ class UserLink(Base):  # type: ignore[misc]
 
     user: Mapped["User"] = relationship("User", back_populates="user_links", lazy="joined")
     link: Mapped["Link"] = relationship("Link", back_populates="user_links", lazy="joined")
+
+
+
+class PendingUpdate(Base):  # type: ignore[misc]
+    __tablename__ = "pending_updates"
+    __table_args__ = (
+        Index(
+            "uq_pending_updates_event",
+            "tg_chat_id",
+            "link_id",
+            "event_id",
+            unique=True,
+            postgresql_where=text("event_id IS NOT NULL"),
+        ),
+        # события без id провайдера отличаются только описанием
+        Index(
+            "uq_pending_updates_description",
+            "tg_chat_id",
+            "link_id",
+            func.md5(text("description")),
+            unique=True,
+            postgresql_where=text("event_id IS NULL"),
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    tg_chat_id: Mapped[int] = mapped_column(
+        BigInteger, ForeignKey("users.tg_chat_id", ondelete="CASCADE"), index=True
+    )
+    link_id: Mapped[int] = mapped_column(Integer, ForeignKey("links.id", ondelete="CASCADE"))
+    url: Mapped[str] = mapped_column(Text, nullable=False)
+    description: Mapped[str] = mapped_column(Text, nullable=False)
+    event_id: Mapped[str | None] = mapped_column(Text, nullable=True)
+    title: Mapped[str] = mapped_column(Text, nullable=False, default="", server_default="")
+    user_name: Mapped[str] = mapped_column(Text, nullable=False, default="", server_default="")
+    # момент самого события, created_at - момент постановки в очередь
+    event_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    preview: Mapped[str] = mapped_column(Text, nullable=False, default="", server_default="")
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class SchedulerFencing(Base):  # type: ignore[misc]
+    __tablename__ = "scheduler_fencing"
+
+    name: Mapped[str] = mapped_column(Text, primary_key=True)
+    token: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # корзина последнего тика: следующий тик забирает и пропущенные корзины дайджеста
+    last_bucket: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
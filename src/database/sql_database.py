@@ -1,15 +1,42 @@
 import asyncpg
+from datetime import datetime
 
-from src.api.schemas.schemas import AddLinkRequest, LinkResponse
+from src.api.schemas.schemas import AddLinkRequest, LinkResponse, NotificationMode, PendingEvent
 from src.api.utils.string_makers import make_description
-from src.api.schemas.schemas import LinkUpdate
-from src.api.scrapper_api.utils_scrapper_api import check_last_update
-from typing import Any, Optional, cast
+from src.api.schemas.schemas import LinkUpdate, UpdateInfo
+from src.api.providers.base import LinkCheckResult, TrackedLink
+from src.api.scrapper_api.link_target import (
+    LinkTarget,
+    classify_url,
+    stored_url_variants,
+    target_columns,
+    target_from_columns,
+)
+from src.api.scrapper_api.link_state import PUSH_FED_POLL_SECONDS
+from src.api.scrapper_api.notification_scheduler import (
+    SCHEDULER_LEASE_NAME,
+    StaleFencingTokenError,
+    due_digest_buckets,
+)
+from src.initialization.providers_init import provider_registry
+from src.api.utils.tracing import trace_asyncpg_query
+from typing import Optional, cast
 from logger.logger_init import logger
 import asyncio
 
-user_states: dict[int, Any] = {}  # храним состояния пользователей
-user_data: dict[str, Any] = {}  # храним текущие данные пользователя
+# Строка links для ссылки пользователя ($2-$7 - _link_match_args): по разобранной цели,
+# а для неразобранных ссылок - по написанию. Так находятся и строки, записанные
+# до канонизации, у которых link_url отличается от канонического
+LINK_MATCH_CONDITION = """
+    (
+        l.provider = $2
+        AND l.owner IS NOT DISTINCT FROM $3
+        AND l.repo IS NOT DISTINCT FROM $4
+        AND l.kind = $5
+        AND l.number IS NOT DISTINCT FROM $6
+    )
+    OR l.link_url = ANY($7::TEXT[])
+"""
 
 
 class SqlDbProcessor:
@@ -39,9 +66,23 @@ class SqlDbProcessor:
 
     async def connect(self):
         """Создает пул подключений"""
-        self.pool = await asyncpg.create_pool(self.db_url)
+        self.pool = await asyncpg.create_pool(self.db_url, init=self._init_connection)
         logger.info("Соединение с БД успешно установлено")
 
+    @staticmethod
+    async def _init_connection(conn: asyncpg.Connection) -> None:
+        # каждый запрос нового соединения пула попадает в трассу как спан
+        conn.add_query_logger(trace_asyncpg_query)
+
+    def pool_usage(self) -> dict[str, int]:
+        """
+        Соединения пула: всего открыто, занято запросами и свободно
+        """
+        if not self.pool:
+            return {"size": 0, "in_use": 0, "idle": 0}
+        size, idle = self.pool.get_size(), self.pool.get_idle_size()
+        return {"size": size, "in_use": size - idle, "idle": idle}
+
     async def close(self):
         if self.pool:
             await self.pool.close()
@@ -83,7 +124,12 @@ class SqlDbProcessor:
             )
 
     async def add_link_for_user(self, tg_chat_id: int, add_link: AddLinkRequest) -> int:
-        """Добавляет ссылку пользователю, если её ещё нет"""
+        """
+        Добавляет ссылку пользователю, если её ещё нет.
+        Ссылка разбирается один раз здесь: хранится её каноническая форма и цель
+        """
+        target = classify_url(add_link.url)
+        link_url = target.canonical_url if target else add_link.url
         if not self.pool:
             raise RuntimeError("Connection pool is not initialized. Call connect() first.")
         async with self.pool.acquire() as conn:
@@ -95,37 +141,51 @@ class SqlDbProcessor:
                 if not user_exists:
                     raise ValueError(f"Пользователь {tg_chat_id} не зарегистрирован")
 
-                # Проверяем, существует ли ссылка
-                link_id = await conn.fetchval(
-                    "SELECT id FROM links WHERE link_url = $1", add_link.url
+                # Ищем ссылку по цели, в том числе среди записанных до канонизации
+                link_rows = await conn.fetch(
+                    f"""
+                    SELECT l.id,
+                           EXISTS (
+                               SELECT 1 FROM user_links AS ul
+                               WHERE ul.user_id = $1 AND ul.link_id = l.id
+                           ) AS tracked
+                    FROM links AS l
+                    WHERE {LINK_MATCH_CONDITION}
+                    ORDER BY tracked DESC, l.id
+                    """,
+                    tg_chat_id,
+                    *self._link_match_args(add_link.url),
                 )
 
+                # Проверяем, отслеживает ли пользователь уже эту ссылку
+                if link_rows and link_rows[0]["tracked"]:
+                    raise ValueError(
+                        f"Пользователь {tg_chat_id} уже отслеживает ссылку {add_link.url}"
+                    )
+                link_id = link_rows[0]["id"] if link_rows else None
+
                 # Если ссылки нет, создаем новую
                 if not link_id:
+                    columns = target_columns(target)
                     link_id = await conn.fetchval(
                         """
-                        INSERT INTO links (link_url) VALUES ($1) 
-                        ON CONFLICT (link_url) DO NOTHING 
+                        INSERT INTO links (link_url, provider, owner, repo, kind, number)
+                        VALUES ($1, $2, $3, $4, $5, $6)
+                        ON CONFLICT (link_url) DO NOTHING
                         RETURNING id
                         """,
-                        add_link.url,
+                        link_url,
+                        columns["provider"],
+                        columns["owner"],
+                        columns["repo"],
+                        columns["kind"],
+                        columns["number"],
                     )
 
                 # Здесь link_id может быть None, если почему-то не вернулся id
                 if not link_id:
                     raise RuntimeError("Failed to insert or find link_id")
 
-                # Проверяем, отслеживает ли пользователь уже эту ссылку
-                tracking_exists = await conn.fetchval(
-                    "SELECT 1 FROM user_links WHERE user_id = $1 AND link_id = $2",
-                    tg_chat_id,
-                    link_id,
-                )
-                if tracking_exists:
-                    raise ValueError(
-                        f"Пользователь {tg_chat_id} уже отслеживает ссылку {add_link.url}"
-                    )
-
                 await conn.execute(
                     """
                     INSERT INTO user_links (user_id, link_id, tags, filters)
@@ -139,20 +199,40 @@ class SqlDbProcessor:
 
                 return cast(int, link_id)  # Возвращаем ID ссылки
 
-    async def get_user_links(self, tg_chat_id: int) -> list[LinkResponse]:
-        """Возвращает все ссылки пользователя"""
+    async def get_user_links(
+        self,
+        tg_chat_id: int,
+        limit: int | None = None,
+        after_id: int | None = None,
+        before_id: int | None = None,
+    ) -> list[LinkResponse]:
+        """
+        Возвращает ссылки пользователя по возрастанию id.
+        Keyset-пагинация по первичному ключу (user_id, link_id): страница после after_id
+        или, при before_id, последние limit ссылок перед ним. Без limit - все ссылки
+        """
         if not self.pool:
             raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        order = "DESC" if before_id is not None else "ASC"
         async with self.pool.acquire() as conn:
             links = await conn.fetch(
-                """
+                f"""
                 SELECT user_links.link_id, links.link_url, user_links.tags, user_links.filters
                 FROM user_links
                 JOIN links ON user_links.link_id = links.id
-                WHERE user_links.user_id = $1;
+                WHERE user_links.user_id = $1
+                  AND ($2::INTEGER IS NULL OR user_links.link_id > $2)
+                  AND ($3::INTEGER IS NULL OR user_links.link_id < $3)
+                ORDER BY user_links.link_id {order}
+                LIMIT $4;
                 """,
                 tg_chat_id,
+                after_id,
+                before_id,
+                limit,
             )
+            if before_id is not None:
+                links = list(reversed(links))
 
             return [
                 LinkResponse(
@@ -180,119 +260,491 @@ class SqlDbProcessor:
     async def remove_user_link(
         self, tg_chat_id: int, link_url: str
     ) -> tuple[int, list[str], list[str]] | None:
+        """
+        Удаляет подписку пользователя на ссылку в любом её написании. Если ссылка
+        записана и до канонизации, и после, удаляются обе подписки
+        """
         if not self.pool:
             raise RuntimeError("Connection pool is not initialized. Call connect() first.")
         async with self.pool.acquire() as conn:
-            async with conn.transaction():
-                link_data = await conn.fetchrow(
-                    "SELECT id, link_url FROM links WHERE link_url = $1", link_url
-                )
+            rows = await conn.fetch(
+                f"""
+                DELETE FROM user_links AS ul
+                USING links AS l
+                WHERE ul.link_id = l.id
+                  AND ul.user_id = $1
+                  AND ({LINK_MATCH_CONDITION})
+                RETURNING ul.link_id, ul.tags, ul.filters
+                """,
+                tg_chat_id,
+                *self._link_match_args(link_url),
+            )
 
-                if not link_data:
-                    return None
+        if not rows:
+            return None
+        row = min(rows, key=lambda row: row["link_id"])
+        return row["link_id"], row["tags"], row["filters"]
 
-                link_id = link_data["id"]
+    @staticmethod
+    def _link_match_args(url: str) -> list:
+        """
+        Параметры $2-$7 для LINK_MATCH_CONDITION
+        :param url:
+        :return:
+        """
+        columns = target_columns(classify_url(url))
+        return [
+            columns["provider"],
+            columns["owner"],
+            columns["repo"],
+            columns["kind"],
+            columns["number"],
+            stored_url_variants(url),
+        ]
 
-                user_link_data = await conn.fetchrow(
-                    "SELECT tags, filters FROM user_links WHERE user_id = $1 AND link_id = $2",
-                    tg_chat_id,
-                    link_id,
-                )
+    async def set_notification_settings(
+        self, tg_chat_id: int, mode: NotificationMode, digest_bucket: int
+    ) -> bool:
+        """Сохраняет режим уведомлений и корзину дайджеста чата"""
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        async with self.pool.acquire() as conn:
+            status = await conn.execute(
+                """
+                UPDATE users SET notification_mode = $2, digest_time = $3
+                WHERE tg_chat_id = $1
+                """,
+                tg_chat_id,
+                mode.value,
+                digest_bucket,
+            )
+            return status != "UPDATE 0"
 
-                if not user_link_data:
-                    return None
+    async def set_timezone(self, tg_chat_id: int, timezone: str) -> bool:
+        """Сохраняет часовой пояс, в котором чату выводятся даты событий"""
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        async with self.pool.acquire() as conn:
+            status = await conn.execute(
+                "UPDATE users SET timezone = $2 WHERE tg_chat_id = $1",
+                tg_chat_id,
+                timezone,
+            )
+            return status != "UPDATE 0"
 
-                tags, filters = user_link_data["tags"], user_link_data["filters"]
+    async def save_pending_updates(self, updates: list[LinkUpdate]) -> None:
+        """Откладывает обновления до отправки, повторы одного события игнорируются"""
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                """
+                INSERT INTO pending_updates (
+                    tg_chat_id, link_id, url, description,
+                    title, user_name, event_at, preview, event_id
+                )
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                ON CONFLICT DO NOTHING
+                """,
+                [
+                    (
+                        upd.tg_chat_id,
+                        upd.id,
+                        upd.url,
+                        upd.description,
+                        *(
+                            (
+                                upd.update_info.title,
+                                upd.update_info.user_name,
+                                upd.update_info.created_at,
+                                upd.update_info.preview,
+                                upd.update_info.event_id,
+                            )
+                            if upd.update_info
+                            else ("", "", None, "", None)
+                        ),
+                    )
+                    for upd in updates
+                ],
+            )
 
+    async def pop_due_updates(
+        self,
+        digest_bucket: int,
+        scheduler: str = SCHEDULER_LEASE_NAME,
+        fencing_token: int | None = None,
+    ) -> list[PendingEvent]:
+        """
+        Забирает обновления чатов с мгновенным режимом и чатов, у которых с прошлого
+        тика планировщика scheduler наступила корзина дайджеста.
+        Fencing-токен проверяется под блокировкой строки планировщика в той же транзакции:
+        устаревший токен - StaleFencingTokenError, и очередь не трогается
+        """
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                state = await conn.fetchrow(
+                    "SELECT token, last_bucket FROM scheduler_fencing WHERE name = $1 FOR UPDATE",
+                    scheduler,
+                )
+                if fencing_token is not None and state and state["token"] > fencing_token:
+                    raise StaleFencingTokenError(fencing_token)
+                last_bucket = state["last_bucket"] if state else None
                 await conn.execute(
-                    "DELETE FROM user_links WHERE user_id = $1 AND link_id = $2",
-                    tg_chat_id,
-                    link_id,
+                    """
+                    INSERT INTO scheduler_fencing (name, token, last_bucket) VALUES ($1, $3, $2)
+                    ON CONFLICT (name) DO UPDATE
+                    SET last_bucket = EXCLUDED.last_bucket,
+                        token = GREATEST(scheduler_fencing.token, EXCLUDED.token)
+                    """,
+                    scheduler,
+                    digest_bucket,
+                    fencing_token or 0,
+                )
+                rows = await conn.fetch(
+                    """
+                    DELETE FROM pending_updates AS p
+                    USING users AS u
+                    WHERE p.tg_chat_id = u.tg_chat_id
+                      AND (u.notification_mode = $1
+                           OR (u.notification_mode = $2 AND u.digest_time = ANY($3::INT[])))
+                    RETURNING p.id, p.link_id, p.url, p.tg_chat_id, u.notification_mode,
+                              p.description, p.title, p.user_name, p.event_at, p.preview,
+                              u.timezone
+                    """,
+                    NotificationMode.IMMEDIATE.value,
+                    NotificationMode.DIGEST.value,
+                    due_digest_buckets(last_bucket, digest_bucket),
                 )
 
-                return link_id, tags, filters
+        return [PendingEvent(**dict(row)) for row in rows]
 
-    async def check_updates_for_all_users(self) -> list[LinkUpdate]:
-        """Проверяет обновления для всех пользователей пакетами по 500 записей параллельно"""
+    async def accept_fencing_token(self, name: str, token: int) -> bool:
+        """
+        Принимает fencing-токен лидера, если он не старше последнего увиденного.
+        Запросы бывшего лидера с устаревшим токеном отклоняются
+        """
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        async with self.pool.acquire() as conn:
+            accepted = await conn.fetchval(
+                """
+                INSERT INTO scheduler_fencing (name, token) VALUES ($1, $2)
+                ON CONFLICT (name) DO UPDATE SET token = EXCLUDED.token
+                WHERE scheduler_fencing.token <= EXCLUDED.token
+                RETURNING token
+                """,
+                name,
+                token,
+            )
+            return accepted is not None
+
+    async def check_updates_for_all_users(
+        self, shard_index: int = 0, shard_count: int = 1
+    ) -> list[LinkUpdate]:
+        """
+        Проверяет обновления для всех пользователей пакетами по 500 записей параллельно.
+        Воркер с шардом shard_index из shard_count проверяет только ссылки,
+        у которых links.id % shard_count == shard_index. Ссылки с webhook
+        опрашиваются, только если событий не было дольше PUSH_FED_POLL_SECONDS.
+        Строки идут по links.id, поэтому подписчики одной ссылки стоят подряд, и её
+        состояние запрашивается один раз за цикл, даже если подписчики попали
+        в разные пакеты
+        """
         if not self.pool:
             raise RuntimeError("Connection pool is not initialized. Call connect() first.")
         async with self.pool.acquire() as conn:
             async with conn.transaction():
                 cursor = await conn.cursor(
                     """
-                    SELECT user_links.user_id, user_links.link_id, links.link_url, user_links.filters
+                    SELECT user_links.user_id, user_links.link_id, links.link_url,
+                           user_links.filters, links.provider, links.owner, links.repo,
+                           links.kind, links.number, links.watermark, links.watermark_ids,
+                           users.timezone
                     FROM user_links
                     JOIN links ON user_links.link_id = links.id
+                    JOIN users ON user_links.user_id = users.tg_chat_id
+                    WHERE links.id % $2 = $1
+                      AND (
+                          NOT links.push_fed
+                          OR links.checked_at IS NULL
+                          OR links.checked_at < now() - make_interval(secs => $3)
+                      )
+                    ORDER BY links.id, user_links.user_id
                     """,
+                    shard_index,
+                    shard_count,
+                    PUSH_FED_POLL_SECONDS,
                 )
 
                 updates = []
+                link_states: dict[int, LinkCheckResult] = {}
 
                 while True:
                     rows = await cursor.fetch(self.BATCH_SIZE)
                     if not rows:
                         break
 
-                    # Создаем задачи для обработки каждой ссылки
+                    # Каждая ссылка запрашивается один раз, сколько бы у неё ни было
+                    # подписчиков, а результат сохраняется как состояние ссылки
+                    new_states = await self.fetch_link_states(
+                        {
+                            row["link_id"]: self._tracked_link(row)
+                            for row in rows
+                            if row["link_id"] not in link_states
+                        }
+                    )
+                    await self.save_link_states(new_states)
+                    link_states.update(new_states)
+
                     tasks = [
                         self._process_user_link(
-                            row["user_id"], row["link_id"], row["link_url"], row["filters"] or []
+                            row["user_id"],
+                            row["link_id"],
+                            row["link_url"],
+                            row["filters"] or [],
+                            link_states[row["link_id"]].events,
+                            row["timezone"],
                         )
                         for row in rows
                     ]
 
-                    batch_results = await asyncio.gather(*tasks)
-                    updates.extend([res for res in batch_results if res is not None])
+                    for link_updates in await asyncio.gather(*tasks):
+                        updates.extend(link_updates)
+
+                    # подписчики следующего пакета могут относиться только к последней ссылке
+                    last_link_id = rows[-1]["link_id"]
+                    link_states = {last_link_id: link_states[last_link_id]}
 
                 return updates
 
+    @staticmethod
+    async def fetch_link_states(
+        links: dict[int, TrackedLink],
+    ) -> dict[int, LinkCheckResult]:
+        """
+        Запрашивает во внешнем API события каждой ссылки новее её водяного знака
+        :param links: id ссылки -> цель, разобранная при добавлении, и водяной знак
+        :return:
+        """
+        return await provider_registry.fetch_updates(links)
+
+    @staticmethod
+    def _tracked_link(row: asyncpg.Record) -> TrackedLink:
+        target = target_from_columns(
+            row["provider"], row["owner"], row["repo"], row["kind"], row["number"]
+        )
+        return TrackedLink(target, row["watermark"], frozenset(row["watermark_ids"]))
+
+    async def save_link_states(self, link_states: dict[int, LinkCheckResult]) -> None:
+        """
+        Сохраняет время проверки ссылок, водяные знаки и последние найденные события.
+        Водяной знак только растет: результат запроса, начатого раньше, его не откатит
+        """
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        if not link_states:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.executemany(
+                """
+                UPDATE links
+                SET checked_at = now(),
+                    last_update_at = CASE WHEN $2::JSONB IS NULL THEN last_update_at ELSE now() END,
+                    last_event = COALESCE($2::JSONB, last_event),
+                    watermark = GREATEST(watermark, $3),
+                    -- тот же знак дополняет id его момента, более новый их заменяет
+                    watermark_ids = CASE
+                        WHEN $3 = watermark
+                            THEN ARRAY(SELECT DISTINCT unnest(watermark_ids || $4::TEXT[]))
+                        WHEN $3 > watermark OR watermark IS NULL THEN $4::TEXT[]
+                        ELSE watermark_ids
+                    END
+                WHERE id = $1
+                """,
+                [
+                    (
+                        link_id,
+                        state.last_event.model_dump_json() if state.last_event else None,
+                        state.watermark,
+                        sorted(state.seen_ids),
+                    )
+                    for link_id, state in link_states.items()
+                ],
+            )
+
+    async def mark_push_fed_links(self, targets: list[LinkTarget]) -> dict[int, TrackedLink]:
+        """
+        Находит ссылки с данными целями и помечает их как получающие события через webhook
+        :param targets:
+        :return: id ссылки -> цель и водяной знак
+        """
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        if not targets:
+            return {}
+        columns = [target_columns(target) for target in targets]
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                UPDATE links AS l
+                SET push_fed = TRUE
+                FROM unnest($1::TEXT[], $2::TEXT[], $3::TEXT[], $4::TEXT[], $5::BIGINT[])
+                    AS t(provider, owner, repo, kind, number)
+                WHERE l.provider = t.provider
+                  AND l.owner IS NOT DISTINCT FROM t.owner
+                  AND l.repo IS NOT DISTINCT FROM t.repo
+                  AND l.kind = t.kind
+                  AND l.number IS NOT DISTINCT FROM t.number
+                RETURNING l.id, l.provider, l.owner, l.repo, l.kind, l.number, l.watermark,
+                          l.watermark_ids
+                """,
+                [column["provider"] for column in columns],
+                [column["owner"] for column in columns],
+                [column["repo"] for column in columns],
+                [column["kind"] for column in columns],
+                [column["number"] for column in columns],
+            )
+        return {row["id"]: self._tracked_link(row) for row in rows}
+
+    async def build_link_updates(
+        self, link_events: dict[int, list[UpdateInfo]]
+    ) -> list[LinkUpdate]:
+        """
+        Обновления подписчиков ссылок по уже найденным событиям, с учетом фильтров подписок
+        :param link_events: id ссылки -> события от старых к новым
+        :return:
+        """
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        if not link_events:
+            return []
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT ul.user_id, ul.link_id, l.link_url, ul.filters, u.timezone
+                FROM user_links AS ul
+                JOIN links AS l ON ul.link_id = l.id
+                JOIN users AS u ON ul.user_id = u.tg_chat_id
+                WHERE ul.link_id = ANY($1::INT[])
+                """,
+                list(link_events),
+            )
+        updates = []
+        for row in rows:
+            updates.extend(
+                await self._process_user_link(
+                    row["user_id"],
+                    row["link_id"],
+                    row["link_url"],
+                    row["filters"] or [],
+                    link_events[row["link_id"]],
+                    row["timezone"],
+                )
+            )
+        return updates
+
     @staticmethod
     async def _process_user_link(
         tg_chat_id: int,
         link_id: int,
         link_url: str,
         filters: list[str],
-    ) -> LinkUpdate | None:
-        update_info = await check_last_update(link_url)
-        if update_info and (not filters or update_info.user_name in filters):
-            descr = await make_description(update_info)
-            return LinkUpdate(
+        events: list[UpdateInfo],
+        timezone: str,
+    ) -> list[LinkUpdate]:
+        return [
+            LinkUpdate(
                 id=link_id,
                 url=link_url,
-                description=descr,
+                description=await make_description(update_info, timezone),
                 tg_chat_id=tg_chat_id,
+                update_info=update_info,
             )
+            for update_info in events
+            if not filters or update_info.user_name in filters
+        ]
 
-        return None
-
-    async def get_updates_for_one_user_by_tags(
-        self, tg_chat_id: int, tags: list[str]
+    async def get_user_updates(
+        self,
+        tg_chat_id: int,
+        since: datetime,
+        tags: list[str] | None = None,
+        limit: int = 100,
     ) -> list[LinkUpdate]:
+        """
+        Обновления пользователя из сохраненного состояния ссылок, без запросов
+        во внешние API: события новее since с учетом тегов и фильтров подписки
+        """
         if not self.pool:
             raise RuntimeError("Connection pool is not initialized. Call connect() first.")
-
         async with self.pool.acquire() as conn:
-            # Берём из user_links только те записи, у которых массив tags пересекается с заданным
             rows = await conn.fetch(
                 """
-                SELECT ul.user_id,
-                       ul.link_id,
-                       l.link_url,
-                       ul.filters
+                SELECT ul.link_id, l.link_url, l.last_event, u.timezone
                 FROM user_links AS ul
-                JOIN links AS l
-                  ON ul.link_id = l.id
+                JOIN links AS l ON ul.link_id = l.id
+                JOIN users AS u ON ul.user_id = u.tg_chat_id
                 WHERE ul.user_id = $1
-                  AND ul.tags && $2::text[]
+                  AND l.last_update_at > $2
+                  AND ($3::TEXT[] IS NULL OR ul.tags && $3::TEXT[])
+                  AND (
+                      cardinality(COALESCE(ul.filters, ARRAY[]::TEXT[])) = 0
+                      OR l.last_event->>'user_name' = ANY(ul.filters)
+                  )
+                ORDER BY l.last_update_at DESC
+                LIMIT $4
                 """,
                 tg_chat_id,
-                tags,
+                since,
+                tags or None,
+                limit,
             )
 
-        tasks = [
-            self._process_user_link(row["user_id"], row["link_id"], row["link_url"], [])
-            for row in rows
-        ]
-        results = await asyncio.gather(*tasks)
+        updates = []
+        for row in rows:
+            update_info = UpdateInfo.model_validate_json(row["last_event"])
+            updates.append(
+                LinkUpdate(
+                    id=row["link_id"],
+                    url=row["link_url"],
+                    description=await make_description(update_info, row["timezone"]),
+                    tg_chat_id=tg_chat_id,
+                    update_info=update_info,
+                )
+            )
+        return updates
 
-        return [upd for upd in results if upd is not None]
+    async def get_stale_user_links(
+        self,
+        tg_chat_id: int,
+        tags: list[str] | None,
+        stale_before: datetime,
+        limit: int,
+    ) -> dict[int, TrackedLink]:
+        """
+        Ссылки пользователя, которые не проверялись с момента stale_before,
+        начиная с самых давно проверенных
+        """
+        if not self.pool:
+            raise RuntimeError("Connection pool is not initialized. Call connect() first.")
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(
+                """
+                SELECT l.id, l.provider, l.owner, l.repo, l.kind, l.number, l.watermark,
+                       l.watermark_ids
+                FROM user_links AS ul
+                JOIN links AS l ON ul.link_id = l.id
+                WHERE ul.user_id = $1
+                  AND ($2::TEXT[] IS NULL OR ul.tags && $2::TEXT[])
+                  AND (l.checked_at IS NULL OR l.checked_at < $3)
+                ORDER BY l.checked_at NULLS FIRST
+                LIMIT $4
+                """,
+                tg_chat_id,
+                tags or None,
+                stale_before,
+                limit,
+            )
+        return {row["id"]: self._tracked_link(row) for row in rows}
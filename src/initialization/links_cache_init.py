@@ -0,0 +1,13 @@
+import os
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+from src.api.utils.links_cache import LinksCache
+
+load_dotenv()
+
+links_cache = LinksCache(
+    redis.from_url(os.getenv("REDIS_URL"), decode_responses=True),
+    ttl_seconds=int(os.getenv("LINKS_CACHE_TTL_SECONDS", "600")),
+    jitter_seconds=int(os.getenv("LINKS_CACHE_JITTER_SECONDS", "60")),
+)
@@ -1,5 +1,17 @@
 import os
+import redis.asyncio as redis
+from dotenv import load_dotenv
 
+from src.api.notification_api.leader_election import LeaderLease
 from src.api.notification_api.notification_service import NotificationService
+from src.api.scrapper_api.notification_scheduler import SCHEDULER_LEASE_NAME
+
+load_dotenv()
 
 notif_service = NotificationService(os.getenv("APP_MESSAGE_TRANSPORT"))
+
+leader_lease = LeaderLease(
+    redis.from_url(os.getenv("REDIS_URL"), decode_responses=True),
+    name=SCHEDULER_LEASE_NAME,
+    ttl_ms=int(os.getenv("LEADER_LEASE_TTL_MS", "15000")),
+)
@@ -0,0 +1,5 @@
+from src.api.providers.github import GitHubProvider
+from src.api.providers.registry import ProviderRegistry
+from src.api.providers.stackoverflow import StackOverflowProvider
+
+provider_registry = ProviderRegistry([GitHubProvider(), StackOverflowProvider()])
@@ -0,0 +1,13 @@
+import os
+from dotenv import load_dotenv
+
+from src.bot.scrapper_client import ScrapperApiClient
+
+load_dotenv()
+
+scrapper_client = ScrapperApiClient(
+    os.getenv("SCRAPPER_API_URL"),
+    timeout_seconds=float(os.getenv("SCRAPPER_API_TIMEOUT_SECONDS", "5")),
+    max_connections=int(os.getenv("SCRAPPER_API_MAX_CONNECTIONS", "50")),
+    retries=int(os.getenv("SCRAPPER_API_RETRIES", "2")),
+)
@@ -0,0 +1,22 @@
+import os
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+from src.bot.states.state_store import MemoryStateStore, RedisStateStore, StateStore
+
+load_dotenv()
+
+FSM_STORAGE = os.getenv("FSM_STORAGE", "redis").lower()
+
+state_store: StateStore
+
+match FSM_STORAGE:
+    case "redis":
+        state_store = RedisStateStore(
+            redis.from_url(os.getenv("REDIS_URL"), decode_responses=True),
+            ttl_seconds=int(os.getenv("FSM_STATE_TTL_SECONDS", "86400")),
+        )
+    case "memory":
+        state_store = MemoryStateStore()
+    case _:
+        raise ValueError(f"Unknown FSM_STORAGE: {FSM_STORAGE}")
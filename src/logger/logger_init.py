@@ -1,53 +1,169 @@
+import atexit
+import copy
 import logging
 import json
+import os
+import queue
+import random
 from logging import Logger
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 import sys
 
+LOGGING_LEVEL = os.getenv("LOGGING_LEVEL", "info").upper()
+# доля DEBUG-записей, которые пишутся; длинные DEBUG-записи (полные payload)
+# пишутся с отдельной, меньшей долей
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+LOG_LARGE_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_LARGE_DEBUG_SAMPLE_RATE", "0.01"))
+LOG_MAX_MESSAGE_LENGTH = int(os.getenv("LOG_MAX_MESSAGE_LENGTH", "2000"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_FILE_BACKUP_COUNT = int(os.getenv("LOG_FILE_BACKUP_COUNT", "5"))
+
 
 class JSONFormatter(logging.Formatter):
     """Форматтер для структурного (JSON) логирования с указанием файла и строки."""
 
+    def __init__(self, max_message_length: int = LOG_MAX_MESSAGE_LENGTH):
+        super().__init__()
+        self.max_message_length = max_message_length
+
     def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
         log_entry = {
             "timestamp": self.formatTime(record),
             "logger": record.name,
             "level": record.levelname,
-            "message": record.getMessage(),
+            "message": message[: self.max_message_length],
             "filename": record.filename,
             "pathname": record.pathname,
             "funcName": record.funcName,
             "line": record.lineno,
         }
+        if len(message) > self.max_message_length:
+            log_entry["truncated"] = len(message)
         if record.args:
-            log_entry["args"] = [str(a) for a in record.args]
+            log_entry["args"] = [str(a)[: self.max_message_length] for a in record.args]
+        if record.exc_info:
+            log_entry["exception"] = self.formatException(record.exc_info)
         return json.dumps(log_entry, ensure_ascii=False, default=str)
 
 
-def setup_logger() -> Logger:
-    log_dir = Path("logger")
+class SamplingFilter(logging.Filter):
+    """
+    Прореживает DEBUG-записи горячих путей. Решение принимается до постановки
+    в очередь и не требует форматирования: длина проверяется только у уже
+    готовой строки сообщения (f-строки), аргументы не рендерятся
+    """
+
+    def __init__(
+        self,
+        debug_rate: float = LOG_DEBUG_SAMPLE_RATE,
+        large_debug_rate: float = LOG_LARGE_DEBUG_SAMPLE_RATE,
+        max_message_length: int = LOG_MAX_MESSAGE_LENGTH,
+    ):
+        super().__init__()
+        self.debug_rate = debug_rate
+        self.large_debug_rate = large_debug_rate
+        self.max_message_length = max_message_length
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.debug_rate
+        if isinstance(record.msg, str) and len(record.msg) > self.max_message_length:
+            rate = min(rate, self.large_debug_rate)
+        return rate >= 1 or random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Кладет записи в ограниченную очередь, форматированием и записью в файл
+    занимается поток QueueListener. Если очередь переполнена, запись
+    отбрасывается, а не блокирует event loop
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # стандартный prepare форматирует запись в вызывающем потоке,
+        # здесь в очередь уходит копия, а JSON собирают обработчики слушателя
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logger(
+    name: str = "my_logger",
+    log_dir: Path = Path("logger"),
+    level: str = LOGGING_LEVEL,
+    stream=sys.stdout,
+) -> tuple[Logger, QueueListener]:
+    """
+    Логгер приложения: запись в очередь в вызывающем потоке, форматирование
+    и вывод в ротируемый JSON-файл и консоль - в потоке QueueListener.
+    Модуль импортируется и как src.logger, и как logger, поэтому повторный
+    вызов для того же имени возвращает уже настроенный логгер
+    :param name:
+    :param log_dir:
+    :param level:
+    :param stream: поток консольного вывода, None - без консоли
+    :return: логгер и запущенный слушатель очереди
+    """
+    my_logger = logging.getLogger(name)
+    listener = getattr(my_logger, "log_listener", None)
+    if listener is not None:
+        return my_logger, listener
+
     log_file = log_dir / "app.json"
     log_dir.mkdir(parents=True, exist_ok=True)
 
-    my_logger = logging.getLogger("my_logger")
-    my_logger.setLevel(logging.DEBUG)
+    file_handler = RotatingFileHandler(
+        log_file,
+        maxBytes=LOG_FILE_MAX_BYTES,
+        backupCount=LOG_FILE_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(JSONFormatter())
+    handlers: list[logging.Handler] = [file_handler]
+
+    if stream is not None:
+        console_fmt = logging.Formatter(
+            fmt="%(asctime)s %(levelname)-5s [%(filename)s:%(lineno)d] %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+        console_handler = logging.StreamHandler(stream)
+        console_handler.setFormatter(console_fmt)
+        handlers.append(console_handler)
 
-    json_fmt = JSONFormatter()
-    file_handler = logging.FileHandler(log_file, encoding="utf-8")
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(json_fmt)
-    my_logger.addHandler(file_handler)
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    queue_handler.addFilter(SamplingFilter())
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # при выходе дописывает то, что осталось в очереди
+    atexit.register(stop_listener, listener)
+
+    my_logger.setLevel(level)
+    my_logger.addHandler(queue_handler)
+    my_logger.log_listener = listener  # type: ignore[attr-defined]
+
+    return my_logger, listener
 
-    console_fmt = logging.Formatter(
-        fmt="%(asctime)s %(levelname)-5s [%(filename)s:%(lineno)d] %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-    )
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.DEBUG)
-    console_handler.setFormatter(console_fmt)
-    my_logger.addHandler(console_handler)
 
-    return my_logger
+def stop_listener(listener: QueueListener) -> None:
+    """
+    Останавливает слушатель, дописав очередь. Повторный вызов ничего не делает
+    :param listener:
+    :return:
+    """
+    if listener._thread is not None:
+        listener.stop()
 
 
-logger = setup_logger()
+logger, log_listener = setup_logger()
@@ -9,11 +9,15 @@ import uvicorn
 from fastapi import FastAPI
 from fastapi.exception_handlers import request_validation_exception_handler
 from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from starlette.requests import Request
 from starlette.responses import Response
 
 from src.initialization.database_init import db_processor
+from src.api.scrapper_api.http_client import close_http_client
 from src.api.scrapper_api.scrapper_api import scrapper_api_router
+from src.api.utils.metrics import metrics_router, track_pool_usage
+from src.api.utils.tracing import configure_tracing, shutdown_tracing, trace_requests
 from src.logger.logger_init import logger
 
 
@@ -24,15 +28,23 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    configure_tracing("scrapper")
     await db_processor.connect()
+    track_pool_usage(db_processor.pool_usage)
     yield
+    await close_http_client()
     await db_processor.close()
+    shutdown_tracing()
 
 
-app = FastAPI(title="scrapper_app", lifespan=lifespan)
+app = FastAPI(
+    title="scrapper_app", lifespan=lifespan, default_response_class=ORJSONResponse
+)
 
 app.exception_handler(RequestValidationError)(validation_exception_handler)
+app.middleware("http")(trace_requests)
 app.include_router(router=scrapper_api_router)
+app.include_router(router=metrics_router)
 
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -0,0 +1,92 @@
+import asyncio
+import multiprocessing
+import os
+import signal
+import time
+from typing import Any, Callable
+
+from dotenv import load_dotenv
+
+from src.logger.logger_init import logger
+
+load_dotenv()
+
+RESTART_DELAY_SECONDS = 5
+# сколько процесс-воркер завершается по SIGTERM, прежде чем его убьют
+SHUTDOWN_TIMEOUT_SECONDS = float(os.getenv("SCRAPPER_SHUTDOWN_TIMEOUT_SECONDS", "10"))
+
+
+def run_worker_process() -> None:
+    """
+    Точка входа дочернего процесса: свой event loop, свой пул HTTP-соединений
+    и свое членство в группе шардов Redis
+    :return:
+    """
+    from src.scrapper_worker import run_until_terminated, run_worker
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(run_until_terminated(run_worker()))
+
+
+def spawn_worker(
+    ctx: multiprocessing.context.SpawnContext,
+    num: int,
+    target: Callable[..., None] = run_worker_process,
+    args: tuple[Any, ...] = (),
+) -> multiprocessing.Process:
+    process = ctx.Process(target=target, args=args, name=f"scrapper-worker-{num}", daemon=False)
+    process.start()
+    logger.info("Запущен процесс %s (pid %s)", process.name, process.pid)
+    return process
+
+
+def run_workers(processes_count: int) -> None:
+    """
+    Запускает processes_count процессов-воркеров и перезапускает упавшие.
+    Процессы координируются через общую группу шардов в Redis, поэтому
+    каждый проверяет свою часть ссылок, а разбор ответов API идет на всех ядрах
+    :param processes_count:
+    :return:
+    """
+    ctx = multiprocessing.get_context("spawn")
+    processes = [spawn_worker(ctx, num) for num in range(processes_count)]
+    try:
+        while True:
+            time.sleep(RESTART_DELAY_SECONDS)
+            for num, process in enumerate(processes):
+                if not process.is_alive():
+                    logger.warning(
+                        "Процесс %s завершился с кодом %s, перезапускаем",
+                        process.name,
+                        process.exitcode,
+                    )
+                    processes[num] = spawn_worker(ctx, num)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop_workers(processes)
+
+
+def stop_workers(processes: list[multiprocessing.Process]) -> None:
+    """
+    Останавливает процессы-воркеры: по SIGTERM воркер выходит из группы шардов
+    и закрывает соединения, не успевшие за SHUTDOWN_TIMEOUT_SECONDS убиваются
+    :param processes:
+    :return:
+    """
+    for process in processes:
+        process.terminate()
+    deadline = time.monotonic() + SHUTDOWN_TIMEOUT_SECONDS
+    for process in processes:
+        process.join(max(deadline - time.monotonic(), 0))
+        if process.is_alive():
+            logger.warning("Процесс %s не завершился вовремя, останавливаем", process.name)
+            process.kill()
+            process.join()
+
+
+if __name__ == "__main__":
+    """
+    Запуск воркеров проверки обновлений во всех ядрах
+    """
+    run_workers(int(os.getenv("SCRAPPER_PROCESSES", str(os.cpu_count() or 1))))
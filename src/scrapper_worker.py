@@ -0,0 +1,110 @@
+import asyncio
+import os
+import signal
+import sys
+import time
+from contextlib import suppress
+from typing import Any, Coroutine
+
+import redis.asyncio as redis
+from dotenv import load_dotenv
+
+from src.initialization.database_init import db_processor
+from src.api.scrapper_api.http_client import close_http_client
+from src.api.scrapper_api.shard_coordinator import ShardCoordinator
+from src.api.utils.metrics import CHECK_CYCLE_SECONDS, CHECK_CYCLE_UPDATES, observe_seconds
+from src.api.utils.tracing import configure_tracing, shutdown_tracing, tracer
+from src.logger.logger_init import logger
+
+load_dotenv()
+
+if sys.platform == "win32":
+    asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+
+CHECK_INTERVAL_SECONDS = float(os.getenv("SCRAPPER_WORKER_INTERVAL", "60"))
+
+
+async def run_check_cycle(coordinator: ShardCoordinator) -> int:
+    """
+    Проверяет ссылки своего шарда и откладывает найденные обновления
+    в очередь отправки, откуда их заберет тик планировщика
+    :param coordinator:
+    :return:
+    """
+    assignment = await coordinator.heartbeat()
+    with tracer.start_as_current_span("scrapper.check_cycle"), observe_seconds(
+        CHECK_CYCLE_SECONDS
+    ):
+        updates = await db_processor.check_updates_for_all_users(
+            assignment.index, assignment.count
+        )
+    CHECK_CYCLE_UPDATES.inc(len(updates))
+    if updates:
+        await db_processor.save_pending_updates(updates)
+    return len(updates)
+
+
+async def run_worker() -> None:
+    """
+    Воркер проверки обновлений: вступает в группу, получает шард ссылок
+    и раз в CHECK_INTERVAL_SECONDS проверяет только его
+    :return:
+    """
+    coordinator = ShardCoordinator(
+        redis.from_url(os.getenv("REDIS_URL"), decode_responses=True),
+        ttl_ms=int(os.getenv("SCRAPPER_WORKER_TTL_MS", "30000")),
+    )
+    configure_tracing("scrapper_worker")
+    await db_processor.connect()
+    keep_alive_task = asyncio.create_task(coordinator.keep_alive())
+    try:
+        while True:
+            started_at = time.monotonic()
+            try:
+                found = await run_check_cycle(coordinator)
+                logger.info(
+                    "Шард %s/%s проверен, найдено обновлений: %s",
+                    coordinator.assignment.index,
+                    coordinator.assignment.count,
+                    found,
+                )
+            except Exception as exc:
+                logger.exception("Ошибка цикла проверки обновлений.", extra={"exc": exc})
+            elapsed = time.monotonic() - started_at
+            await asyncio.sleep(max(CHECK_INTERVAL_SECONDS - elapsed, 0))
+    finally:
+        keep_alive_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await keep_alive_task
+        await coordinator.leave()
+        await close_http_client()
+        await db_processor.close()
+        shutdown_tracing()
+
+
+async def run_until_terminated(main: Coroutine[Any, Any, None]) -> None:
+    """
+    Выполняет main, пока процесс не получит SIGTERM. Сигнал отменяет main, а не убивает
+    процесс, поэтому её finally успевает выйти из группы шардов и закрыть соединения
+    :param main:
+    :return:
+    """
+    loop = asyncio.get_running_loop()
+    task = asyncio.create_task(main)
+    # на Windows обработчики сигналов в event loop не поддерживаются
+    with suppress(NotImplementedError):
+        loop.add_signal_handler(signal.SIGTERM, task.cancel)
+    try:
+        with suppress(asyncio.CancelledError):
+            await task
+    finally:
+        with suppress(NotImplementedError):
+            loop.remove_signal_handler(signal.SIGTERM)
+    logger.info("Воркер проверки обновлений остановлен")
+
+
+if __name__ == "__main__":
+    """
+    Запуск воркера проверки обновлений (шардирование по links.id)
+    """
+    asyncio.run(run_until_terminated(run_worker()))
@@ -1,22 +1,17 @@
 import asyncio
+from contextlib import suppress
 
 from telethon.tl.functions.bots import SetBotCommandsRequest
 from telethon.tl.types import BotCommandScopeDefault, BotCommand
 from telethon import TelegramClient
 
 from src.initialization.bot_client_init import bot_client, settings
+from src.initialization.notification_service_init import leader_lease
+from src.initialization.scrapper_client_init import scrapper_client
 from src.logger.logger_init import logger
+from src.api.utils.tracing import configure_tracing, shutdown_tracing
 
-from src.bot.handlers import (
-    help_cmd_handler,
-    start_cmd_handler,
-    track_cmd_handler,
-    untrack_cmd_handler,
-    list_cmd_handler,
-    notification_cmd_handler,
-    unknown_cmd_handler,
-    upds_by_tag_cmd_handler,
-)
+from src.bot.router import register_router
 
 
 async def set_commands(bot: TelegramClient) -> None:
@@ -32,6 +27,7 @@ async def set_commands(bot: TelegramClient) -> None:
         BotCommand(command="untrack", description="Прекратить отслеживание"),
         BotCommand(command="list", description="Список отслеживаемых ссылок"),
         BotCommand(command="notifications", description="Выбор времени нотификации"),
+        BotCommand(command="timezone", description="Часовой пояс дат в уведомлениях"),
         BotCommand(command="upds_by_tags", description="Обновления по тегу"),
     ]
 
@@ -46,7 +42,10 @@ async def main() -> None:
     :return:
     """
     logger.info("Run the event loop to start receiving messages")
+    configure_tracing("bot")
     await bot_client.start(bot_token=settings.token)
+    register_router()
+    leader_task = asyncio.create_task(leader_lease.keep_alive())
     async with bot_client:
         try:
             await set_commands(bot_client)
@@ -56,6 +55,12 @@ async def main() -> None:
         except Exception as exc:
             logger.exception("Main loop raised error.", extra={"exc": exc})
             raise
+        finally:
+            leader_task.cancel()
+            with suppress(asyncio.CancelledError):
+                await leader_task
+            await scrapper_client.aclose()
+            shutdown_tracing()
 
 
 if __name__ == "__main__":
@@ -1,5 +1,10 @@
 from typing import AsyncGenerator, Generator
 import sys
+import os
+
+# Состояния диалогов в тестах хранятся в памяти процесса
+os.environ.setdefault("FSM_STORAGE", "memory")
+
 import asyncio
 from urllib.parse import urlparse
 from unittest.mock import MagicMock, Mock, AsyncMock
@@ -14,14 +19,14 @@ from telethon.events import NewMessage
 
 from fastapi.testclient import TestClient
 
-from src.database.sql_database import user_states, user_data, SqlDbProcessor
+from src.database.sql_database import SqlDbProcessor
 from src.database.orm_database import OrmDbProcessor
 from src.database.run_migrations import run_liquibase_migrations_with_params
+from src.initialization.state_store_init import state_store
 
 from testcontainers.postgres import PostgresContainer
 from testcontainers.redis import RedisContainer
 from testcontainers.kafka import KafkaContainer
-import os
 
 if sys.platform == "win32":
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
@@ -45,8 +50,7 @@ def mock_event() -> Mock:
 
 @pytest.fixture(autouse=True)
 def reset_state():
-    user_states.clear()
-    user_data.clear()
+    state_store.reset()
 
 
 @pytest_asyncio.fixture(scope="session")
@@ -0,0 +1,79 @@
+from src.api.providers.circuit_breaker import CircuitBreaker, CircuitState
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_breaker(clock: FakeClock) -> CircuitBreaker:
+    return CircuitBreaker(
+        "api.test", failure_ratio=0.5, min_calls=4, window_seconds=10, open_seconds=30, clock=clock
+    )
+
+
+def test_opens_on_failure_spike_only() -> None:
+    """Тест: Цепь размыкается, когда ошибок в окне не меньше порога, и не раньше min_calls"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    for failed in (True, True, True):
+        breaker.record(failed)
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record(False)
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow()
+
+
+def test_old_failures_leave_window() -> None:
+    """Тест: Ошибки старше окна не учитываются"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+
+    breaker.record(True)
+    breaker.record(True)
+    clock.now = 11
+    for _ in range(3):
+        breaker.record(False)
+    breaker.record(True)
+
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_probe_closes_or_reopens() -> None:
+    """Тест: После open_seconds проходит один пробный запрос, его результат решает состояние"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record(True)
+
+    clock.now = 30
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == CircuitState.OPEN
+
+    clock.now = 60
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_lost_probe_is_replaced() -> None:
+    """Тест: Проба без результата не блокирует цепь навсегда"""
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record(True)
+
+    clock.now = 30
+    assert breaker.allow()
+    clock.now = 59
+    assert not breaker.allow()
+    clock.now = 60
+    assert breaker.allow()
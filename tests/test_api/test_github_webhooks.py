@@ -0,0 +1,164 @@
+from datetime import datetime, timezone
+from http import HTTPStatus
+from unittest.mock import AsyncMock
+
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.providers.base import TrackedLink
+from src.api.providers.github import parse_github_webhook
+from src.api.scrapper_api import github_webhooks
+from src.api.scrapper_api.github_webhooks import (
+    ingest_github_event,
+    sign_payload,
+    verify_signature,
+)
+from src.api.scrapper_api.link_target import classify_url
+
+SECRET = "webhook-secret"
+REPOSITORY = {"full_name": "Owner/Repo"}
+REPO_TARGET = classify_url("https://github.com/owner/repo")
+ISSUE_TARGET = classify_url("https://github.com/owner/repo/issues/7")
+PULL_TARGET = classify_url("https://github.com/owner/repo/pull/7")
+COMMENT_URL = "https://github.com/owner/repo/pull/7#issuecomment-1"
+
+
+def make_comment(created_at: str = "2024-05-12T07:05:00Z") -> dict:
+    return {
+        "user": {"login": "eve"},
+        "created_at": created_at,
+        "body": "looks good",
+        "html_url": COMMENT_URL,
+    }
+
+
+def make_issue(**extra) -> dict:
+    return {
+        "number": 7,
+        "title": "Bug",
+        "user": {"login": "ann"},
+        "created_at": "2024-05-12T07:00:00Z",
+        "body": "steps",
+        **extra,
+    }
+
+
+def signed_request(event: str, payload: dict, secret: str = SECRET) -> dict:
+    """Тело и заголовки запроса в том виде, в каком их отправляет GitHub"""
+    body = orjson.dumps(payload)
+    return {
+        "content": body,
+        "headers": {
+            "X-GitHub-Event": event,
+            "X-Hub-Signature-256": sign_payload(secret, body),
+            "Content-Type": "application/json",
+        },
+    }
+
+
+def test_signature_verification() -> None:
+    """Тест: Подпись сходится только для того же секрета и неизмененного тела"""
+    body = b'{"action": "opened"}'
+    signature = sign_payload(SECRET, body)
+
+    assert signature.startswith("sha256=")
+    assert verify_signature(SECRET, body, signature)
+    assert not verify_signature(SECRET, body + b" ", signature)
+    assert not verify_signature("other", body, signature)
+    assert not verify_signature(SECRET, body, None)
+    assert not verify_signature("", body, sign_payload("", body))
+
+
+def test_webhook_events_map_to_targets() -> None:
+    """Тест: Новый issue - событие репозитория и issue, комментарий к PR - событие PR"""
+    opened = parse_github_webhook(
+        "issues", {"action": "opened", "repository": REPOSITORY, "issue": make_issue()}
+    )
+    comment = parse_github_webhook(
+        "issue_comment",
+        {
+            "action": "created",
+            "repository": REPOSITORY,
+            "issue": make_issue(pull_request={}),
+            "comment": make_comment(),
+        },
+    )
+    review = parse_github_webhook(
+        "pull_request_review_comment",
+        {
+            "action": "created",
+            "repository": REPOSITORY,
+            "pull_request": make_issue(),
+            "comment": make_comment(),
+        },
+    )
+    edited = parse_github_webhook(
+        "issues", {"action": "edited", "repository": REPOSITORY, "issue": make_issue()}
+    )
+
+    assert set(opened) == {REPO_TARGET, ISSUE_TARGET}
+    assert opened[ISSUE_TARGET][0].user_name == "ann"
+    assert list(comment) == [PULL_TARGET]
+    assert (comment[PULL_TARGET][0].title, comment[PULL_TARGET][0].preview) == (
+        "Bug",
+        "looks good",
+    )
+    assert list(review) == [PULL_TARGET]
+    assert edited == {}
+    assert parse_github_webhook("push", {"repository": REPOSITORY}) == {}
+
+
+@pytest.mark.asyncio
+async def test_ingest_writes_new_events_to_pipeline() -> None:
+    """Тест: Событие пишется в состояние ссылки и отложенные обновления, повтор отсекается"""
+    comment_at = datetime(2024, 5, 12, 7, 5, tzinfo=timezone.utc)
+    db_processor = AsyncMock()
+    db_processor.mark_push_fed_links.return_value = {
+        1: TrackedLink(PULL_TARGET, datetime(2024, 5, 12, 7, 0, tzinfo=timezone.utc)),
+        2: TrackedLink(PULL_TARGET, comment_at, frozenset({COMMENT_URL})),
+        # другое событие в ту же секунду не скрывает комментарий
+        3: TrackedLink(PULL_TARGET, comment_at, frozenset({"other"})),
+    }
+    db_processor.build_link_updates.return_value = ["update"]
+    payload = {
+        "action": "created",
+        "repository": REPOSITORY,
+        "issue": make_issue(pull_request={}),
+        "comment": make_comment(),
+    }
+
+    assert await ingest_github_event(db_processor, "issue_comment", payload) == 1
+
+    db_processor.mark_push_fed_links.assert_awaited_once_with([PULL_TARGET])
+    (link_states,) = db_processor.save_link_states.call_args.args
+    assert list(link_states) == [1, 3]
+    assert link_states[1][1:] == (comment_at, frozenset({COMMENT_URL}))
+    assert link_states[3][1:] == (comment_at, frozenset({COMMENT_URL, "other"}))
+    (link_events,) = db_processor.build_link_updates.call_args.args
+    assert [event.user_name for event in link_events[1]] == ["eve"]
+    db_processor.save_pending_updates.assert_awaited_once_with(["update"])
+
+
+def test_webhook_endpoint_checks_signature(monkeypatch) -> None:
+    """Тест: Запрос без верной подписи отклоняется, подписанный - уходит в конвейер"""
+    from src.api.scrapper_api import scrapper_api
+
+    db_processor = AsyncMock()
+    db_processor.mark_push_fed_links.return_value = {}
+    monkeypatch.setattr(scrapper_api, "db_processor", db_processor)
+    monkeypatch.setattr(github_webhooks, "GITHUB_WEBHOOK_SECRET", SECRET)
+    app = FastAPI()
+    app.include_router(scrapper_api.scrapper_api_router)
+    client = TestClient(app)
+    payload = {"action": "opened", "repository": REPOSITORY, "issue": make_issue()}
+
+    forged = client.post("/webhooks/github", **signed_request("issues", payload, "wrong"))
+    accepted = client.post("/webhooks/github", **signed_request("issues", payload))
+
+    assert forged.status_code == HTTPStatus.UNAUTHORIZED
+    assert accepted.status_code == HTTPStatus.OK
+    assert accepted.json() == {"event": "issues", "updates": 0}
+    (targets,) = db_processor.mark_push_fed_links.call_args.args
+    assert set(targets) == {REPO_TARGET, ISSUE_TARGET}
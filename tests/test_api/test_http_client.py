@@ -0,0 +1,30 @@
+import asyncio
+
+import pytest
+
+from src.api.scrapper_api.http_client import close_http_client, get_http_client
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_within_loop() -> None:
+    """Тест: В пределах одного event loop используется один пул соединений"""
+    first = get_http_client()
+    second = get_http_client()
+    assert first is second
+
+    await close_http_client()
+    assert first.is_closed
+    assert get_http_client() is not first
+    await close_http_client()
+
+
+def test_http_client_per_loop() -> None:
+    """Тест: Каждый event loop (процесс воркера) получает свой пул"""
+
+    async def grab():
+        client = get_http_client()
+        return client
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+    assert first is not second
@@ -0,0 +1,63 @@
+import json
+from typing import AsyncIterator
+
+import pytest
+
+from src.api.utils.json_stream import JsonArrayReader, iter_json_array
+
+ITEMS = [
+    {"title": 'скобки ]}, и "кавычки" \\', "labels": [{"name": "bug"}], "user": None},
+    "строка, с запятой]",
+    [1, [2, {}]],
+    12.5,
+    True,
+]
+
+
+def test_reader_splits_array_at_any_chunk_boundary() -> None:
+    """Тест: Элементы разбираются одинаково при любой нарезке тела, в том числе внутри UTF-8"""
+    raw = json.dumps(ITEMS, ensure_ascii=False).encode()
+    for size in range(1, len(raw) + 1):
+        reader = JsonArrayReader()
+        items = []
+        for start in range(0, len(raw), size):
+            items.extend(reader.feed(raw[start : start + size]))
+        assert items == ITEMS
+        assert reader.done
+
+
+@pytest.mark.parametrize("raw", [b'{"items": []}', b"[1,,2]", b"[1}", b"[{}{}]", b"[1,]"])
+def test_reader_rejects_invalid_json(raw: bytes) -> None:
+    """Тест: Не массив и испорченный массив - ошибка разбора JSON"""
+    reader = JsonArrayReader()
+    with pytest.raises(json.JSONDecodeError):
+        reader.feed(raw)
+        reader.close()
+
+
+@pytest.mark.asyncio
+async def test_iter_stops_reading_stream() -> None:
+    """Тест: После остановки итерации оставшиеся части тела не читаются"""
+    pulled = []
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for chunk in (b'[{"n": 1},', b'{"n": 2},', b'{"n": 3}]'):
+            pulled.append(chunk)
+            yield chunk
+
+    async for item in iter_json_array(chunks()):
+        if item["n"] == 2:
+            break
+
+    assert len(pulled) == 2
+
+
+@pytest.mark.asyncio
+async def test_iter_rejects_truncated_array() -> None:
+    """Тест: Оборванный массив - ошибка, а не пустой результат"""
+
+    async def chunks() -> AsyncIterator[bytes]:
+        yield b'[{"n": 1}, {"n"'
+
+    with pytest.raises(json.JSONDecodeError):
+        [item async for item in iter_json_array(chunks())]
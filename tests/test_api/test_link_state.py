@@ -0,0 +1,72 @@
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.api.providers.base import LinkCheckResult
+from src.api.schemas.schemas import LinkUpdate, UpdateInfo
+from src.api.scrapper_api.link_target import classify_url
+from src.api.scrapper_api import link_state
+from src.api.scrapper_api.link_state import refresh_stale_links
+
+TARGET = classify_url("https://github.com/a/b")
+
+
+@pytest.mark.asyncio
+async def test_refresh_checks_only_stale_links() -> None:
+    """Тест: Перепроверяются только устаревшие ссылки, не больше лимита"""
+    update_info = UpdateInfo(
+        title="t", user_name="u", preview="", created_at=datetime(2024, 5, 1, tzinfo=timezone.utc)
+    )
+    link_states = {1: LinkCheckResult([update_info], update_info.created_at)}
+    db_processor = AsyncMock()
+    db_processor.get_stale_user_links.return_value = {1: TARGET}
+    db_processor.fetch_link_states.return_value = link_states
+
+    refreshed = await refresh_stale_links(db_processor, 42, ["work"])
+
+    assert refreshed == 1
+    tg_chat_id, tags, _, limit = db_processor.get_stale_user_links.call_args.args
+    assert (tg_chat_id, tags, limit) == (42, ["work"], link_state.REFRESH_MAX_LINKS)
+    db_processor.fetch_link_states.assert_awaited_once_with({1: TARGET})
+    db_processor.save_link_states.assert_awaited_once_with(link_states)
+
+
+@pytest.mark.asyncio
+async def test_refresh_is_bounded_by_timeout(monkeypatch) -> None:
+    """Тест: Медленные внешние API не задерживают ответ дольше таймаута"""
+    monkeypatch.setattr(link_state, "REFRESH_TIMEOUT_SECONDS", 0.05)
+
+    async def slow_fetch(link_targets):
+        await asyncio.sleep(1)
+
+    db_processor = AsyncMock()
+    db_processor.get_stale_user_links.return_value = {1: TARGET}
+    db_processor.fetch_link_states.side_effect = slow_fetch
+
+    assert await refresh_stale_links(db_processor, 42) == 0
+    db_processor.save_link_states.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_refresh_queues_found_events_for_subscribers() -> None:
+    """Тест: События, найденные при обновлении, откладываются для всех подписчиков ссылки"""
+    update_info = UpdateInfo(
+        title="t", user_name="u", preview="", created_at=datetime(2024, 5, 1, tzinfo=timezone.utc)
+    )
+    link_update = LinkUpdate(
+        id=1, url="https://github.com/a/b", description="d", tg_chat_id=7, update_info=update_info
+    )
+    db_processor = AsyncMock()
+    db_processor.get_stale_user_links.return_value = {1: TARGET, 2: TARGET}
+    db_processor.fetch_link_states.return_value = {
+        1: LinkCheckResult([update_info], update_info.created_at),
+        2: LinkCheckResult([], None),
+    }
+    db_processor.build_link_updates.return_value = [link_update]
+
+    assert await refresh_stale_links(db_processor, 42) == 2
+
+    db_processor.build_link_updates.assert_awaited_once_with({1: [update_info]})
+    db_processor.save_pending_updates.assert_awaited_once_with([link_update])
@@ -0,0 +1,66 @@
+import pytest
+
+from src.api.scrapper_api.link_target import (
+    LinkKind,
+    LinkProvider,
+    LinkTarget,
+    canonicalize_url,
+    classify_url,
+    stored_url_variants,
+    target_columns,
+    target_from_columns,
+)
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        (
+            "https://github.com/Owner/Repo/",
+            LinkTarget(LinkProvider.GITHUB, "owner", "repo", LinkKind.REPOSITORY, None),
+        ),
+        (
+            "http://www.github.com/owner/repo.git",
+            LinkTarget(LinkProvider.GITHUB, "owner", "repo", LinkKind.REPOSITORY, None),
+        ),
+        (
+            "https://github.com/owner/repo/pull/12#discussion",
+            LinkTarget(LinkProvider.GITHUB, "owner", "repo", LinkKind.PULL, 12),
+        ),
+        (
+            "https://github.com/owner/repo/issues/7?q=1",
+            LinkTarget(LinkProvider.GITHUB, "owner", "repo", LinkKind.ISSUE, 7),
+        ),
+        (
+            "https://stackoverflow.com/questions/123/how-to-do-it",
+            LinkTarget(LinkProvider.STACKOVERFLOW, None, None, LinkKind.QUESTION, 123),
+        ),
+        ("https://github.com/owner/repo/blob/main/file.py", None),
+        ("https://example.com/owner/repo", None),
+    ],
+)
+def test_classify_url(url: str, expected: LinkTarget | None) -> None:
+    """Тест: Ссылка разбирается в цель независимо от написания"""
+    assert classify_url(url) == expected
+
+
+def test_canonical_url_round_trip() -> None:
+    """Тест: Каноническая форма и колонки БД восстанавливают ту же цель"""
+    target = classify_url("https://stackoverflow.com/q/42/")
+
+    assert canonicalize_url("https://stackoverflow.com/q/42/") == target.canonical_url
+    assert classify_url(target.canonical_url) == target
+    assert target_from_columns(*target_columns(target).values()) == target
+    assert canonicalize_url(" http://example.com ") == "http://example.com"
+
+
+def test_stored_url_variants() -> None:
+    """Тест: Ссылка ищется и в канонической форме, и в присланном написании"""
+    assert stored_url_variants("https://www.github.com/Owner/Repo/") == [
+        "https://github.com/owner/repo",
+        "https://www.github.com/Owner/Repo/",
+    ]
+    assert stored_url_variants(" http://example.com ") == [
+        "http://example.com",
+        " http://example.com ",
+    ]
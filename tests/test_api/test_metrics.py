@@ -0,0 +1,84 @@
+from http import HTTPStatus
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.providers import base
+from src.api.providers.github import GitHubProvider
+from src.api.scrapper_api.link_target import classify_url
+from src.api.utils import metrics
+from src.api.utils.metrics import metrics_router, observe_seconds
+
+
+def make_metrics_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(metrics_router)
+    return app
+
+
+class RecordingHistogram:
+    def __init__(self):
+        self.observed: list[tuple[tuple[str, ...], float]] = []
+        self._labels: tuple[str, ...] = ()
+
+    def labels(self, *labels: str) -> "RecordingHistogram":
+        self._labels = labels
+        return self
+
+    def observe(self, amount: float) -> None:
+        self.observed.append((self._labels, amount))
+
+
+def test_observe_seconds_records_failed_block() -> None:
+    """Тест: Время блока записывается с метками и тогда, когда блок завершился ошибкой"""
+    histogram = RecordingHistogram()
+
+    with pytest.raises(RuntimeError):
+        with observe_seconds(histogram, "github"):
+            raise RuntimeError("timeout")
+
+    assert len(histogram.observed) == 1
+    labels, seconds = histogram.observed[0]
+    assert labels == ("github",) and seconds >= 0
+
+
+def test_metrics_endpoint_without_prometheus_client(monkeypatch) -> None:
+    """Тест: Без prometheus_client эндпоинт отвечает 404, а метрики не мешают работе"""
+    monkeypatch.setattr(metrics, "prometheus_client", None)
+    response = TestClient(make_metrics_app()).get("/metrics")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    metrics._NoopMetric().labels("github", "200").inc()
+
+
+@pytest.mark.asyncio
+async def test_provider_requests_are_measured(monkeypatch) -> None:
+    """Тест: Запросы к провайдеру считаются по статусу, остаток лимита берется из заголовка"""
+    prometheus_client = pytest.importorskip("prometheus_client")
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, headers={"x-ratelimit-remaining": "4321"})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(base, "get_http_client", lambda: client)
+    labels = {"provider": "github", "status": "404"}
+    before = prometheus_client.REGISTRY.get_sample_value(
+        "linktracker_provider_requests_total", labels
+    ) or 0
+
+    await GitHubProvider().fetch(classify_url("https://github.com/owner/repo/issues/1"), None)
+
+    assert (
+        prometheus_client.REGISTRY.get_sample_value("linktracker_provider_requests_total", labels)
+        == before + 1
+    )
+    assert (
+        prometheus_client.REGISTRY.get_sample_value(
+            "linktracker_provider_rate_limit_remaining", {"provider": "github"}
+        )
+        == 4321
+    )
+    response = TestClient(make_metrics_app()).get("/metrics")
+    assert b"linktracker_provider_request_seconds_bucket" in response.content
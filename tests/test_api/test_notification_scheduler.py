@@ -0,0 +1,137 @@
+from datetime import datetime, time
+from http import HTTPStatus
+from unittest.mock import AsyncMock
+
+import pytest
+import pytz
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.schemas.schemas import LinkUpdate, NotificationMode, PendingEvent
+from src.api.scrapper_api.notification_scheduler import (
+    bucket_to_time,
+    build_due_updates,
+    StaleFencingTokenError,
+    collect_due_updates,
+    current_bucket,
+    due_digest_buckets,
+    time_to_bucket,
+)
+
+
+@pytest.mark.parametrize(
+    "value, bucket",
+    [(time(0, 0), 0), (time(9, 30), 570), (time(20, 0), 1200), (time(23, 59), 1439)],
+)
+def test_time_bucket_roundtrip(value: time, bucket: int) -> None:
+    """Тест: Время дайджеста однозначно переводится в корзину и обратно"""
+    assert time_to_bucket(value) == bucket
+    assert bucket_to_time(bucket) == value
+
+
+def test_current_bucket_uses_moscow_time() -> None:
+    """Тест: Корзина считается по московскому времени"""
+    moment = datetime(2024, 5, 1, 17, 0, tzinfo=pytz.utc)
+    assert current_bucket(moment) == time_to_bucket(time(20, 0))
+
+
+def test_due_digest_buckets_catch_up_missed_minutes() -> None:
+    """Тест: Пропущенные минуты забираются следующим тиком, в том числе через полночь"""
+    assert due_digest_buckets(None, 570) == [570]
+    assert due_digest_buckets(570, 570) == [570]
+    assert due_digest_buckets(569, 570) == [570]
+    assert due_digest_buckets(567, 570) == [568, 569, 570]
+    assert due_digest_buckets(1438, 1) == [1439, 0, 1]
+
+
+@pytest.mark.asyncio
+async def test_collect_due_updates_defers_and_pops() -> None:
+    """Тест: Свежие обновления откладываются, а на тике забирается корзина"""
+    update = LinkUpdate(id=1, url="https://ex.com", description="upd", tg_chat_id=7)
+    db = AsyncMock()
+    db.pop_due_updates.return_value = [
+        PendingEvent(
+            id=1,
+            link_id=1,
+            url="https://ex.com",
+            tg_chat_id=7,
+            notification_mode=NotificationMode.IMMEDIATE,
+            description="upd",
+        )
+    ]
+    moment = datetime(2024, 5, 1, 17, 0, tzinfo=pytz.utc)
+
+    due = await collect_due_updates(db, [update], moment)
+
+    db.save_pending_updates.assert_awaited_once_with([update])
+    db.pop_due_updates.assert_awaited_once_with(1200, fencing_token=None)
+    assert due == [update]
+
+
+@pytest.mark.asyncio
+async def test_collect_due_updates_without_fresh() -> None:
+    """Тест: Без свежих обновлений запись в очередь не выполняется"""
+    db = AsyncMock()
+    db.pop_due_updates.return_value = []
+
+    assert await collect_due_updates(db, []) == []
+    db.save_pending_updates.assert_not_awaited()
+
+
+def make_digest_event(event_id: int, user_name: str, hour: int) -> PendingEvent:
+    return PendingEvent(
+        id=event_id,
+        link_id=5,
+        url="https://github.com/a/b",
+        tg_chat_id=9,
+        notification_mode=NotificationMode.DIGEST,
+        description=f"описание {event_id}",
+        title=f"Issue {event_id}",
+        user_name=user_name,
+        event_at=datetime(2024, 5, 1, hour, tzinfo=pytz.utc),
+        preview=f"текст {event_id}",
+        timezone="Asia/Tokyo",
+    )
+
+
+def test_build_due_updates_renders_digest_summary() -> None:
+    """Тест: Накопленные события дайджеста сворачиваются в одну сводку по ссылке"""
+    events = [
+        make_digest_event(1, "alice", 10),
+        make_digest_event(2, "bob", 11),
+        make_digest_event(3, "alice", 12),
+        make_digest_event(4, "alice", 13),
+    ]
+
+    updates = build_due_updates(events)
+
+    assert len(updates) == 1
+    summary = updates[0]
+    assert (summary.id, summary.tg_chat_id) == (5, 9)
+    assert summary.description.startswith("Событий за период: 4\nАвторы: alice (3), bob (1)")
+    # даты выводятся в часовом поясе получателя
+    assert "• 2024-05-01 22:00 alice — Issue 4: текст 4" in summary.description
+    assert "Issue 1" not in summary.description
+
+
+def test_updates_require_current_fencing_token(monkeypatch) -> None:
+    """Тест: /updates без токена отклоняется, а токен перепроверяется при выборке очереди"""
+    from src.api.scrapper_api import scrapper_api
+
+    db_processor = AsyncMock()
+    db_processor.accept_fencing_token.return_value = True
+    # новый лидер появился между первой проверкой токена и выборкой очереди
+    db_processor.pop_due_updates.side_effect = StaleFencingTokenError(5)
+    monkeypatch.setattr(scrapper_api, "db_processor", db_processor)
+    monkeypatch.setattr(scrapper_api, "UPDATES_CHECK_MODE", "workers")
+    app = FastAPI()
+    app.include_router(scrapper_api.scrapper_api_router)
+    client = TestClient(app)
+
+    missing = client.get("/updates")
+    stale = client.get("/updates", headers={"x-fencing-token": "5"})
+
+    assert missing.status_code == HTTPStatus.BAD_REQUEST
+    assert stale.status_code == HTTPStatus.CONFLICT
+    db_processor.pop_due_updates.assert_awaited_once()
+    assert db_processor.pop_due_updates.call_args.kwargs == {"fencing_token": 5}
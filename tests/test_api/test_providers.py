@@ -0,0 +1,300 @@
+import json
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from src.api.providers import base
+from src.api.providers.base import (
+    ProviderCapabilities,
+    TrackedLink,
+    UpdateProvider,
+    advance_watermark,
+)
+from src.api.providers.circuit_breaker import CircuitState
+from src.api.providers.github import GitHubProvider
+from src.api.providers.registry import ProviderRegistry
+from src.api.providers.stackoverflow import StackOverflowProvider
+from src.api.schemas.schemas import UpdateInfo
+from src.api.scrapper_api.link_target import LinkProvider, LinkTarget, classify_url
+from src.api.utils.string_makers import make_description
+
+WATERMARK = datetime(2024, 5, 12, 7, 0, tzinfo=timezone.utc)
+
+
+def make_event(minute: int) -> UpdateInfo:
+    return UpdateInfo(
+        title="t",
+        user_name="u",
+        preview="",
+        created_at=WATERMARK.replace(minute=minute),
+    )
+
+
+class RecordingProvider(UpdateProvider):
+    provider = LinkProvider.STACKOVERFLOW
+    capabilities = ProviderCapabilities(batchable=True, max_batch_size=2)
+
+    def __init__(self):
+        super().__init__()
+        self.batches: list[dict[LinkTarget, datetime | None]] = []
+
+    async def fetch(self, target: LinkTarget, since: datetime | None) -> list[UpdateInfo]:
+        return [make_event(5), make_event(10)]
+
+    async def batch_fetch(
+        self, targets: dict[LinkTarget, datetime | None]
+    ) -> dict[LinkTarget, list[UpdateInfo]]:
+        self.batches.append(targets)
+        return await super().batch_fetch(targets)
+
+
+def use_transport(monkeypatch, handler) -> None:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(base, "get_http_client", lambda: client)
+
+
+@pytest.mark.asyncio
+async def test_registry_batches_per_provider() -> None:
+    """Тест: Цели группируются по провайдеру, дубли запрашиваются один раз с самого старого знака"""
+    provider = RecordingProvider()
+    registry = ProviderRegistry([provider])
+    questions = [classify_url(f"https://stackoverflow.com/questions/{num}") for num in range(3)]
+
+    results = await registry.fetch_updates(
+        {
+            1: TrackedLink(questions[0], WATERMARK),
+            2: TrackedLink(questions[0], WATERMARK.replace(minute=7)),
+            3: TrackedLink(questions[1], None),
+            4: TrackedLink(questions[2], WATERMARK),
+            5: TrackedLink(classify_url("https://github.com/owner/repo"), WATERMARK),
+            6: TrackedLink(None, None),
+        }
+    )
+
+    assert sorted(len(batch) for batch in provider.batches) == [1, 2]
+    requested = {target: since for batch in provider.batches for target, since in batch.items()}
+    assert requested == {questions[0]: WATERMARK, questions[1]: None, questions[2]: WATERMARK}
+    assert [event.created_at.minute for event in results[1].events] == [5, 10]
+    assert [event.created_at.minute for event in results[2].events] == [10]
+    assert [event.created_at.minute for event in results[3].events] == [10]
+    assert results[1].watermark == WATERMARK.replace(minute=10)
+    assert results[5].events == [] and results[5].watermark == WATERMARK
+    assert results[6].events == [] and results[6].watermark is None
+
+
+@pytest.mark.asyncio
+async def test_stackoverflow_batch_returns_events_since_watermark(monkeypatch) -> None:
+    """Тест: Пакет вопросов - один запрос на вид данных, отдаются все события новее знака"""
+    seen: list[httpx.Request] = []
+    since = int(WATERMARK.timestamp())
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url.path.endswith("/answers"):
+            items = [
+                {"question_id": 2, "creation_date": since + 60, "owner": {"display_name": "bob"}},
+                {"question_id": 1, "creation_date": since + 30, "owner": {"display_name": "ann"}},
+                {"question_id": 1, "creation_date": since, "owner": {"display_name": "old"}},
+            ]
+        elif request.url.path.endswith("/comments"):
+            items = [{"post_id": 1, "creation_date": since + 90, "owner": {"display_name": "eve"}}]
+        elif request.url.path.endswith("/filters/create"):
+            items = [{"filter": "!sparse"}]
+        else:
+            items = [{"question_id": 1, "title": "Q1"}, {"question_id": 2, "title": "Q2"}]
+        return httpx.Response(200, json={"items": items, "has_more": False})
+
+    use_transport(monkeypatch, handler)
+    first, second = (classify_url(f"https://stackoverflow.com/questions/{num}") for num in (1, 2))
+
+    results = await StackOverflowProvider().batch_fetch({first: WATERMARK, second: WATERMARK})
+
+    assert [request.url.path for request in seen] == [
+        "/2.3/filters/create",
+        "/2.3/questions/1;2",
+        "/2.3/questions/1;2/answers",
+        "/2.3/questions/1;2/comments",
+    ]
+    assert seen[2].url.params["fromdate"] == str(since)
+    assert {request.url.params["filter"] for request in seen[1:]} == {"!sparse"}
+    assert [event.user_name for event in results[first]] == ["ann", "eve"]
+    assert [event.user_name for event in results[second]] == ["bob"]
+
+
+@pytest.mark.asyncio
+async def test_stackoverflow_filter_created_once(monkeypatch) -> None:
+    """Тест: Фильтр создается один раз, новый вопрос запрашивается страницей из одного элемента"""
+    seen: list[httpx.Request] = []
+    # первая попытка создать фильтр неудачна, запросы идут с withbody
+    statuses = iter([500, 200])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url.path.endswith("/filters/create"):
+            return httpx.Response(next(statuses), json={"items": [{"filter": "!f"}]})
+        return httpx.Response(200, json={"items": [], "has_more": False})
+
+    use_transport(monkeypatch, handler)
+    provider = StackOverflowProvider()
+    target = classify_url("https://stackoverflow.com/questions/7")
+
+    await provider.batch_fetch({target: None})
+    assert seen[1].url.params["filter"] == "withbody"
+    seen.clear()
+    await provider.batch_fetch({target: None})
+    await provider.batch_fetch({target: WATERMARK})
+
+    creates = [request for request in seen if request.url.path.endswith("/filters/create")]
+    assert len(creates) == 1
+    assert "answer.body" in creates[0].url.params["include"].split(";")
+    items = [request for request in seen if request.url.path.endswith("/answers")]
+    assert [request.url.params["pagesize"] for request in items] == ["1", "100"]
+    assert {request.url.params["filter"] for request in seen[1:]} == {"!f"}
+
+
+@pytest.mark.asyncio
+async def test_github_issue_returns_all_new_comments(monkeypatch) -> None:
+    """Тест: Для issue отдаются все комментарии новее знака, а не только последний"""
+    seen: list[httpx.Request] = []
+    issue = {"title": "Bug", "user": {"login": "ann"}, "created_at": "2024-05-01T07:15:00Z"}
+    comments = [
+        {"user": {"login": "bob"}, "created_at": "2024-05-12T07:00:00Z", "body": "old"},
+        {"user": {"login": "eve"}, "created_at": "2024-05-12T07:05:00Z", "body": "first"},
+        {"user": {"login": "max"}, "created_at": "2024-05-12T07:09:00Z", "body": "second"},
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.url.path.endswith("/comments"):
+            return httpx.Response(200, json=comments)
+        return httpx.Response(200, json=issue)
+
+    use_transport(monkeypatch, handler)
+    target = classify_url("https://github.com/owner/repo/pull/3")
+
+    events = await GitHubProvider().fetch(target, WATERMARK)
+
+    assert seen[1].url.path == "/repos/owner/repo/issues/3/comments"
+    assert seen[1].url.params["since"] == "2024-05-12T07:00:00Z"
+    assert [(event.title, event.preview) for event in events] == [
+        ("Bug", "first"),
+        ("Bug", "second"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_github_reuses_response_on_not_modified(monkeypatch) -> None:
+    """Тест: Повторный запрос GitHub идет с If-None-Match, а 304 берется из кэша"""
+    seen: list[httpx.Request] = []
+    issue = {"title": "Bug", "user": {"login": "ann"}, "created_at": "2024-05-12T07:15:00Z"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, json=[issue], headers={"etag": '"v1"'})
+
+    use_transport(monkeypatch, handler)
+    provider = GitHubProvider()
+    target = classify_url("https://github.com/owner/repo")
+
+    first = await provider.fetch(target, None)
+    second = await provider.fetch(target, None)
+
+    assert first == second
+    assert first[0].created_at == WATERMARK.replace(minute=15)
+    assert "if-none-match" not in seen[0].headers
+    assert seen[1].headers["if-none-match"] == '"v1"'
+
+
+@pytest.mark.asyncio
+async def test_github_repo_page_read_until_watermark(monkeypatch) -> None:
+    """Тест: Страница issues репозитория читается потоком только до элемента старше знака"""
+    pulled: list[bytes] = []
+    minutes = [50, 40, 30, 0, 0]
+
+    async def body():
+        yield b"["
+        for num, minute in enumerate(minutes):
+            item = {
+                "title": f"#{num}",
+                "created_at": f"2024-05-12T07:{minute:02}:00Z",
+                "html_url": f"https://github.com/owner/repo/issues/{num}",
+            }
+            chunk = (b"," if num else b"") + json.dumps(item).encode()
+            pulled.append(chunk)
+            yield chunk
+        yield b"]"
+
+    use_transport(monkeypatch, lambda request: httpx.Response(200, content=body()))
+    target = classify_url("https://github.com/owner/repo")
+
+    events = await GitHubProvider().fetch(target, WATERMARK.replace(minute=30))
+
+    # #2 создан в ту же секунду, что и знак: его id еще не отправлялся
+    assert [event.title for event in events] == ["#2", "#1", "#0"]
+    assert len(pulled) == 4
+
+
+@pytest.mark.asyncio
+async def test_failing_host_does_not_hold_other_provider(monkeypatch) -> None:
+    """Тест: После серии ошибок StackExchange запросы к нему не отправляются, GitHub проверяется"""
+    hosts: list[str] = []
+    issue = {"title": "Bug", "user": {"login": "ann"}, "created_at": "2024-05-12T07:15:00Z"}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        hosts.append(request.url.host)
+        if request.url.host == "api.stackexchange.com":
+            raise httpx.ConnectTimeout("timed out", request=request)
+        return httpx.Response(200, json=[issue])
+
+    use_transport(monkeypatch, handler)
+    stackoverflow = StackOverflowProvider()
+    # по пакету на вопрос, чтобы запросов хватило для размыкания цепи
+    stackoverflow.capabilities = ProviderCapabilities()
+    registry = ProviderRegistry([GitHubProvider(), stackoverflow])
+    links = {
+        num: TrackedLink(classify_url(f"https://stackoverflow.com/questions/{num}"), WATERMARK)
+        for num in range(1, 21)
+    }
+    links[0] = TrackedLink(classify_url("https://github.com/owner/repo"), None)
+
+    results = await registry.fetch_updates(links)
+
+    assert [event.title for event in results[0].events] == ["Bug"]
+    assert results[1].events == [] and results[1].watermark == WATERMARK
+    assert stackoverflow.breaker("api.stackexchange.com").state == CircuitState.OPEN
+    assert hosts.count("api.stackexchange.com") < 20
+
+
+@pytest.mark.asyncio
+async def test_event_time_is_exact_until_rendered() -> None:
+    """Тест: Знак сравнивается с точным моментом, в пояс получателя дата переводится при выводе"""
+    event = make_event(0).model_copy(update={"created_at": WATERMARK.replace(second=30)})
+
+    assert UpdateProvider.newer_than([event], WATERMARK.replace(second=29)) == [event]
+    assert UpdateProvider.newer_than([event], WATERMARK.replace(second=30)) == []
+    assert "Дата: 2024-05-12 10:00" in await make_description(event)
+    assert "Дата: 2024-05-12 09:00" in await make_description(event, "Europe/Berlin")
+
+
+def test_events_at_watermark_second_deduped_by_id() -> None:
+    """Тест: События в ту же секунду, что и знак, не теряются и не отправляются дважды"""
+    target = classify_url("https://github.com/owner/repo")
+    moment = WATERMARK.replace(second=30)
+    sent, late = (
+        make_event(0).model_copy(update={"created_at": moment, "event_id": event_id})
+        for event_id in ("a", "b")
+    )
+    link = TrackedLink(target, moment, frozenset({"a"}))
+
+    events = UpdateProvider.newer_than([late, sent], moment, link.seen_ids)
+    result = advance_watermark(link, events)
+
+    assert events == [late]
+    assert (result.watermark, result.seen_ids) == (moment, frozenset({"a", "b"}))
+    assert UpdateProvider.newer_than([late, sent], moment, result.seen_ids) == []
+    newer = make_event(1).model_copy(update={"event_id": "c"})
+    assert advance_watermark(link, [newer]).seen_ids == frozenset({"c"})
+    assert advance_watermark(link, [], WATERMARK) == ([], moment, frozenset({"a"}))
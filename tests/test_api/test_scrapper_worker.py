@@ -0,0 +1,28 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+from src.scrapper_worker import run_until_terminated
+
+
+@pytest.mark.asyncio
+async def test_sigterm_runs_worker_cleanup() -> None:
+    """Тест: SIGTERM отменяет воркер, и его finally успевает освободить ресурсы"""
+    started = asyncio.Event()
+    cleaned_up = []
+
+    async def worker() -> None:
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        finally:
+            cleaned_up.append(True)
+
+    runner = asyncio.create_task(run_until_terminated(worker()))
+    await started.wait()
+    os.kill(os.getpid(), signal.SIGTERM)
+
+    await asyncio.wait_for(runner, 5)
+    assert cleaned_up == [True]
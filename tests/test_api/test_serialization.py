@@ -0,0 +1,89 @@
+import base64
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.bot_api.http_bot_api import bot_api_router, get_tg_client
+from src.api.schemas.schemas import UPDATES_SCHEMA_VERSION, ListLinksUpdate
+from src.api.utils.serialization import (
+    JSON_MEDIA_TYPE,
+    MSGPACK_MEDIA_TYPE,
+    dead_letter_payload,
+    dump_message,
+    kafka_headers,
+    kafka_media_type,
+    load_message,
+    parse_links_update,
+)
+
+PAYLOAD = {
+    "links": [{"id": 1, "url": "https://ex.com", "description": "обновление", "tg_chat_id": 7}]
+}
+
+
+class DummyTgClient:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.sent.append((chat_id, text))
+
+
+def test_json_round_trip():
+    """Тест: JSON-сообщение без типа содержимого разбирается обратно без потерь"""
+    body = dump_message(PAYLOAD, JSON_MEDIA_TYPE)
+
+    assert "обновление".encode() in body
+    assert load_message(body) == PAYLOAD
+
+
+def test_msgpack_round_trip():
+    """Тест: msgpack-сообщение разбирается по своему типу содержимого"""
+    pytest.importorskip("msgpack")
+    body = dump_message(PAYLOAD, MSGPACK_MEDIA_TYPE)
+
+    assert load_message(body, f"{MSGPACK_MEDIA_TYPE}; charset=binary") == PAYLOAD
+
+
+def test_schema_version_defaults_and_rejects_newer():
+    """Тест: Сообщение без версии - первая версия, более новая схема отклоняется"""
+    assert parse_links_update(PAYLOAD).schema_version == 1
+
+    with pytest.raises(ValueError):
+        parse_links_update({**PAYLOAD, "schema_version": UPDATES_SCHEMA_VERSION + 1})
+
+
+def test_kafka_headers_carry_media_type():
+    """Тест: Тип значения Kafka восстанавливается из заголовков, без них - JSON"""
+    assert kafka_media_type(kafka_headers(MSGPACK_MEDIA_TYPE)) == MSGPACK_MEDIA_TYPE
+    assert kafka_media_type(None) is None
+
+
+def test_dead_letter_keeps_message_replayable():
+    """Тест: В dead-letter topic msgpack-значение сохраняется в base64 вместе с типом"""
+    value = b"\x81\xa5links\x90\xff"
+    payload = dead_letter_payload(ValueError("bad"), value, MSGPACK_MEDIA_TYPE)
+
+    assert payload["content_type"] == MSGPACK_MEDIA_TYPE
+    assert base64.b64decode(payload["original_message"]) == value
+    assert dead_letter_payload(ValueError("bad"), b"broken json", None)["original_message"] == (
+        "broken json"
+    )
+
+
+def test_bot_api_accepts_updates_by_content_type():
+    """Тест: /updates бота принимает тело по Content-Type и отклоняет битое"""
+    tg_client = DummyTgClient()
+    app = FastAPI()
+    app.include_router(bot_api_router)
+    app.dependency_overrides[get_tg_client] = lambda: tg_client
+    client = TestClient(app)
+
+    body = dump_message(ListLinksUpdate.model_validate(PAYLOAD).model_dump())
+    response = client.post("/updates", content=body, headers={"content-type": JSON_MEDIA_TYPE})
+    broken = client.post("/updates", content=b"{", headers={"content-type": JSON_MEDIA_TYPE})
+
+    assert response.status_code == 200
+    assert tg_client.sent == [(7, "⚡ Есть обновления по ссылке https://ex.com:\nобновление\n\n")]
+    assert broken.status_code == 400
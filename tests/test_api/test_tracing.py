@@ -0,0 +1,102 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from opentelemetry import context as otel_context
+from opentelemetry import trace
+from opentelemetry.trace import NonRecordingSpan, SpanContext, TraceFlags
+
+from src.api.providers import base
+from src.api.providers.stackoverflow import StackOverflowProvider
+from src.api.scrapper_api.link_target import classify_url
+from src.api.utils.tracing import (
+    configure_tracing,
+    extract_kafka_context,
+    inject_headers,
+    kafka_trace_headers,
+    trace_requests,
+)
+from src.bot.scrapper_client import ScrapperApiClient
+
+TRACE_ID = 0x4BF92F3577B34DA6A3CE929D0E0E4736
+TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def remote_parent() -> otel_context.Context:
+    span_context = SpanContext(
+        trace_id=TRACE_ID,
+        span_id=0x00F067AA0BA902B7,
+        is_remote=True,
+        trace_flags=TraceFlags(TraceFlags.SAMPLED),
+    )
+    return trace.set_span_in_context(NonRecordingSpan(span_context))
+
+
+def test_kafka_headers_carry_trace_context() -> None:
+    """Тест: Контекст трассы переживает запись в заголовки Kafka и чтение из них"""
+    token = otel_context.attach(remote_parent())
+    try:
+        headers = kafka_trace_headers()
+    finally:
+        otel_context.detach(token)
+
+    assert dict(headers)["traceparent"] == TRACEPARENT.encode()
+    span_context = trace.get_current_span(extract_kafka_context(headers)).get_span_context()
+    assert span_context.trace_id == TRACE_ID
+    assert not trace.get_current_span(extract_kafka_context(None)).get_span_context().is_valid
+
+
+def test_http_middleware_continues_incoming_trace() -> None:
+    """Тест: Обработчик запроса продолжает трассу из заголовка traceparent клиента"""
+    app = FastAPI()
+    app.middleware("http")(trace_requests)
+
+    @app.get("/links")
+    async def links() -> dict:
+        return inject_headers()
+
+    response = TestClient(app).get("/links", headers={"traceparent": TRACEPARENT})
+
+    assert response.json()["traceparent"].startswith("00-4bf92f3577b34da6a3ce929d0e0e4736-")
+
+
+@pytest.mark.asyncio
+async def test_scrapper_client_propagates_trace() -> None:
+    """Тест: Клиент scrapper передает контекст текущей трассы в заголовках запроса"""
+    seen: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(200, json={"links": [], "size": 0})
+
+    client = ScrapperApiClient("http://scrapper", transport=httpx.MockTransport(handler))
+    token = otel_context.attach(remote_parent())
+    try:
+        await client.get_links(42)
+    finally:
+        otel_context.detach(token)
+        await client.aclose()
+
+    assert seen[0].headers["traceparent"].startswith("00-4bf92f3577b34da6a3ce929d0e0e4736-")
+    assert seen[0].headers["tg-chat-id"] == "42"
+
+
+@pytest.mark.asyncio
+async def test_provider_calls_are_child_spans(monkeypatch) -> None:
+    """Тест: Запросы к провайдеру записываются дочерними спанами текущей трассы"""
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    assert configure_tracing("scrapper", span_exporter=exporter)
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, json={"items": []}))
+    )
+    monkeypatch.setattr(base, "get_http_client", lambda: client)
+
+    with trace.get_tracer("test").start_as_current_span("tick") as tick:
+        await StackOverflowProvider().fetch(classify_url("https://stackoverflow.com/q/1"), None)
+
+    spans = {span.name: span for span in exporter.get_finished_spans()}
+    assert spans["stackoverflow GET"].parent.span_id == tick.get_span_context().span_id
+    assert spans["stackoverflow GET"].attributes["http.response.status_code"] == 200
@@ -1,32 +1,27 @@
 import pytest
+from src.api.scrapper_api.link_target import classify_url
 from src.api.scrapper_api.utils_scrapper_api import (
-    get_stackoverflow_info_api_url,
-    github_url_to_api,
+    github_target_api_url,
+    stackoverflow_info_api_url,
 )
 
 
-@pytest.mark.asyncio
 @pytest.mark.parametrize(
-    "url, expected",
+    "question_id, api_filter, expected",
     [
+        (123456, None, "https://api.stackexchange.com/2.3/questions/123456?site=stackoverflow"),
         (
-            "https://stackoverflow.com/questions/123456",
-            "https://api.stackexchange.com/2.3/questions/123456?site=stackoverflow",
-        ),
-        (
-            "https://stackoverflow.com/questions/987654/",
-            "https://api.stackexchange.com/2.3/questions/987654?site=stackoverflow",
-        ),
-        ("https://stackoverflow.com/answer/123456", None),  # Некорректная ссылка
-        (
-            "https://stackoverflow.com/questions/123456?extra=param",
-            "https://api.stackexchange.com/2.3/questions/123456?site=stackoverflow",
+            "987654",
+            "withbody",
+            "https://api.stackexchange.com/2.3/questions/987654?site=stackoverflow&filter=withbody",
         ),
     ],
 )
-async def test_stackoverflow_url_to_api(url: str, expected: str | None) -> None:
-    """Тест: Корректный парсинг ссылок StackOverflow"""
-    assert await get_stackoverflow_info_api_url(url) == expected
+def test_stackoverflow_info_api_url(
+    question_id: int | str, api_filter: str | None, expected: str
+) -> None:
+    """Тест: API-URL вопроса StackOverflow по его ID"""
+    assert stackoverflow_info_api_url(question_id, api_filter) == expected
 
 
 @pytest.mark.parametrize(
@@ -41,7 +36,6 @@ async def test_stackoverflow_url_to_api(url: str, expected: str | None) -> None:
             "https://github.com/user/repo/pull/456",
             "https://api.github.com/repos/user/repo/pulls/456",
         ),
-        ("https://github.com/user/repo/blob/main/file.py", None),  # Некорректная ссылка
         ("https://github.com/user/repo/", "https://api.github.com/repos/user/repo"),
         (
             "https://github.com/org-name/repo-name",
@@ -49,6 +43,8 @@ async def test_stackoverflow_url_to_api(url: str, expected: str | None) -> None:
         ),
     ],
 )
-def test_github_url_to_api(url: str, expected: str | None) -> None:
-    """Тест: Корректный парсинг ссылок GitHub"""
-    assert github_url_to_api(url) == expected
+def test_github_target_api_url(url: str, expected: str) -> None:
+    """Тест: API-URL репозитория, issue или pull request GitHub"""
+    target = classify_url(url)
+    assert target is not None
+    assert github_target_api_url(target) == expected
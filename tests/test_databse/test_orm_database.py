@@ -1,6 +1,14 @@
 import pytest
-from src.api.schemas.schemas import AddLinkRequest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+from src.api.providers.base import LinkCheckResult, TrackedLink
+from src.api.providers.github import GitHubProvider
+from src.api.scrapper_api.link_state import refresh_stale_links
+from src.api.scrapper_api.notification_scheduler import StaleFencingTokenError
+from src.api.scrapper_api.link_target import classify_url
+from src.api.schemas.schemas import AddLinkRequest, LinkUpdate, NotificationMode, UpdateInfo
 from src.database.orm_database import OrmDbProcessor
+from src.database.orm_models import Link, UserLink
 
 
 @pytest.mark.asyncio
@@ -52,3 +60,397 @@ async def test_remove_user_link(orm_db_processor: OrmDbProcessor):
     assert filters == ["filter1"]
     links = await orm_db_processor.get_user_links(tg_chat_id)
     assert len(links) == 0
+
+
+@pytest.mark.asyncio
+async def test_pending_updates_follow_notification_mode(orm_db_processor: OrmDbProcessor):
+    immediate_chat, digest_chat = 33331, 33332
+    await orm_db_processor.add_user(immediate_chat)
+    await orm_db_processor.add_user(digest_chat)
+    link_id = await orm_db_processor.add_link_for_user(
+        immediate_chat, AddLinkRequest(url="http://pending.com", tags=[], filters=[])
+    )
+    await orm_db_processor.add_link_for_user(
+        digest_chat, AddLinkRequest(url="http://pending.com", tags=[], filters=[])
+    )
+    assert await orm_db_processor.set_notification_settings(digest_chat, NotificationMode.DIGEST, 570)
+
+    updates = [
+        LinkUpdate(id=link_id, url="http://pending.com", description="upd", tg_chat_id=chat)
+        for chat in (immediate_chat, digest_chat)
+    ]
+    await orm_db_processor.save_pending_updates(updates)
+    await orm_db_processor.save_pending_updates(updates)
+
+    due_now = await orm_db_processor.pop_due_updates(1200, "orm_pending")
+    assert [upd.tg_chat_id for upd in due_now] == [immediate_chat]
+
+    due_at_digest = await orm_db_processor.pop_due_updates(570, "orm_pending")
+    assert [upd.tg_chat_id for upd in due_at_digest] == [digest_chat]
+
+
+@pytest.mark.asyncio
+async def test_pending_updates_dedupe_by_event_id(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 33341
+    await orm_db_processor.add_user(tg_chat_id)
+    link_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id, AddLinkRequest(url="http://pending-events.com", tags=[], filters=[])
+    )
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    updates = [
+        LinkUpdate(
+            id=link_id,
+            url="http://pending-events.com",
+            description="одинаковое описание",
+            tg_chat_id=tg_chat_id,
+            update_info=UpdateInfo(
+                title="t", user_name="u", preview="", created_at=created_at, event_id=event_id
+            ),
+        )
+        for event_id in ("comment:1", "comment:2")
+    ]
+    await orm_db_processor.save_pending_updates(updates)
+    await orm_db_processor.save_pending_updates(updates[:1])
+
+    due = await orm_db_processor.pop_due_updates(0, "orm_event_id")
+    assert len([upd for upd in due if upd.tg_chat_id == tg_chat_id]) == 2
+
+
+
+@pytest.mark.asyncio
+async def test_timezone_applies_when_rendering(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 77781
+    await orm_db_processor.add_user(tg_chat_id)
+    link_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id, AddLinkRequest(url="https://github.com/owner/tz/issues/1", tags=[], filters=[])
+    )
+    assert await orm_db_processor.set_timezone(tg_chat_id, "Asia/Tokyo")
+    assert not await orm_db_processor.set_timezone(77782, "Asia/Tokyo")
+    created_at = datetime(2024, 1, 1, 22, 30, tzinfo=timezone.utc)
+    event = UpdateInfo(title="t", user_name="u", preview="", created_at=created_at)
+
+    updates = await orm_db_processor.build_link_updates({link_id: [event]})
+    assert "Дата: 2024-01-02 07:30" in updates[0].description
+
+    await orm_db_processor.save_pending_updates(updates)
+    due = await orm_db_processor.pop_due_updates(0)
+    (pending,) = [upd for upd in due if upd.tg_chat_id == tg_chat_id]
+    assert (pending.event_at, pending.timezone) == (created_at, "Asia/Tokyo")
+
+
+@pytest.mark.asyncio
+async def test_accept_fencing_token(orm_db_processor: OrmDbProcessor):
+    assert await orm_db_processor.accept_fencing_token("orm_scheduler", 5)
+    assert await orm_db_processor.accept_fencing_token("orm_scheduler", 5)
+    assert await orm_db_processor.accept_fencing_token("orm_scheduler", 6)
+    assert not await orm_db_processor.accept_fencing_token("orm_scheduler", 5)
+
+
+@pytest.mark.asyncio
+async def test_check_updates_by_shards(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 44444
+    await orm_db_processor.add_user(tg_chat_id)
+    link_ids = set()
+    for num in range(4):
+        link_ids.add(
+            await orm_db_processor.add_link_for_user(
+                tg_chat_id,
+                AddLinkRequest(url=f"https://github.com/owner/shard-{num}", tags=[], filters=[]),
+            )
+        )
+    update_info = UpdateInfo(
+        title="t",
+        user_name="u",
+        preview="",
+        created_at=datetime(2024, 1, 1, 7, tzinfo=timezone.utc),
+    )
+
+    with patch.object(GitHubProvider, "fetch", AsyncMock(return_value=[update_info])):
+        shards = [
+            {
+                upd.id
+                for upd in await orm_db_processor.check_updates_for_all_users(index, 2)
+                if upd.tg_chat_id == tg_chat_id
+            }
+            for index in range(2)
+        ]
+
+    assert shards[0].isdisjoint(shards[1])
+    assert shards[0] | shards[1] == link_ids
+    assert all(link_id % 2 == 0 for link_id in shards[0])
+
+
+@pytest.mark.asyncio
+async def test_get_user_links_keyset_pages(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 55551
+    await orm_db_processor.add_user(tg_chat_id)
+    link_ids = [
+        await orm_db_processor.add_link_for_user(
+            tg_chat_id, AddLinkRequest(url=f"http://page-{num}.com", tags=[], filters=[])
+        )
+        for num in range(5)
+    ]
+
+    first_page = await orm_db_processor.get_user_links(tg_chat_id, limit=2)
+    assert [link.id for link in first_page] == link_ids[:2]
+
+    second_page = await orm_db_processor.get_user_links(
+        tg_chat_id, limit=2, after_id=first_page[-1].id
+    )
+    assert [link.id for link in second_page] == link_ids[2:4]
+
+    back_page = await orm_db_processor.get_user_links(
+        tg_chat_id, limit=2, before_id=second_page[0].id
+    )
+    assert [link.id for link in back_page] == link_ids[:2]
+
+    last_page = await orm_db_processor.get_user_links(
+        tg_chat_id, limit=2, after_id=second_page[-1].id
+    )
+    assert [link.id for link in last_page] == link_ids[4:]
+
+
+@pytest.mark.asyncio
+async def test_user_updates_from_stored_state(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 66661
+    await orm_db_processor.add_user(tg_chat_id)
+    tagged_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id, AddLinkRequest(url="http://state-tagged.com", tags=["work"], filters=[])
+    )
+    filtered_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id, AddLinkRequest(url="http://state-filtered.com", tags=["work"], filters=["bob"])
+    )
+    untagged_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id, AddLinkRequest(url="http://state-untagged.com", tags=[], filters=[])
+    )
+    started_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    stale = await orm_db_processor.get_stale_user_links(tg_chat_id, ["work"], started_at, 10)
+    assert set(stale) == {tagged_id, filtered_id}
+
+    event = UpdateInfo(title="t", user_name="alice", preview="", created_at=started_at)
+    await orm_db_processor.save_link_states(
+        {
+            tagged_id: LinkCheckResult([event], started_at),
+            filtered_id: LinkCheckResult([event], started_at),
+            untagged_id: LinkCheckResult([], None),
+        }
+    )
+
+    updates = await orm_db_processor.get_user_updates(tg_chat_id, started_at, ["work"])
+    # фильтр по автору отсекает событие alice у второй ссылки
+    assert [upd.id for upd in updates] == [tagged_id]
+    assert updates[0].update_info == event
+    assert await orm_db_processor.get_user_updates(
+        tg_chat_id, datetime.now(timezone.utc) + timedelta(minutes=1)
+    ) == []
+    assert await orm_db_processor.get_stale_user_links(tg_chat_id, None, started_at, 10) == {}
+
+
+@pytest.mark.asyncio
+async def test_duplicate_urls_collapse_to_one_link(orm_db_processor: OrmDbProcessor):
+    first_chat, second_chat = 77771, 77772
+    await orm_db_processor.add_user(first_chat)
+    await orm_db_processor.add_user(second_chat)
+
+    first_id = await orm_db_processor.add_link_for_user(
+        first_chat, AddLinkRequest(url="https://github.com/Owner/Repo/", tags=[], filters=[])
+    )
+    second_id = await orm_db_processor.add_link_for_user(
+        second_chat, AddLinkRequest(url="https://www.github.com/owner/repo", tags=[], filters=[])
+    )
+
+    assert first_id == second_id
+    links = await orm_db_processor.get_user_links(second_chat)
+    assert links[0].url == "https://github.com/owner/repo"
+    started_at = datetime.now(timezone.utc) + timedelta(minutes=1)
+    stale = await orm_db_processor.get_stale_user_links(second_chat, None, started_at, 10)
+    assert stale == {first_id: TrackedLink(classify_url("https://github.com/owner/repo"), None)}
+    assert await orm_db_processor.remove_user_link(first_chat, "https://github.com/OWNER/repo")
+
+
+@pytest.mark.asyncio
+async def test_webhook_targets_mark_links_push_fed(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 77781
+    await orm_db_processor.add_user(tg_chat_id)
+    link_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id,
+        AddLinkRequest(url="https://github.com/owner/hooked/pull/5", tags=[], filters=["eve"]),
+    )
+    target = classify_url("https://github.com/owner/hooked/pull/5")
+    other = classify_url("https://github.com/owner/hooked/issues/5")
+
+    links = await orm_db_processor.mark_push_fed_links([target, other])
+
+    assert links == {link_id: TrackedLink(target, None)}
+    events = [
+        UpdateInfo(title="PR", user_name=name, preview="", created_at=datetime.now(timezone.utc))
+        for name in ("ann", "eve")
+    ]
+    updates = await orm_db_processor.build_link_updates({link_id: events})
+    assert [(update.tg_chat_id, update.update_info.user_name) for update in updates] == [
+        (tg_chat_id, "eve")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_watermark_never_moves_back(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 77791
+    await orm_db_processor.add_user(tg_chat_id)
+    link_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id, AddLinkRequest(url="https://github.com/owner/watermark", tags=[], filters=[])
+    )
+    newer = datetime.now(timezone.utc).replace(microsecond=0)
+    older = newer - timedelta(hours=1)
+
+    await orm_db_processor.save_link_states({link_id: LinkCheckResult([], newer, frozenset({"a"}))})
+    await orm_db_processor.save_link_states({link_id: LinkCheckResult([], newer, frozenset({"b"}))})
+    # запоздавший результат проверки, начатой раньше
+    await orm_db_processor.save_link_states({link_id: LinkCheckResult([], older, frozenset({"c"}))})
+    await orm_db_processor.save_link_states({link_id: LinkCheckResult([], None)})
+
+    stale = await orm_db_processor.get_stale_user_links(
+        tg_chat_id, None, newer + timedelta(minutes=1), 10
+    )
+    assert stale[link_id].watermark == newer
+    assert stale[link_id].seen_ids == frozenset({"a", "b"})
+
+
+@pytest.mark.asyncio
+async def test_check_updates_pages_do_not_skip_checked_links(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 77801
+    await orm_db_processor.add_user(tg_chat_id)
+    link_ids = set()
+    targets = []
+    for num in range(3):
+        url = f"https://github.com/owner/paged/issues/{num + 1}"
+        link_ids.add(
+            await orm_db_processor.add_link_for_user(
+                tg_chat_id, AddLinkRequest(url=url, tags=[], filters=[])
+            )
+        )
+        targets.append(classify_url(url))
+    # проверка пакета выводит ссылки с webhook из выборки до следующего пакета
+    await orm_db_processor.mark_push_fed_links(targets)
+    update_info = UpdateInfo(
+        title="t", user_name="u", preview="", created_at=datetime.now(timezone.utc)
+    )
+
+    with (
+        patch.object(OrmDbProcessor, "BATCH_SIZE", 1),
+        patch.object(GitHubProvider, "fetch", AsyncMock(return_value=[update_info])),
+    ):
+        updates = await orm_db_processor.check_updates_for_all_users()
+
+    assert {upd.id for upd in updates if upd.tg_chat_id == tg_chat_id} == link_ids
+
+
+@pytest.mark.asyncio
+async def test_check_updates_shared_link_reaches_all_subscribers(orm_db_processor: OrmDbProcessor):
+    url = "https://github.com/owner/shared/issues/1"
+    chat_ids = {77821, 77822}
+    for tg_chat_id in chat_ids:
+        await orm_db_processor.add_user(tg_chat_id)
+        link_id = await orm_db_processor.add_link_for_user(
+            tg_chat_id, AddLinkRequest(url=url, tags=[], filters=[])
+        )
+    update_info = UpdateInfo(
+        title="t", user_name="u", preview="", created_at=datetime.now(timezone.utc)
+    )
+    fetch = AsyncMock(return_value=[update_info])
+
+    with (
+        patch.object(OrmDbProcessor, "BATCH_SIZE", 1),
+        patch.object(GitHubProvider, "fetch", fetch),
+    ):
+        updates = await orm_db_processor.check_updates_for_all_users()
+
+    assert {upd.tg_chat_id for upd in updates if upd.id == link_id} == chat_ids
+    # ссылка запрашивается один раз за цикл, сколько бы у неё ни было подписчиков
+    assert [call.args[0] for call in fetch.await_args_list].count(classify_url(url)) == 1
+
+@pytest.mark.asyncio
+async def test_refreshed_events_reach_subscribers(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 77811
+    await orm_db_processor.add_user(tg_chat_id)
+    link_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id,
+        AddLinkRequest(url="https://github.com/owner/refreshed/issues/1", tags=[], filters=[]),
+    )
+    event = UpdateInfo(
+        title="t", user_name="u", preview="", created_at=datetime.now(timezone.utc)
+    )
+
+    with patch.object(GitHubProvider, "fetch", AsyncMock(return_value=[event])):
+        assert await refresh_stale_links(orm_db_processor, tg_chat_id) == 1
+        # водяной знак уже сдвинут обновлением, плановая проверка события не видит
+        checked = await orm_db_processor.check_updates_for_all_users()
+
+    assert all(upd.tg_chat_id != tg_chat_id for upd in checked)
+    due = await orm_db_processor.pop_due_updates(0)
+    assert [(e.tg_chat_id, e.link_id, e.title) for e in due if e.tg_chat_id == tg_chat_id] == [
+        (tg_chat_id, link_id, "t")
+    ]
+
+
+@pytest.mark.asyncio
+async def test_legacy_non_canonical_link_found_by_target(orm_db_processor: OrmDbProcessor):
+    tg_chat_id, other_chat = 77821, 77822
+    await orm_db_processor.add_user(tg_chat_id)
+    await orm_db_processor.add_user(other_chat)
+    # строка, записанная до канонизации: цель разобрана миграцией, link_url - как прислали
+    async with orm_db_processor._get_session_factory()() as session:
+        async with session.begin():
+            legacy = Link(
+                link_url="https://www.github.com/Owner/Legacy/",
+                provider="github",
+                owner="owner",
+                repo="legacy",
+                kind="repository",
+            )
+            session.add(legacy)
+            await session.flush()
+            legacy_id = legacy.id
+            session.add(UserLink(user_id=tg_chat_id, link_id=legacy_id, tags=["old"], filters=[]))
+
+    with pytest.raises(ValueError):
+        await orm_db_processor.add_link_for_user(
+            tg_chat_id, AddLinkRequest(url="https://github.com/owner/legacy", tags=[], filters=[])
+        )
+    assert await orm_db_processor.add_link_for_user(
+        other_chat, AddLinkRequest(url="https://github.com/owner/legacy", tags=[], filters=[])
+    ) == legacy_id
+
+    removed = await orm_db_processor.remove_user_link(tg_chat_id, "https://github.com/owner/legacy")
+    assert removed == (legacy_id, ["old"], [])
+    assert await orm_db_processor.get_user_links(tg_chat_id) == []
+
+
+@pytest.mark.asyncio
+async def test_skipped_digest_minute_is_caught_up(orm_db_processor: OrmDbProcessor):
+    tg_chat_id = 77831
+    await orm_db_processor.add_user(tg_chat_id)
+    link_id = await orm_db_processor.add_link_for_user(
+        tg_chat_id, AddLinkRequest(url="http://digest-skip.com", tags=[], filters=[])
+    )
+    assert await orm_db_processor.set_notification_settings(tg_chat_id, NotificationMode.DIGEST, 0)
+    update = LinkUpdate(
+        id=link_id, url="http://digest-skip.com", description="upd", tg_chat_id=tg_chat_id
+    )
+    await orm_db_processor.save_pending_updates([update])
+
+    early = await orm_db_processor.pop_due_updates(1438, "orm_skip")
+    assert all(upd.tg_chat_id != tg_chat_id for upd in early)
+    # тики 23:59 и 00:00 пропущены, корзина 00:00 забирается в 00:01
+    due = await orm_db_processor.pop_due_updates(1, "orm_skip")
+    assert [upd.link_id for upd in due if upd.tg_chat_id == tg_chat_id] == [link_id]
+
+
+@pytest.mark.asyncio
+async def test_pop_due_updates_rechecks_fencing_token(orm_db_processor: OrmDbProcessor):
+    assert await orm_db_processor.accept_fencing_token("orm_pop_fence", 7)
+
+    with pytest.raises(StaleFencingTokenError):
+        await orm_db_processor.pop_due_updates(0, "orm_pop_fence", fencing_token=6)
+    await orm_db_processor.pop_due_updates(0, "orm_pop_fence", fencing_token=8)
+
+    assert not await orm_db_processor.accept_fencing_token("orm_pop_fence", 7)
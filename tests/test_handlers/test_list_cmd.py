@@ -7,10 +7,17 @@ import src.bot.handlers.list_cmd_handler as handler_mod
 from src.bot.handlers.list_cmd_handler import list_cmd_handler
 
 
+def button_data(button) -> bytes:
+    # в новых версиях Telethon данные callback-кнопки лежат в её типе
+    return button.data if hasattr(button, "data") else button.type.data
+
+
 @pytest.fixture(autouse=True)
 def disable_redis_cache(monkeypatch):
-    monkeypatch.setattr(handler_mod.redis_client, "get", AsyncMock(return_value=None))
-    monkeypatch.setattr(handler_mod.redis_client, "set", AsyncMock(return_value=None))
+    async def load_without_cache(user_id, loader, page=None):
+        return await loader()
+
+    monkeypatch.setattr(handler_mod.links_cache, "get_or_load", load_without_cache)
 
 
 @pytest.mark.asyncio
@@ -36,9 +43,8 @@ async def test_list_cmd_handler_with_links(mock_event: Mock) -> None:
     mock_event.message.text = "/list"
 
     test_links = [
-        {"url": "https://example1.com"},
-        {"url": "https://example2.com"},
-        {"url": "https://example3.com"},
+        {"id": num, "url": f"https://example{num}.com", "tags": [], "filters": []}
+        for num in range(1, 4)
     ]
 
     with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
@@ -71,3 +77,60 @@ async def test_list_cmd_handler_server_error(mock_event: Mock) -> None:
         mock_event.respond.assert_called_once_with(
             "❌ Произошла ошибка при получении списка отслеживаемых ссылок"
         )
+
+
+@pytest.mark.asyncio
+async def test_list_cmd_handler_first_page_has_next_button(mock_event: Mock) -> None:
+    """Тест: Первая страница запрашивается с limit и показывает кнопку «Вперед»"""
+    mock_event.message.text = "/list"
+    page = [
+        {"id": num, "url": f"https://example{num}.com", "tags": [], "filters": []}
+        for num in range(1, handler_mod.LIST_PAGE_SIZE + 1)
+    ]
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value = httpx.Response(
+            status_code=HTTPStatus.OK,
+            json={"links": page, "size": len(page), "next_after_id": page[-1]["id"]},
+        )
+
+        await list_cmd_handler(mock_event)
+
+        assert mock_get.call_args.kwargs["params"] == {"limit": handler_mod.LIST_PAGE_SIZE}
+
+    args, kwargs = mock_event.respond.call_args
+    assert args[0].endswith(f"{handler_mod.LIST_PAGE_SIZE}. https://example10.com\n")
+    [[next_button]] = kwargs["buttons"]
+    assert button_data(next_button) == f"list_next:10:{handler_mod.LIST_PAGE_SIZE + 1}".encode()
+
+
+@pytest.mark.asyncio
+async def test_list_page_callback_fetches_requested_page() -> None:
+    """Тест: Кнопка «Вперед» загружает только следующую страницу и продолжает нумерацию"""
+    event = Mock()
+    event.data = b"list_next:10:11"
+    event.sender_id = 42
+    event.edit = AsyncMock()
+    event.answer = AsyncMock()
+
+    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_get:
+        mock_get.return_value = httpx.Response(
+            status_code=HTTPStatus.OK,
+            json={
+                "links": [{"id": 11, "url": "https://example11.com", "tags": [], "filters": []}],
+                "size": 1,
+                "prev_before_id": 11,
+            },
+        )
+
+        await handler_mod.list_page_callback_handler(event)
+
+        assert mock_get.call_args.kwargs["params"] == {
+            "limit": handler_mod.LIST_PAGE_SIZE,
+            "after_id": 10,
+        }
+
+    args, kwargs = event.edit.call_args
+    assert args[0] == "Список отслеживаемых ссылок🔗:\n\n11. https://example11.com\n"
+    [[prev_button]] = kwargs["buttons"]
+    assert button_data(prev_button) == b"list_prev:11:1"
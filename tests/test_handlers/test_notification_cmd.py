@@ -0,0 +1,97 @@
+import pytest
+from datetime import time
+from unittest.mock import AsyncMock, Mock, patch
+from http import HTTPStatus
+import httpx
+
+from src.bot.handlers.notification_cmd_handler import (
+    notifications_callback_handler,
+    parse_digest_time,
+    parse_timezone,
+    timezone_cmd_handler,
+)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("/notifications", time(20, 0)),
+        ("/notifications 09:30", time(9, 30)),
+        ("/notifications завтра", None),
+    ],
+)
+def test_parse_digest_time(text: str, expected: time | None) -> None:
+    """Тест: Время дайджеста берется из аргумента команды"""
+    assert parse_digest_time(text) == expected
+
+
+@pytest.mark.asyncio
+async def test_digest_choice_is_saved_per_chat() -> None:
+    """Тест: Выбор дайджеста сохраняется для конкретного чата"""
+    event = Mock()
+    event.data = b"notif_digest:09:30"
+    event.sender_id = 42
+    event.edit = AsyncMock()
+    event.answer = AsyncMock()
+
+    with patch("httpx.AsyncClient.put", new_callable=AsyncMock) as mock_put:
+        mock_put.return_value = httpx.Response(status_code=HTTPStatus.OK)
+
+        await notifications_callback_handler(event)
+
+        args, kwargs = mock_put.call_args
+        assert args[0].endswith("/tg-chat/42/notifications")
+        assert kwargs["json"] == {"mode": "digest", "digest_time": "09:30:00"}
+    event.edit.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_choice_not_saved() -> None:
+    """Тест: Если scrapper не сохранил режим, пользователь видит ошибку"""
+    event = Mock()
+    event.data = b"notif_immediate"
+    event.sender_id = 42
+    event.edit = AsyncMock()
+    event.answer = AsyncMock()
+
+    with patch("httpx.AsyncClient.put", new_callable=AsyncMock) as mock_put:
+        mock_put.return_value = httpx.Response(status_code=HTTPStatus.NOT_FOUND)
+
+        await notifications_callback_handler(event)
+
+    event.edit.assert_not_called()
+    event.answer.assert_called_once_with("❌ Не удалось сохранить режим уведомлений", alert=True)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("/timezone Europe/Berlin", "Europe/Berlin"),
+        ("/timezone", None),
+        ("/timezone Mars/Olympus", None),
+        ("/timezone ../etc/passwd", None),
+    ],
+)
+def test_parse_timezone(text: str, expected: str | None) -> None:
+    """Тест: Принимаются только часовые пояса из базы IANA"""
+    data = parse_timezone(text)
+    assert (data.timezone if data else None) == expected
+
+
+@pytest.mark.asyncio
+async def test_timezone_is_saved_per_chat(mock_event: Mock) -> None:
+    """Тест: Выбранный часовой пояс сохраняется для чата в scrapper"""
+    mock_event.message.text = "/timezone Asia/Tokyo"
+    mock_event.sender_id = 42
+
+    with patch("httpx.AsyncClient.put", new_callable=AsyncMock) as mock_put:
+        mock_put.return_value = httpx.Response(status_code=HTTPStatus.OK)
+
+        await timezone_cmd_handler(mock_event)
+
+        args, kwargs = mock_put.call_args
+        assert args[0].endswith("/tg-chat/42/timezone")
+        assert kwargs["json"] == {"timezone": "Asia/Tokyo"}
+    mock_event.respond.assert_called_once_with(
+        "Даты в уведомлениях будут выводиться в поясе Asia/Tokyo"
+    )
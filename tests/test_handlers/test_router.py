@@ -0,0 +1,78 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.bot import router
+from src.bot.router import dispatch_message, parse_command
+from src.bot.states.states import TrackState
+from src.initialization.state_store_init import state_store
+
+
+@pytest.mark.parametrize(
+    ("text", "command"),
+    [
+        ("/track", "/track"),
+        ("/notifications 09:30", "/notifications"),
+        ("/list@link_tracker_bot", "/list"),
+        ("https://example.com", None),
+    ],
+)
+def test_parse_command(text: str, command: str | None) -> None:
+    """Тест: Команда выделяется из текста сообщения"""
+    assert parse_command(text) == command
+
+
+@pytest.mark.asyncio
+async def test_command_short_circuits_state(mock_event: Mock, monkeypatch) -> None:
+    """Тест: Команда уходит только своему обработчику, даже если идет диалог"""
+    list_handler = AsyncMock()
+    state_handler = AsyncMock()
+    monkeypatch.setitem(router.COMMAND_HANDLERS, "/list", list_handler)
+    monkeypatch.setitem(router.STATE_HANDLERS, TrackState.WAITING_FOR_TAGS, state_handler)
+    await state_store.set_state(mock_event.sender_id, TrackState.WAITING_FOR_TAGS)
+    mock_event.message.text = "/list"
+
+    await dispatch_message(mock_event)
+
+    list_handler.assert_awaited_once_with(mock_event)
+    state_handler.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unknown_command(mock_event: Mock) -> None:
+    """Тест: На неизвестную команду бот отвечает ровно один раз"""
+    mock_event.message.text = "/unknown_command"
+    mock_event.text = "/unknown_command"
+
+    await dispatch_message(mock_event)
+
+    mock_event.reply.assert_awaited_once_with(
+        "Неизвестная команда. Пожалуйста, используйте правильные команды."
+    )
+
+
+@pytest.mark.asyncio
+async def test_state_handler_receives_loaded_data(mock_event: Mock, monkeypatch) -> None:
+    """Тест: Обработчик состояния получает данные диалога, прочитанные роутером"""
+    state_handler = AsyncMock()
+    monkeypatch.setitem(router.STATE_HANDLERS, TrackState.WAITING_FOR_FILTERS, state_handler)
+    await state_store.set_state(
+        mock_event.sender_id, TrackState.WAITING_FOR_FILTERS, entered_tags=["tag1"]
+    )
+    mock_event.message.text = "filter1"
+
+    await dispatch_message(mock_event)
+
+    state_handler.assert_awaited_once_with(
+        mock_event, mock_event.sender_id, {"entered_tags": ["tag1"]}
+    )
+
+
+@pytest.mark.asyncio
+async def test_message_without_dialog_is_ignored(mock_event: Mock) -> None:
+    """Тест: Обычное сообщение вне диалога не вызывает ответа"""
+    mock_event.message.text = "просто текст"
+
+    await dispatch_message(mock_event)
+
+    mock_event.respond.assert_not_awaited()
+    mock_event.reply.assert_not_awaited()
@@ -0,0 +1,77 @@
+import httpx
+import pytest
+from http import HTTPStatus
+
+from src.api.schemas.schemas import AddLinkRequest
+from src.bot.scrapper_client import ScrapperApiClient
+
+
+def make_client(statuses: list[int], seen: list[httpx.Request]) -> ScrapperApiClient:
+    responses = iter(statuses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return httpx.Response(status_code=next(responses), json={"links": [], "size": 0})
+
+    return ScrapperApiClient(
+        "http://scrapper",
+        retries=2,
+        retry_backoff_seconds=0,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+@pytest.mark.asyncio
+async def test_idempotent_request_is_retried() -> None:
+    """Тест: GET повторяется после 503 и возвращает успешный ответ"""
+    seen: list[httpx.Request] = []
+    client = make_client([HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.OK], seen)
+
+    response = await client.get_links(42)
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(seen) == 2
+    assert seen[0].headers["tg-chat-id"] == "42"
+    stats = client.stats["GET /links"]
+    assert (stats.count, stats.errors, stats.retries) == (2, 1, 1)
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_request_is_not_retried() -> None:
+    """Тест: Добавление ссылки не повторяется, чтобы не создать её дважды"""
+    seen: list[httpx.Request] = []
+    client = make_client([HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.OK], seen)
+
+    response = await client.add_link(42, AddLinkRequest(url="https://a.com", tags=[], filters=[]))
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert len(seen) == 1
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_updates_request_negotiates_format() -> None:
+    """Тест: Запрос обновлений перечисляет в Accept допустимые форматы"""
+    seen: list[httpx.Request] = []
+    client = make_client([HTTPStatus.OK], seen)
+
+    await client.get_updates(fencing_token=3)
+
+    assert "application/json" in seen[0].headers["accept"]
+    assert seen[0].headers["x-fencing-token"] == "3"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_stats_grouped_by_route() -> None:
+    """Тест: Метрики копятся по шаблону пути, а не по конкретному чату"""
+    seen: list[httpx.Request] = []
+    client = make_client([HTTPStatus.OK, HTTPStatus.OK], seen)
+
+    await client.register_chat(1)
+    await client.register_chat(2)
+
+    assert [request.url.path for request in seen] == ["/tg-chat/1", "/tg-chat/2"]
+    assert client.stats["POST /tg-chat/{tg_chat_id}"].count == 2
+    await client.aclose()
@@ -7,7 +7,7 @@ from src.bot.handlers.track_cmd_handler import handle_waiting_for_link
 from src.bot.handlers.track_cmd_handler import handle_waiting_for_tags
 from src.bot.handlers.track_cmd_handler import handle_waiting_for_filters
 from src.bot.handlers.track_cmd_handler import handle_waiting_for_confirmation
-from src.database.sql_database import user_states, user_data
+from src.initialization.state_store_init import state_store
 from src.bot.states.states import TrackState
 
 
@@ -18,7 +18,7 @@ async def test_track_cmd_handler(mock_event: Mock) -> None:
 
     await track_cmd_handler(mock_event)
 
-    assert user_states[mock_event.sender_id] == TrackState.WAITING_FOR_LINK
+    assert await state_store.get_state(mock_event.sender_id) == TrackState.WAITING_FOR_LINK
     mock_event.respond.assert_called_once_with(
         "Пожалуйста, отправьте ссылку, которую хотите отслеживать."
     )
@@ -31,8 +31,9 @@ async def test_handle_waiting_for_link(mock_event: Mock) -> None:
 
     await handle_waiting_for_link(mock_event, mock_event.sender_id)
 
-    assert user_states[mock_event.sender_id] == TrackState.WAITING_FOR_TAGS
-    assert user_data["entered_link"] == "https://example.com"
+    state, data = await state_store.load(mock_event.sender_id)
+    assert state == TrackState.WAITING_FOR_TAGS
+    assert data["entered_link"] == "https://example.com"
     mock_event.respond.assert_called_once_with(
         "Пожалуйста, введите теги, каждый с новой строки (опционально)\n"
         "Или «-», если теги не нужны"
@@ -46,8 +47,9 @@ async def test_handle_waiting_for_tags(mock_event: Mock) -> None:
 
     await handle_waiting_for_tags(mock_event, mock_event.sender_id)
 
-    assert user_states[mock_event.sender_id] == TrackState.WAITING_FOR_FILTERS
-    assert user_data["entered_tags"] == ["tag1", "tag2"]
+    state, data = await state_store.load(mock_event.sender_id)
+    assert state == TrackState.WAITING_FOR_FILTERS
+    assert data["entered_tags"] == ["tag1", "tag2"]
     mock_event.respond.assert_called_once_with(
         "Пожалуйста, введите фильтры, каждый с новой строки (опционально)\n"
         "Или «-», если фильтры не нужны"
@@ -60,13 +62,18 @@ async def test_handle_waiting_for_filters(mock_event: Mock) -> None:
     mock_event.message.text = "filter1\nfilter2"
 
     # вписываем entered_tags и entered_link, чтобы избежать KeyError
-    user_data["entered_tags"] = ["tag1", "tag2"]
-    user_data["entered_link"] = "https://example.com"
+    await state_store.set_state(
+        mock_event.sender_id,
+        TrackState.WAITING_FOR_FILTERS,
+        entered_tags=["tag1", "tag2"],
+        entered_link="https://example.com",
+    )
 
     await handle_waiting_for_filters(mock_event, mock_event.sender_id)
 
-    assert user_states[mock_event.sender_id] == TrackState.WAITING_FOR_CONFIRMATION
-    assert user_data["entered_filters"] == ["filter1", "filter2"]
+    state, data = await state_store.load(mock_event.sender_id)
+    assert state == TrackState.WAITING_FOR_CONFIRMATION
+    assert data["entered_filters"] == ["filter1", "filter2"]
 
     mock_event.respond.assert_called_once()
     args, kwargs = mock_event.respond.call_args
@@ -77,10 +84,13 @@ async def test_handle_waiting_for_filters(mock_event: Mock) -> None:
 async def test_handle_waiting_for_confirmation_success(mock_event: Mock) -> None:
     """Тест: Бот успешно добавляет ссылку в трекер"""
     mock_event.message.text = "✅ Подтвердить"
-    user_data["entered_link"] = "https://example.com"
-    user_data["entered_tags"] = ["tag1"]
-    user_data["entered_filters"] = ["filter1"]
-    user_states[mock_event.sender_id] = TrackState.WAITING_FOR_CONFIRMATION
+    await state_store.set_state(
+        mock_event.sender_id,
+        TrackState.WAITING_FOR_CONFIRMATION,
+        entered_link="https://example.com",
+        entered_tags=["tag1"],
+        entered_filters=["filter1"],
+    )
 
     with patch("httpx.AsyncClient.post") as mock_post:
         mock_post.return_value = httpx.Response(status_code=HTTPStatus.OK)
@@ -96,10 +106,13 @@ async def test_handle_waiting_for_confirmation_success(mock_event: Mock) -> None
 async def test_handle_waiting_for_confirmation_fail(mock_event: Mock) -> None:
     """Тест: Бот отправляет ошибку, если не удалось добавить ссылку"""
     mock_event.message.text = "✅ Подтвердить"
-    user_data["entered_link"] = "https://example.com"
-    user_data["entered_tags"] = ["tag1"]
-    user_data["entered_filters"] = ["filter1"]
-    user_states[mock_event.sender_id] = TrackState.WAITING_FOR_CONFIRMATION
+    await state_store.set_state(
+        mock_event.sender_id,
+        TrackState.WAITING_FOR_CONFIRMATION,
+        entered_link="https://example.com",
+        entered_tags=["tag1"],
+        entered_filters=["filter1"],
+    )
 
     with patch("httpx.AsyncClient.post") as mock_post:
         mock_post.return_value = httpx.Response(status_code=HTTPStatus.BAD_REQUEST)
@@ -115,10 +128,13 @@ async def test_handle_waiting_for_confirmation_duplicate(mock_event: Mock) -> No
     уже существующую ссылку."""
 
     mock_event.message.text = "✅ Подтвердить"
-    user_data["entered_link"] = "https://example.com"
-    user_data["entered_tags"] = ["tag1"]
-    user_data["entered_filters"] = ["filter1"]
-    user_states[mock_event.sender_id] = TrackState.WAITING_FOR_CONFIRMATION
+    await state_store.set_state(
+        mock_event.sender_id,
+        TrackState.WAITING_FOR_CONFIRMATION,
+        entered_link="https://example.com",
+        entered_tags=["tag1"],
+        entered_filters=["filter1"],
+    )
 
     with patch("httpx.AsyncClient.post") as mock_post:
         mock_post.return_value = httpx.Response(status_code=HTTPStatus.CONFLICT)
@@ -126,3 +142,20 @@ async def test_handle_waiting_for_confirmation_duplicate(mock_event: Mock) -> No
         await handle_waiting_for_confirmation(mock_event, mock_event.sender_id)
 
         mock_event.respond.assert_called_once_with("❌ Вы уже отслеживаете эту ссылку")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_dialogs_do_not_share_data(mock_event: Mock) -> None:
+    """Тест: Ссылка, введенная одним пользователем, не попадает в диалог другого"""
+    other_user_id = mock_event.sender_id + 1
+    await state_store.set_state(
+        other_user_id, TrackState.WAITING_FOR_TAGS, entered_link="https://other.com"
+    )
+    mock_event.message.text = "https://example.com"
+
+    await handle_waiting_for_link(mock_event, mock_event.sender_id)
+
+    assert (await state_store.get_data(other_user_id))["entered_link"] == "https://other.com"
+    assert (await state_store.get_data(mock_event.sender_id))["entered_link"] == (
+        "https://example.com"
+    )
@@ -7,7 +7,7 @@ from src.bot.handlers.untrack_cmd_handler import (
     handle_waiting_for_choice,
     handle_waiting_for_confirmation,
 )
-from src.database.sql_database import user_states, user_data
+from src.initialization.state_store_init import state_store
 from src.bot.states.states import UnTrackState
 
 
@@ -72,9 +72,12 @@ async def test_handle_waiting_for_confirmation_success(mock_event: AsyncMock) ->
     """Тест: Бот должен успешно удалить ссылку"""
     mock_event.message.text = "✅ Подтвердить"
 
-    user_data["deleted_link_number"] = 1
-    user_data["user_links"] = {"links": [{"url": "https://example.com"}]}
-    user_states[mock_event.sender_id] = UnTrackState.WAITING_FOR_CONFIRMATION
+    await state_store.set_state(
+        mock_event.sender_id,
+        UnTrackState.WAITING_FOR_CONFIRMATION,
+        deleted_link_number=1,
+        user_links={"links": [{"url": "https://example.com"}]},
+    )
 
     with patch("httpx.AsyncClient.delete") as mock_delete:
         mock_delete.return_value = httpx.Response(status_code=HTTPStatus.OK)
@@ -90,9 +93,12 @@ async def test_handle_waiting_for_confirmation_success(mock_event: AsyncMock) ->
 async def test_handle_waiting_for_confirmation_fail(mock_event: AsyncMock) -> None:
     mock_event.message.text = "✅ Подтвердить"
 
-    user_data["deleted_link_number"] = 1
-    user_data["user_links"] = {"links": [{"url": "https://example.com"}]}
-    user_states[mock_event.sender_id] = UnTrackState.WAITING_FOR_CONFIRMATION
+    await state_store.set_state(
+        mock_event.sender_id,
+        UnTrackState.WAITING_FOR_CONFIRMATION,
+        deleted_link_number=1,
+        user_links={"links": [{"url": "https://example.com"}]},
+    )
 
     with patch("httpx.AsyncClient.delete") as mock_delete:
         mock_delete.return_value = httpx.Response(status_code=HTTPStatus.BAD_REQUEST)
@@ -0,0 +1,56 @@
+import json
+import logging
+import queue
+
+from src.logger.logger_init import (
+    NonBlockingQueueHandler,
+    SamplingFilter,
+    setup_logger,
+    stop_listener,
+)
+
+
+def make_record(level: int, msg: str) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, msg, None, None)
+
+
+def test_sampling_filter_thins_only_debug() -> None:
+    """Тест: Прореживаются только DEBUG-записи, длинные - со своей долей"""
+    drop_debug = SamplingFilter(debug_rate=0, large_debug_rate=0, max_message_length=10)
+    drop_large = SamplingFilter(debug_rate=1, large_debug_rate=0, max_message_length=10)
+
+    assert drop_debug.filter(make_record(logging.INFO, "x" * 100))
+    assert not drop_debug.filter(make_record(logging.DEBUG, "short"))
+    assert drop_large.filter(make_record(logging.DEBUG, "short"))
+    assert not drop_large.filter(make_record(logging.DEBUG, "x" * 100))
+
+
+def test_full_queue_drops_records() -> None:
+    """Тест: При переполненной очереди запись отбрасывается, а не блокирует поток"""
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+
+    handler.emit(make_record(logging.INFO, "first"))
+    handler.emit(make_record(logging.INFO, "second"))
+
+    assert handler.dropped == 1
+    assert handler.queue.get_nowait().getMessage() == "first"
+
+
+def test_listener_writes_json_off_thread(tmp_path) -> None:
+    """Тест: Слушатель очереди пишет JSON в файл, аргументы подставляются при форматировании"""
+    logger, listener = setup_logger("test_queue_logger", tmp_path, "DEBUG", stream=None)
+    assert setup_logger("test_queue_logger", tmp_path)[1] is listener
+
+    logger.info("Шард %s/%s проверен", 1, 4)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        logger.exception("Ошибка цикла")
+    stop_listener(listener)
+    stop_listener(listener)
+
+    entries = [json.loads(line) for line in (tmp_path / "app.json").read_text().splitlines()]
+    assert entries[0]["message"] == "Шард 1/4 проверен"
+    assert entries[0]["args"] == ["1", "4"]
+    assert entries[1]["level"] == "ERROR"
+    assert "ValueError: boom" in entries[1]["exception"]
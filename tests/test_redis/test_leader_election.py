@@ -0,0 +1,48 @@
+import pytest
+
+from src.api.notification_api.leader_election import LeaderLease
+
+
+@pytest.mark.asyncio
+async def test_only_one_leader(redis_client):
+    """Тест: Аренду держит ровно одна реплика"""
+    first = LeaderLease(redis_client, "test_scheduler", ttl_ms=5000, instance_id="first")
+    second = LeaderLease(redis_client, "test_scheduler", ttl_ms=5000, instance_id="second")
+
+    assert await first.heartbeat() is True
+    assert await second.heartbeat() is False
+    assert first.is_leader and not second.is_leader
+
+    # повторный heartbeat лидера продлевает аренду с тем же токеном
+    token = first.fencing_token
+    assert await first.heartbeat() is True
+    assert first.fencing_token == token
+
+
+@pytest.mark.asyncio
+async def test_failover_increments_fencing_token(redis_client):
+    """Тест: После ухода лидера новая реплика получает больший fencing-токен"""
+    first = LeaderLease(redis_client, "test_failover", ttl_ms=5000, instance_id="first")
+    second = LeaderLease(redis_client, "test_failover", ttl_ms=5000, instance_id="second")
+
+    await first.heartbeat()
+    old_token = first.fencing_token
+    await first.release()
+
+    assert await second.heartbeat() is True
+    assert second.fencing_token > old_token
+
+
+@pytest.mark.asyncio
+async def test_lost_lease_is_not_renewed(redis_client):
+    """Тест: Бывший лидер не продлевает чужую аренду"""
+    first = LeaderLease(redis_client, "test_lost", ttl_ms=5000, instance_id="first")
+    second = LeaderLease(redis_client, "test_lost", ttl_ms=5000, instance_id="second")
+
+    await first.heartbeat()
+    await redis_client.delete(first.lease_key)  # аренда истекла
+    await second.heartbeat()
+
+    assert await first.heartbeat() is False
+    assert not first.is_leader
+    assert second.is_leader
@@ -1,36 +1,74 @@
-import json, asyncio, pytest
-from unittest.mock import AsyncMock, patch
+import asyncio
 
-from src.bot.handlers.list_cmd_handler import list_cmd_handler
+import pytest
+from unittest.mock import AsyncMock
 
+from src.api.schemas.schemas import LinkResponse, ListLinksResponse
+from src.api.utils.links_cache import LinksCache
 
-class MockEvent:
-    """минимальный Event с методом respond()"""
 
-    def __init__(self, user_id):
-        self.sender_id = user_id
-        self.message = AsyncMock()
-        self.message.text = "/list"
-        self.respond = AsyncMock()
+def make_links(*urls: str) -> ListLinksResponse:
+    links = [
+        LinkResponse(id=num, url=url, tags=["tag"], filters=[])
+        for num, url in enumerate(urls, start=1)
+    ]
+    return ListLinksResponse(links=links, size=len(links))
 
 
 @pytest.mark.asyncio
-async def test_cache_hit_and_invalidate(redis_client, monkeypatch):
+async def test_cache_hit_and_invalidate(redis_client):
     """
-    Кэш отдаёт данные
-    после добавления ссылки кэш инвалидируется
+    Кэш отдаёт данные без обращения к scrapper,
+    после инвалидации список загружается заново
     """
-    uid = 42
-    key = f"links:{uid}"
-    cached = {"links": [{"url": "cached"}], "size": 1}
-    await redis_client.set(key, json.dumps(cached))
+    cache = LinksCache(redis_client, ttl_seconds=60, jitter_seconds=5)
+    loader = AsyncMock(return_value=make_links("https://a.com", "https://b.com"))
 
-    with patch("httpx.AsyncClient.get", new_callable=AsyncMock) as mock_http:
-        ev = MockEvent(uid)
-        await list_cmd_handler(ev)
-        mock_http.assert_not_called()
+    first = await cache.get_or_load(42, loader)
+    second = await cache.get_or_load(42, loader)
+    assert first == second
+    assert [link.url for link in second.links] == ["https://a.com", "https://b.com"]
+    loader.assert_awaited_once()
+    assert 60 <= await redis_client.ttl("links:42") <= 65
 
-    from src.bot.handlers.track_cmd_handler import redis_client as rc_code
+    await cache.invalidate(42)
+    assert await cache.get(42) is None
+    loader.return_value = make_links("https://a.com")
+    assert (await cache.get_or_load(42, loader)).size == 1
+    assert loader.await_count == 2
 
-    await rc_code.delete(key)
-    assert await redis_client.get(key) is None
+
+@pytest.mark.asyncio
+async def test_fill_started_before_invalidation_is_not_served(redis_client):
+    """Тест: Список, прочитанный до изменения, не отдается после инвалидации"""
+    cache = LinksCache(redis_client)
+
+    async def slow_loader():
+        # ссылка добавляется, пока бот читает старый список
+        await cache.invalidate(7)
+        return make_links("https://old.com")
+
+    assert (await cache.get_or_load(7, slow_loader)).size == 1
+    assert await cache.get(7) is None
+
+
+@pytest.mark.asyncio
+async def test_single_flight_on_miss(redis_client):
+    """Тест: Одновременные промахи приводят к одной загрузке из scrapper"""
+    cache = LinksCache(redis_client)
+    other_replica = LinksCache(redis_client)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.2)
+        return make_links("https://a.com")
+
+    results = await asyncio.gather(
+        *(cache.get_or_load(9, loader) for _ in range(10)),
+        other_replica.get_or_load(9, loader),
+    )
+
+    assert calls == 1
+    assert all(result.size == 1 for result in results)
@@ -0,0 +1,40 @@
+import pytest
+
+from src.api.scrapper_api.shard_coordinator import ShardAssignment, ShardCoordinator
+
+
+@pytest.mark.asyncio
+async def test_workers_split_shards(redis_client):
+    """Тест: Живые воркеры получают разные шарды одной группы"""
+    workers = [
+        ShardCoordinator(redis_client, group="test_split", worker_id=f"worker-{i}")
+        for i in range(3)
+    ]
+    for worker in workers:
+        await worker.heartbeat()
+    assignments = [await worker.heartbeat() for worker in workers]
+
+    assert sorted(assignments) == [ShardAssignment(i, 3) for i in range(3)]
+
+
+@pytest.mark.asyncio
+async def test_rebalance_on_leave(redis_client):
+    """Тест: После выхода воркера оставшиеся перераспределяют шарды"""
+    first = ShardCoordinator(redis_client, group="test_leave", worker_id="a")
+    second = ShardCoordinator(redis_client, group="test_leave", worker_id="b")
+    await first.heartbeat()
+    assert await second.heartbeat() == ShardAssignment(1, 2)
+
+    await first.leave()
+
+    assert await second.heartbeat() == ShardAssignment(0, 1)
+
+
+@pytest.mark.asyncio
+async def test_expired_worker_is_dropped(redis_client):
+    """Тест: Воркер без heartbeat дольше TTL выпадает из группы"""
+    stale = ShardCoordinator(redis_client, group="test_expire", ttl_ms=-1, worker_id="stale")
+    alive = ShardCoordinator(redis_client, group="test_expire", worker_id="alive")
+    await stale.heartbeat()
+
+    assert await alive.heartbeat() == ShardAssignment(0, 1)
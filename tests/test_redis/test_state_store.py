@@ -0,0 +1,60 @@
+import pytest
+
+from src.bot.states.state_store import MemoryStateStore, RedisStateStore
+from src.bot.states.states import TrackState, UnTrackState
+
+
+@pytest.mark.asyncio
+async def test_state_and_data_roundtrip(redis_client):
+    """Тест: Состояние и данные диалога читаются за одно обращение"""
+    store = RedisStateStore(redis_client, ttl_seconds=60)
+
+    await store.set_state(1, TrackState.WAITING_FOR_TAGS, entered_link="https://example.com")
+    await store.set_state(1, TrackState.WAITING_FOR_FILTERS, entered_tags=["a", "b"])
+
+    state, data = await store.load(1)
+    assert state == TrackState.WAITING_FOR_FILTERS
+    assert data == {"entered_link": "https://example.com", "entered_tags": ["a", "b"]}
+    assert 0 < await redis_client.ttl("fsm:1") <= 60
+
+
+@pytest.mark.asyncio
+async def test_users_are_isolated(redis_client):
+    """Тест: Параллельные диалоги разных пользователей не перетирают данные друг друга"""
+    store = RedisStateStore(redis_client)
+
+    await store.set_state(1, TrackState.WAITING_FOR_TAGS, entered_link="https://first.com")
+    await store.set_state(2, TrackState.WAITING_FOR_TAGS, entered_link="https://second.com")
+
+    assert (await store.get_data(1))["entered_link"] == "https://first.com"
+    assert (await store.get_data(2))["entered_link"] == "https://second.com"
+
+
+@pytest.mark.asyncio
+async def test_transition_is_compare_and_set(redis_client):
+    """Тест: Переход выполняется только из ожидаемого состояния"""
+    store = RedisStateStore(redis_client)
+    await store.set_state(3, UnTrackState.WAITING_FOR_CONFIRMATION, deleted_link_number=1)
+
+    assert await store.transition(3, UnTrackState.WAITING_FOR_CHOICE, None) is False
+    assert await store.transition(3, UnTrackState.WAITING_FOR_CONFIRMATION, None) is True
+    # повторное подтверждение уже ничего не делает
+    assert await store.transition(3, UnTrackState.WAITING_FOR_CONFIRMATION, None) is False
+    assert await store.load(3) == (None, {})
+
+
+@pytest.mark.asyncio
+async def test_memory_store_matches_redis_semantics():
+    """Тест: Хранилище в памяти ведет себя так же, как Redis"""
+    store = MemoryStateStore()
+
+    assert await store.transition(1, None, TrackState.WAITING_FOR_LINK) is True
+    await store.set_state(1, TrackState.WAITING_FOR_TAGS, entered_link="https://example.com")
+    assert await store.transition(1, TrackState.WAITING_FOR_LINK, None) is False
+
+    assert await store.load(1) == (
+        TrackState.WAITING_FOR_TAGS,
+        {"entered_link": "https://example.com"},
+    )
+    await store.clear(1)
+    assert await store.load(1) == (None, {})